@@ -4,13 +4,16 @@ from .common.domain import DomainDefinition
 
 # Imports from common
 from .common.dyadcarrier import DyadCarrier
+from .common.matrixfree import MatrixFreeOperator
 from .common.mma import MMA
+from .common.profiling import Profiler, Tracer
 
 # Import solvers
 from . import solvers
 
 # Modular inports
-from .core_objects import Signal, Module, Network, make_signals
+from .core_objects import Signal, Module, Network, PackedSignals, make_signals
+from .parallel import ParallelNetwork
 
 # Import modules
 from .modules.assembly import AssembleGeneral, AssembleStiffness, AssembleMass, AssemblePoisson
@@ -25,15 +28,18 @@ from .modules.aggregation import AggScaling, AggActiveSet, Aggregation, PNorm, S
 from .modules.scaling import Scaling
 
 # Further helper routines
-from .routines import finite_difference, minimize_oc, minimize_mma
+from .routines import finite_difference, hessian_vector_product, minimize_oc, minimize_mma
 
 __all__ = [
-    'Signal', 'Module', 'Network', 'make_signals',
-    'finite_difference', 'minimize_oc', 'minimize_mma',
+    'Signal', 'Module', 'Network', 'ParallelNetwork', 'PackedSignals', 'make_signals',
+    'finite_difference', 'hessian_vector_product', 'minimize_oc', 'minimize_mma',
 
     # Common
     'MMA',
     'DyadCarrier',
+    'MatrixFreeOperator',
+    'Profiler',
+    'Tracer',
     'DomainDefinition',
     'solvers',
 
@@ -0,0 +1,222 @@
+import numpy as np
+import scipy.sparse as sps
+try:  # Import fast optimized einsum
+    from opt_einsum import contract as einsum
+except ModuleNotFoundError:
+    from numpy import einsum
+
+
+def _scatter_add(out: np.ndarray, idx: np.ndarray, vals: np.ndarray):
+    """ Add the values at the (repeated) indices of the first dimension of `out`, as ``np.add.at(out, idx, vals)`` """
+    flat = idx.ravel()
+    vals = vals.reshape(flat.size, -1)
+    cols = out.reshape(out.shape[0], -1)
+    for j in range(vals.shape[1]):
+        cols[:, j].real += np.bincount(flat, weights=vals[:, j].real, minlength=len(cols))
+        if np.iscomplexobj(vals):
+            cols[:, j].imag += np.bincount(flat, weights=vals[:, j].imag, minlength=len(cols))
+
+
+class MatrixFreeOperator(object):
+    r""" Matrix-free linear operator assembled from element matrices
+
+    The operator is never formed as (sparse) matrix. Instead, it is applied element-by-element as
+    :math:`\mathbf{A}\mathbf{u} = \sum_e x_e \mathbf{L}_e^\text{T} \mathbf{A}_e \mathbf{L}_e \mathbf{u}
+    + \mathbf{C}\mathbf{u}`, where :math:`\mathbf{L}_e` gathers the degrees of freedom of element :math:`e` from
+    ``dofconn``. The vectors of the elements are gathered, multiplied with the element matrix, and scattered back in
+    chunks of elements. Only the element matrix, the connectivity and the scaling are stored. This makes it possible to
+    solve problems for which the sparse matrix does not fit in memory, using iterative solvers (e.g.
+    :class:`pymoto.solvers.CG`) with the :meth:`diagonal` for Jacobi smoothing, or
+    :class:`pymoto.solvers.GeometricMultigrid` (see :meth:`coarsen`).
+
+    The operator supports ``A @ u`` for vectors of size ``(n)`` or blocks of size ``(n, k)``, ``A.T``, ``A.conj()``
+    and ``A.diagonal()``, similar to the ``scipy.sparse`` matrices. It is the output of :class:`pymoto.AssembleGeneral`
+    with ``matrix_type=MatrixFreeOperator``.
+
+    Args:
+        element_matrix: The element matrix of size ``(m, m)``, shared by all elements, or different matrices for each
+          element of size ``(nel, m, m)``
+        dofconn: The degrees of freedom of each element of size ``(nel, m)``
+        scaling (optional): Scaling of each element :math:`x_e` of size ``(nel)``
+        n (optional): Size of the operator, by default the largest degree of freedom in ``dofconn`` plus one
+        bc (optional): Degrees of freedom of which the rows and columns of the element contributions are removed
+        constant (optional): Constant matrix :math:`\mathbf{C}` to add, e.g. the diagonal of the boundary conditions
+
+    Attributes:
+        chunk_size: Number of entries of the element matrices which are processed at once
+    """
+
+    __array_priority__ = 11.0  # For overriding numpy's matmul
+    ndim = 2  # Number of dimensions
+    chunk_size = 2**20
+
+    def __init__(self, element_matrix: np.ndarray, dofconn: np.ndarray, scaling: np.ndarray = None, n: int = None,
+                 bc: np.ndarray = None, constant=None):
+        self.element_matrix = np.asarray(element_matrix)
+        self.dofconn = dofconn
+        self.scaling = scaling
+        self.n = int(dofconn.max()) + 1 if n is None else n
+        self.bc = None if bc is None or len(bc) == 0 else np.asarray(bc)
+        self.constant = constant
+        assert self.element_matrix.ndim in (2, 3) and self.element_matrix.shape[-2:] == 2 * dofconn.shape[-1:], \
+            f"Element matrix of shape {self.element_matrix.shape} does not conform to {dofconn.shape[-1]} dofs"
+        assert scaling is None or scaling.shape == dofconn.shape[:1], \
+            f"Scaling of shape {scaling.shape} does not conform to {dofconn.shape[0]} elements"
+
+    @property
+    def shape(self):
+        """ The shape of the operator (n, n) """
+        return self.n, self.n
+
+    @property
+    def dtype(self):
+        """ The data type of the operator """
+        return np.result_type(*[a.dtype for a in (self.element_matrix, self.scaling, self.constant) if a is not None])
+
+    def _new(self, element_matrix, scaling, constant):
+        """ Operator with the same connectivity and boundary conditions """
+        op = MatrixFreeOperator(element_matrix, self.dofconn, scaling=scaling, n=self.n, bc=self.bc, constant=constant)
+        op.chunk_size = self.chunk_size
+        return op
+
+    def _chunks(self):
+        """ Slices of elements which are processed at once """
+        nel = self.dofconn.shape[0]
+        chunk_el = max(1, self.chunk_size // self.element_matrix[..., 0, :].size)
+        return [slice(e, min(e + chunk_el, nel)) for e in range(0, nel, chunk_el)]
+
+    def _element_matrices(self, el: slice):
+        """ The (scaled) element matrices of a range of elements, or the shared element matrix if not scaled """
+        mat = self.element_matrix if self.element_matrix.ndim == 2 else self.element_matrix[el]
+        if self.scaling is None:
+            return mat
+        return self.scaling[el, None, None] * mat
+
+    def matvec(self, u: np.ndarray):
+        """ Apply the operator to a vector of size ``(n)`` or a block of vectors of size ``(n, k)`` """
+        if u.shape[0] != self.n:
+            raise ValueError(f"Dimension mismatch: operator of shape {self.shape} and vector of shape {u.shape}")
+        dtype = np.result_type(self.dtype, u)
+        ub = u.astype(dtype)
+        if self.bc is not None:  # Remove the columns of the boundary conditions
+            ub[self.bc] = 0
+        y = np.zeros(u.shape, dtype=dtype)
+        expr = 'ij,ej...->ei...' if self.element_matrix.ndim == 2 else 'eij,ej...->ei...'
+        for el in self._chunks():
+            conn = self.dofconn[el]
+            ke = self.element_matrix if self.element_matrix.ndim == 2 else self.element_matrix[el]
+            fe = einsum(expr, ke, ub[conn])
+            if self.scaling is not None:
+                fe *= self.scaling[el].reshape((-1, ) + (1, ) * (fe.ndim - 1))
+            _scatter_add(y, conn, fe)
+        if self.bc is not None:  # Remove the rows of the boundary conditions
+            y[self.bc] = 0
+        if self.constant is not None:
+            y += self.constant @ u
+        return y
+
+    def __matmul__(self, other):  # self @ other
+        if isinstance(other, MatrixFreeOperator) or sps.issparse(other):
+            return NotImplemented
+        return self.matvec(np.asarray(other))
+
+    def __rmatmul__(self, other):  # other @ self
+        return (self.T @ np.asarray(other).T).T
+
+    def dot(self, other):
+        return self.__matmul__(other)
+
+    @property
+    def T(self):
+        """ The transposed operator """
+        return self.transpose()
+
+    def transpose(self):
+        return self._new(np.swapaxes(self.element_matrix, -1, -2), self.scaling,
+                         None if self.constant is None else self.constant.T)
+
+    def conj(self):
+        """ The complex conjugated operator """
+        return self._new(self.element_matrix.conj(), None if self.scaling is None else self.scaling.conj(),
+                         None if self.constant is None else self.constant.conj())
+
+    def astype(self, dtype):
+        """ The operator with its data converted to another type """
+        scaling = None if self.scaling is None else self.scaling.astype(dtype)
+        return self._new(self.element_matrix.astype(dtype), scaling,
+                         None if self.constant is None else self.constant.astype(dtype))
+
+    def diagonal(self):
+        """ The diagonal of the operator, e.g. for Jacobi smoothing """
+        diag = np.zeros(self.n, dtype=self.dtype)
+        diag_el = np.diagonal(self.element_matrix, axis1=-2, axis2=-1)
+        if self.scaling is not None:
+            diag_el = self.scaling[:, None] * diag_el
+        _scatter_add(diag, self.dofconn, np.broadcast_to(diag_el, self.dofconn.shape))
+        if self.bc is not None:
+            diag[self.bc] = 0
+        if self.constant is not None:
+            diag += self.constant.diagonal()
+        return diag
+
+    def tocsc(self):
+        """ Assemble the operator as sparse matrix, e.g. for a direct solver on the coarsest level of multigrid """
+        m = self.dofconn.shape[-1]
+        rows = np.repeat(self.dofconn, m, axis=1).ravel()
+        cols = np.tile(self.dofconn, (1, m)).ravel()
+        vals = np.broadcast_to(self._element_matrices(slice(None)), (self.dofconn.shape[0], m, m)).ravel()
+        if self.bc is not None:
+            isbc = np.zeros(self.n, dtype=bool)
+            isbc[self.bc] = True
+            keep = ~(isbc[rows] | isbc[cols])
+            rows, cols, vals = rows[keep], cols[keep], vals[keep]
+        mat = sps.coo_matrix((vals, (rows, cols)), shape=self.shape).tocsc()
+        return mat if self.constant is None else sps.csc_matrix(mat + self.constant)
+
+    def toarray(self):
+        """ Convert to a dense array, only advised for small operators """
+        return self.tocsc().toarray()
+
+    def coarsen(self, R, dofconn: np.ndarray, parent: np.ndarray):
+        r""" The Galerkin projection :math:`\mathbf{R}^\text{T}\mathbf{A}\mathbf{R}` on a coarse level of elements
+
+        Each element is nested in a coarse element, such that the interpolation of its degrees of freedom only
+        depends on the degrees of freedom of that coarse element. The coarse operator consists of element matrices
+        :math:`\sum_{e \in E} x_e \mathbf{P}_e^\text{T} \mathbf{A}_e \mathbf{P}_e` for each coarse element :math:`E`,
+        where :math:`\mathbf{P}_e` is the (dense) block of the interpolation :math:`\mathbf{R}` of element :math:`e`.
+
+        Args:
+            R: The interpolation from the coarse to this level of size ``(n, nc)``
+            dofconn: The degrees of freedom of each coarse element of size ``(nelc, mc)``
+            parent: The coarse element containing each element of size ``(nel)``
+
+        Returns:
+            The coarse :class:`MatrixFreeOperator` of size ``(nc, nc)``
+        """
+        R = sps.csr_matrix(R)
+        m, mc = self.dofconn.shape[-1], dofconn.shape[-1]
+        isbc = np.zeros(self.n, dtype=bool)
+        if self.bc is not None:
+            isbc[self.bc] = True
+        mat_c = np.zeros((dofconn.shape[0], mc, mc), dtype=np.result_type(self.dtype, R.dtype))
+        nel = self.dofconn.shape[0]
+        chunk_el = max(1, self.chunk_size // (m * mc))
+        for el in [slice(e, min(e + chunk_el, nel)) for e in range(0, nel, chunk_el)]:
+            conn, conn_c = self.dofconn[el], dofconn[parent[el]]
+
+            # Interpolation of each element from the dofs of its coarse element
+            sub = R[conn.ravel()].tocoo()
+            e_loc, i_loc = np.divmod(sub.row, m)
+            match = conn_c[e_loc] == sub.col[:, None]
+            if not np.all(np.any(match, axis=1)):
+                raise ValueError("The elements are not nested within the given coarse elements")
+            P = np.zeros(conn.shape + (mc, ), dtype=R.dtype)
+            P[e_loc, i_loc, np.argmax(match, axis=1)] = sub.data
+            P[isbc[conn]] = 0  # The boundary conditions remove the element contributions
+
+            np.add.at(mat_c, parent[el], np.swapaxes(P, -1, -2) @ (self._element_matrices(el) @ P))
+
+        constant = None if self.constant is None else sps.csr_matrix(R.T @ (self.constant @ R))
+        op = MatrixFreeOperator(mat_c, dofconn, n=R.shape[1], constant=constant)
+        op.chunk_size = self.chunk_size
+        return op
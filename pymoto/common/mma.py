@@ -1,5 +1,7 @@
 import numpy as np
 from pymoto.utils import _parse_to_list, _concatenate_to_array
+from pymoto.core_objects import PackedSignals
+from pymoto.common.profiling import traced
 
 
 def residual(x, y, z, lam, xsi, eta, mu, zet, s, upp, low, P0, P1, Q0, Q1, epsi, a0, a, b, c, d, alfa, beta):
@@ -219,6 +221,8 @@ class MMA:
         xmin: Minimum design variable (can be a vector)
         xmax: Maximum design variable (can be a vector)
         fn_callback: A function that is called just before calling the response() in each iteration
+        multi_seed: Calculate the sensitivities of all responses in a single backward sweep using
+          ``sensitivity_multi()``, instead of one backward sweep per response
         verbosity: Level of information to print
           0 - No prints
           1 - Only convergence message
@@ -249,6 +253,9 @@ class MMA:
 
         self.pijconst = kwargs.get("pijconst", 1e-3)
 
+        # Calculate the sensitivities of all responses in one (stacked) backward sweep
+        self.multi_seed = kwargs.get("multi_seed", False)
+
         self.a0 = kwargs.get("a0", 1.0)
 
         self.epsimin = kwargs.get("epsimin", 1e-7)  # Or 1e-7 ?? witout sqrt(m+n) or 1e-9
@@ -292,8 +299,9 @@ class MMA:
     def response(self):
         change = 1
 
-        # Save initial state
-        xval, self.cumlens = _concatenate_to_array([s.state for s in self.variables])
+        # Save initial state, the variables are views into the packed design vector
+        self.packed = PackedSignals(self.variables)
+        xval, self.cumlens = self.packed.state, self.packed.cumlens
         self.n = len(xval)
 
         # Set outer bounds
@@ -337,11 +345,7 @@ class MMA:
             self.funbl.reset()
 
             # Set the new states
-            for i, s in enumerate(self.variables):
-                if self.cumlens[i+1]-self.cumlens[i] == 1:
-                    s.state = xval[self.cumlens[i]]
-                else:
-                    s.state = xval[self.cumlens[i]:self.cumlens[i+1]]
+            self.packed.state = xval
 
             if self.fn_callback is not None:
                 self.fn_callback()
@@ -365,23 +369,10 @@ class MMA:
                 break
 
             # Calculate and save sensitivities
-            df = ()
-            for i, s_out in enumerate(self.responses):
-                for s in self.responses:
-                    s.reset()
-
-                s_out.sensitivity = s_out.state*0 + 1.0
-
-                self.funbl.sensitivity()
-
-                sens_list = []
-                for v in self.variables:
-                    sens_list.append(v.sensitivity if v.sensitivity is not None else 0*v.state)
-                dff, _ = _concatenate_to_array(sens_list)
-                df += (dff, )
-
-                # Reset sensitivities for the next response
-                self.funbl.reset()
+            if self.multi_seed:
+                df = self._sensitivity_multi()
+            else:
+                df = self._sensitivity_single()
 
             if self.verbosity >= 3:
                 # Display info on variables
@@ -425,7 +416,7 @@ class MMA:
                         msg += ', '
                 print(msg)
 
-            xnew, change = self.mmasub(xval.copy(), np.hstack(f), np.vstack(df))
+            xnew, change = self.mmasub(xval.copy(), np.hstack(f), df)
 
             # Stopping criteria on step size
             rel_stepsize = np.linalg.norm((xval - xnew)/self.dx) / np.linalg.norm(xval/self.dx)
@@ -437,6 +428,47 @@ class MMA:
             xval = xnew
             self.iter += 1
 
+    def _sensitivity_single(self):
+        """ Calculate the sensitivities of all responses, with one backward sweep per response """
+        df = np.empty((len(self.responses), self.n), dtype=self.packed.dtype)
+        for i, s_out in enumerate(self.responses):
+            for s in self.responses:
+                s.reset()
+
+            s_out.sensitivity = s_out.state*0 + 1.0
+
+            # The sensitivities of the variables are accumulated directly into row i
+            self.packed.bind_sensitivity(df[i])
+            self.funbl.sensitivity()
+            self.packed.gather_sensitivity()
+
+            # Reset sensitivities for the next response
+            self.funbl.reset()
+        return df
+
+    def _sensitivity_multi(self):
+        """ Calculate the sensitivities of all responses at once, with one stacked backward sweep """
+        n_resp = len(self.responses)
+        for s in self.responses:
+            s.reset()
+        for i, s_out in enumerate(self.responses):
+            seeds = np.zeros((n_resp, *np.shape(s_out.state)))  # Unit seed for response i, as in _sensitivity
+            seeds[i] = 1.0
+            s_out.add_sensitivity_multi(seeds)
+
+        self.funbl.sensitivity_multi()
+
+        df = np.empty((n_resp, self.n), dtype=self.packed.dtype)
+        for i in range(n_resp):
+            sens_list = []
+            for v in self.variables:
+                sens_list.append(v.sensitivity_multi[i] if v.sensitivity_multi is not None else 0*v.state)
+            _concatenate_to_array(sens_list, out=df[i])
+
+        self.funbl.reset()
+        return df
+
+    @traced('optimizer')
     def mmasub(self, xval, g, dg):
         if self.dx is None:
             self.dx = self.xmax - self.xmin
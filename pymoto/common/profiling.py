@@ -0,0 +1,300 @@
+""" Profiling of the evaluation time and memory usage of modules """
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class Profiler:
+    """ Collects evaluation statistics of the modules in a Network
+
+    For each module instance and each phase (``response``, ``sensitivity``, ``reset``, ...) the number of calls, and the
+    total, minimum and maximum evaluation time are recorded. Optionally, the memory allocated during the calls is
+    traced using ``tracemalloc``. Nested networks share the profiler of their parent, such that the results can be
+    reported hierarchically. The profiler is usually created using :meth:`pymoto.Network.enable_profiling`.
+
+    Example:
+        Profile a number of iterations and convert to a ``pandas.DataFrame``::
+
+            profiler = network.enable_profiling()
+            for i in range(10):
+                network.response()
+            df = pandas.DataFrame(profiler.records())
+
+    Args:
+        memory (optional): Also trace the memory allocated during each call. This slows down the execution considerably
+          and is only reliable for sequential (not multi-threaded) execution of the modules. Before Python 3.9 the peak
+          within a call cannot be traced, and the memory still allocated at the end of the call is reported instead.
+    """
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.stats = dict()  # Per module id: {phase: {count, total, min, max, bytes, peak_bytes}}
+        self.modules = dict()  # Per module id: (module, parent)
+        self._lock = threading.Lock()
+        self._mem_stack = []
+        self._started_tracing = self.memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self):
+        """ Stop tracing the memory allocations, if they were started by this profiler """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def clear(self):
+        """ Clear all collected statistics """
+        self.stats.clear()
+        self.modules.clear()
+
+    def call(self, module, phase: str, fn, parent=None):
+        """ Call a function and record its statistics
+
+        Args:
+            module: The module the statistics belong to
+            phase: Name of the phase, e.g. `response` or `sensitivity`
+            fn: Function to call without arguments
+            parent (optional): The (Network) module containing the module
+
+        Returns:
+            The return value of ``fn``
+        """
+        if self.memory:
+            mem_start = self._memory_enter()
+        t_start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            elapsed = time.perf_counter() - t_start
+            mem_bytes, mem_peak = self._memory_exit(mem_start) if self.memory else (0, 0)
+            self._record(module, phase, parent, elapsed, mem_bytes, mem_peak)
+
+    @staticmethod
+    def _traced_memory():
+        """ The current and peak traced memory, of which the peak is only available from Python 3.9 """
+        current, peak = tracemalloc.get_traced_memory()
+        return (current, peak) if hasattr(tracemalloc, 'reset_peak') else (current, current)
+
+    def _memory_enter(self):
+        current, peak = self._traced_memory()
+        if len(self._mem_stack) > 0:  # Keep the peak of the calling level, before it is reset
+            self._mem_stack[-1] = max(self._mem_stack[-1], peak)
+        self._mem_stack.append(current)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        return current
+
+    def _memory_exit(self, mem_start):
+        current, peak = self._traced_memory()
+        peak = max(peak, self._mem_stack.pop())
+        if len(self._mem_stack) > 0:
+            self._mem_stack[-1] = max(self._mem_stack[-1], peak)
+        return current - mem_start, peak - mem_start
+
+    def _record(self, module, phase, parent, elapsed, mem_bytes, mem_peak):
+        with self._lock:
+            key = id(module)
+            if key not in self.modules:
+                self.modules[key] = (module, parent)
+            st = self.stats.setdefault(key, dict()).get(phase)
+            if st is None:
+                self.stats[key][phase] = dict(count=1, total=elapsed, min=elapsed, max=elapsed, bytes=mem_bytes,
+                                              peak_bytes=mem_peak)
+                return
+            st['count'] += 1
+            st['total'] += elapsed
+            st['min'] = min(st['min'], elapsed)
+            st['max'] = max(st['max'], elapsed)
+            st['bytes'] += mem_bytes
+            st['peak_bytes'] = max(st['peak_bytes'], mem_peak)
+
+    def _name(self, module, parent):
+        """ Name of a module, including its position in the parent """
+        name = type(module).__name__
+        if parent is not None and hasattr(parent, 'mods'):
+            for i, m in enumerate(parent.mods):
+                if m is module:
+                    return f"{i}:{name}"
+        return name
+
+    def _children(self):
+        children = dict()
+        for key, (m, parent) in self.modules.items():
+            children.setdefault(None if parent is None else id(parent), []).append(key)
+        return children
+
+    def report(self):
+        """ Hierarchical report of the statistics
+
+        Returns:
+            List of dictionaries with keys ``name``, ``module``, ``phases`` (statistics for each phase), and
+            ``children`` (the reports of the modules inside a nested network)
+        """
+        children = self._children()
+
+        def build(key):
+            m, parent = self.modules[key]
+            return dict(name=self._name(m, parent), module=m, phases={k: dict(v) for k, v in self.stats[key].items()},
+                        children=[build(c) for c in children.get(key, [])])
+
+        roots = [k for k, (m, parent) in self.modules.items() if parent is None or id(parent) not in self.modules]
+        return [build(k) for k in roots]
+
+    def records(self):
+        """ Flat list of the statistics, with one entry per module and phase
+
+        This is convenient to convert to a table, e.g. using ``pandas.DataFrame(profiler.records())``. The ``path``
+        shows the location of the module in nested networks, and ``self_time`` is the time spent excluding the time of
+        any child modules.
+
+        Returns:
+            List of dictionaries
+        """
+        rows = []
+
+        def flatten(rep, path, depth):
+            for r in rep:
+                p = f"{path}/{r['name']}" if path else r['name']
+                for phase, st in r['phases'].items():
+                    child_time = sum(c['phases'][phase]['total'] for c in r['children'] if phase in c['phases'])
+                    rows.append(dict(path=p, module=type(r['module']).__name__, depth=depth, phase=phase,
+                                     count=st['count'], total=st['total'], self_time=st['total'] - child_time,
+                                     mean=st['total'] / st['count'], min=st['min'], max=st['max'], bytes=st['bytes'],
+                                     peak_bytes=st['peak_bytes']))
+                flatten(r['children'], p, depth + 1)
+
+        flatten(self.report(), '', 0)
+        return rows
+
+    def print_report(self, sort: bool = True, phases=None):
+        """ Print the statistics as a table
+
+        Args:
+            sort (optional): Sort the entries on self-time, instead of the network order
+            phases (optional): List of phases to print, by default all are printed
+        """
+        rows = [r for r in self.records() if phases is None or r['phase'] in phases]
+        if sort:
+            rows = sorted(rows, key=lambda r: r['self_time'], reverse=True)
+        width = max([len(r['path']) for r in rows] + [6])
+        header = f"{'Module':<{width}} {'Phase':<12} {'Count':>6} {'Total [s]':>10} {'Self [s]':>10} " \
+                 f"{'Min [s]':>10} {'Max [s]':>10}"
+        if self.memory:
+            header += f" {'Mem [MB]':>9} {'Peak [MB]':>9}"
+        print(header)
+        print('-' * len(header))
+        for r in rows:
+            line = f"{r['path']:<{width}} {r['phase']:<12} {r['count']:>6d} {r['total']:>10.4f} {r['self_time']:>10.4f} " \
+                   f"{r['min']:>10.4f} {r['max']:>10.4f}"
+            if self.memory:
+                line += f" {r['bytes'] / 1e6:>9.2f} {r['peak_bytes'] / 1e6:>9.2f}"
+            print(line)
+
+
+class Tracer:
+    """ Records the execution of modules, linear solvers, and optimizers as a Chrome trace
+
+    While the tracer is active, each call to ``Module.response``, ``Module.sensitivity``, ``LinearSolver.update``,
+    ``LinearSolver.solve`` and ``MMA.mmasub`` is recorded as a span, tagged with the type of the object and the tags of
+    its signals. The result is saved in the Chrome trace-event format, which can be loaded in ``chrome://tracing`` or
+    `Perfetto <https://ui.perfetto.dev>`_. Each thread is shown separately, which shows whether modules are executed
+    concurrently.
+
+    Example:
+        Trace one MMA iteration::
+
+            with pymoto.Tracer('trace.json'):
+                pymoto.minimize_mma(network, [sx], [obj, con], maxit=1)
+
+    Args:
+        filename (optional): File to save the trace to when the tracer is deactivated
+    """
+    active = None  # The currently active tracer
+
+    def __init__(self, filename: str = None):
+        self.filename = filename
+        self.events = []
+        self._lock = threading.Lock()
+        self._threads = set()
+        self._previous = None
+        self._t0 = time.perf_counter()
+
+    def __enter__(self):
+        self._previous, Tracer.active = Tracer.active, self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        Tracer.active = self._previous
+        if self.filename is not None:
+            self.save(self.filename)
+
+    def add_span(self, name: str, category: str, t_start: float, t_end: float, args: dict = None):
+        """ Add a complete event
+
+        Args:
+            name: Name of the span
+            category: Category of the span, e.g. `module` or `solver`
+            t_start: Start time as obtained from ``time.perf_counter()``
+            t_end: End time as obtained from ``time.perf_counter()``
+            args (optional): Additional information to show with the span
+        """
+        tid = threading.get_ident()
+        event = dict(name=name, cat=category, ph='X', ts=(t_start - self._t0) * 1e6, dur=(t_end - t_start) * 1e6,
+                     pid=os.getpid(), tid=tid, args=dict() if args is None else args)
+        with self._lock:
+            if tid not in self._threads:
+                self._threads.add(tid)
+                self.events.append(dict(name='thread_name', ph='M', pid=os.getpid(), tid=tid,
+                                        args=dict(name=threading.current_thread().name)))
+            self.events.append(event)
+
+    def save(self, filename: str):
+        """ Save the trace as JSON file in the Chrome trace-event format """
+        with open(filename, 'w') as f:
+            json.dump(dict(traceEvents=self.events, displayTimeUnit='ms'), f)
+
+
+def _trace_args(obj):
+    """ Information on an object to show in a trace """
+    args = dict()
+    for key, attr in [('inputs', 'sig_in'), ('outputs', 'sig_out')]:
+        if hasattr(obj, attr):
+            args[key] = [getattr(s, 'tag', '') for s in getattr(obj, attr)]
+    return args
+
+
+def traced(category: str):
+    """ Decorator to record the calls of a method (or coroutine) in the active :class:`Tracer` """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                tracer = Tracer.active
+                if tracer is None:
+                    return await fn(self, *args, **kwargs)
+                t_start = time.perf_counter()
+                try:
+                    return await fn(self, *args, **kwargs)
+                finally:
+                    tracer.add_span(f"{type(self).__name__}.{fn.__name__}", category, t_start, time.perf_counter(),
+                                    _trace_args(self))
+            async_wrapper.__traced__ = True
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            tracer = Tracer.active
+            if tracer is None:
+                return fn(self, *args, **kwargs)
+            t_start = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                tracer.add_span(f"{type(self).__name__}.{fn.__name__}", category, t_start, time.perf_counter(),
+                                _trace_args(self))
+        wrapper.__traced__ = True
+        return wrapper
+    return decorator
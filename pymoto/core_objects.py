@@ -1,11 +1,18 @@
 import sys
+import asyncio
 import warnings
 import inspect
 import time
 import copy
+import weakref
+from contextlib import contextmanager
+import numpy as np
 from typing import Union, List, Any
 from abc import ABC, abstractmethod
-from .utils import _parse_to_list, _concatenate_to_array, _split_from_array
+from concurrent.futures import ThreadPoolExecutor
+from .utils import _parse_to_list, _array_layout, _concatenate_to_array, _split_from_array, _nbytes
+from .graph import base_signal, build_dependencies, execute_graph
+from .common.profiling import Profiler, Tracer, traced
 
 
 # Local helper functions
@@ -30,23 +37,25 @@ def stderr_warning(text):
 
 def get_init_loc():
     """ Get the location (outside of this file) where the 'current' function is called """
-    stk = inspect.stack()
-    frame = None
-    for fr in stk:
-        if fr[1] != __file__:
-            frame = fr
-            break
+    # Walking the frames is much cheaper than inspect.stack(), which also reads the source code of every frame
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
     if frame is None:
         return "N/A", "N/A", "N/A"
-    _, filename, line, func, _, _ = frame
-    return filename, line, func
+    return frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name
 
 
-def get_init_str():
-    filename, line, func = get_init_loc()
+def fmt_init_loc(loc: tuple):
+    """ Formats a location obtained with get_init_loc() as string """
+    filename, line, func = loc
     return f"File \"{filename}\", line {line}, in {func}"
 
 
+def get_init_str():
+    return fmt_init_loc(get_init_loc())
+
+
 def fmt_slice(sl):
     """ Formats slices as string
     :param sl: Generic slice or tuple of slices
@@ -78,6 +87,8 @@ class Signal:
     >> Signal(tag='x2')
 
     """
+    _spare = None  # Sensitivity buffer which is kept for re-use after a reset
+
     def __init__(self, tag: str = "", state: Any = None, sensitivity: Any = None, min: Any = None, max: Any = None):
         """
         Keyword Args:
@@ -88,14 +99,47 @@ class Signal:
             max: Maximum allowed value
         """
         self.tag = tag
+        self._version = 0
+        self._state = None
         self.state = state
         self.sensitivity = sensitivity
+        self.sensitivity_multi = None
+        self.tangent = None
+        self.sensitivity_tangent = None
         self.min = min
         self.max = max
         self.keep_alloc = sensitivity is not None
 
-        # Save error string to location where it is initialized
-        self._init_loc = get_init_str()
+        # Save location where it is initialized, for error messages
+        self._origin = get_init_loc()
+
+    @property
+    def _init_loc(self):
+        return fmt_init_loc(self._origin)
+
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, new_state):
+        # Setting an identical scalar (e.g. a frozen continuation parameter) does not count as a change
+        if not _is_same_scalar(self._state, new_state):
+            self._version += 1
+        self._state = new_state
+
+    @property
+    def version(self):
+        """ Counter which is incremented every time the state is (re-)assigned
+
+        Note that changing the state in-place (e.g. ``x.state[0] = 1.0``) is not registered. After modifying the state
+        in-place, it must be re-assigned (``x.state = x.state``) to mark it as changed. An incremental :class:`Network`
+        detects such changes for its external inputs only.
+        """
+        return self._version
+
+    def _increment_version(self):
+        self._version += 1
 
     def _err_str(self):
         return err_fmt(f"Signal \'{self.tag}\', initialized in {self._init_loc}")
@@ -106,7 +150,7 @@ class Signal:
             if ds is None:
                 return
             if self.sensitivity is None:
-                self.sensitivity = copy.deepcopy(ds)
+                self.sensitivity = self._new_sensitivity(ds)
             else:
                 self.sensitivity += ds
             return self
@@ -120,6 +164,67 @@ class Signal:
             ds_shape = ds.shape if hasattr(ds, 'shape') else ()
             raise ValueError(f"Cannot add argument of shape {ds_shape} to the sensitivity of shape {sens_shape}"+self._err_str()) from None
 
+    def _new_sensitivity(self, ds: Any):
+        """ Copy the first sensitivity contribution, into the spare buffer if it is compatible """
+        if isinstance(ds, np.ndarray) and ds.dtype != object:
+            spare, self._spare = self._spare, None
+            if spare is not None and spare.shape == ds.shape and spare.dtype == ds.dtype:
+                np.copyto(spare, ds)
+                return spare
+            return ds.copy()
+        return copy.deepcopy(ds)
+
+    def _zero_sensitivity(self):
+        """ A zero-valued sensitivity for the state, in the spare buffer if it is compatible """
+        spare, self._spare = self._spare, None
+        if spare is not None and isinstance(self.state, np.ndarray) and spare.shape == self.state.shape and \
+                spare.dtype == self.state.dtype:
+            spare[...] = 0
+            return spare
+        return self.state * 0
+
+    def add_sensitivity_multi(self, ds: Any):
+        """ Add a new term to the internal stacked sensitivities, which have a leading dimension for the seeds
+
+        The stacked sensitivities are either a numerical array of shape ``(n_seeds, *state.shape)`` or an object array
+        of length ``n_seeds`` (e.g. for matrix-valued signals, with a :class:`DyadCarrier` for each seed).
+        """
+        try:
+            if ds is None:
+                return
+            if self.sensitivity_multi is None:
+                self.sensitivity_multi = copy.deepcopy(ds)
+            else:
+                self.sensitivity_multi += ds
+            return self
+        except TypeError:
+            raise TypeError(f"Adding wrong type '{type(ds).__name__}' to the stacked sensitivity "
+                            f"'{type(self.sensitivity_multi).__name__}'" + self._err_str())
+        except ValueError:
+            sens_shape = self.sensitivity_multi.shape if hasattr(self.sensitivity_multi, 'shape') else ()
+            ds_shape = ds.shape if hasattr(ds, 'shape') else ()
+            raise ValueError(f"Cannot add argument of shape {ds_shape} to the stacked sensitivity of shape "
+                             f"{sens_shape}" + self._err_str()) from None
+
+    def add_sensitivity_tangent(self, ds: Any):
+        """ Add a new term to the internal tangent of the sensitivity (forward-over-reverse derivative) """
+        try:
+            if ds is None:
+                return
+            if self.sensitivity_tangent is None:
+                self.sensitivity_tangent = copy.deepcopy(ds)
+            else:
+                self.sensitivity_tangent += ds
+            return self
+        except TypeError:
+            raise TypeError(f"Adding wrong type '{type(ds).__name__}' to the sensitivity tangent "
+                            f"'{type(self.sensitivity_tangent).__name__}'" + self._err_str())
+        except ValueError:
+            sens_shape = self.sensitivity_tangent.shape if hasattr(self.sensitivity_tangent, 'shape') else ()
+            ds_shape = ds.shape if hasattr(ds, 'shape') else ()
+            raise ValueError(f"Cannot add argument of shape {ds_shape} to the sensitivity tangent of shape "
+                             f"{sens_shape}" + self._err_str()) from None
+
     def reset(self, keep_alloc: bool = None):
         """ Reset the sensitivities to zero or None
         This must be called to clear internal memory of subsequent sensitivity calculations.
@@ -130,6 +235,8 @@ class Signal:
         Returns:
             self
         """
+        self.sensitivity_multi = None
+        self.sensitivity_tangent = None
         if self.sensitivity is None:
             return self
         if keep_alloc is None:
@@ -147,6 +254,14 @@ class Signal:
             self.sensitivity = None
         return self
 
+    def _recycle_sensitivity(self):
+        """ Keep the array of the sensitivity, to re-use it as buffer for the next sensitivity after a reset
+
+        Any references to the old sensitivity will then be overwritten.
+        """
+        if not self.keep_alloc and isinstance(self.sensitivity, np.ndarray) and self.sensitivity.dtype != object:
+            self._spare, self.sensitivity = self.sensitivity, None
+
     def __getitem__(self, item):
         """ Obtain a sliced signal, for using its partial contents.
 
@@ -178,10 +293,26 @@ class Signal:
         return f"Signal \"{self.tag}\" with {state_msg} and {sens_msg} at {hex(id(self))}"
 
 
+def _normalize_index(sl):
+    """ Converts the lists in an index to arrays, and determines if it is a basic index (of which the result is a view)
+    :param sl: Index, slice, or tuple of these
+    :return: The normalized index and a flag if it is basic
+    """
+    items = sl if isinstance(sl, tuple) else (sl, )
+    items = tuple(np.asarray(i) if isinstance(i, list) else i for i in items)
+    basic = all(i is None or i is Ellipsis or isinstance(i, slice) or
+                (isinstance(i, (int, np.integer)) and not isinstance(i, bool)) for i in items)
+    return (items if isinstance(sl, tuple) else items[0]), basic
+
+
 class SignalSlice(Signal):
     """ Slice operator for a Signal
     The sliced values are referenced to their original source Signal, such that they can be used and updated in modules.
     This means that updating the values in this SignalSlice changes the data in its source Signal.
+
+    For basic slices (integers and ``start:stop:step``) the state and sensitivity are views into the original arrays.
+    Sensitivities are added in-place into the sensitivity of the source Signal, also for index arrays, for which
+    repeated indices are accumulated.
     """
     def __init__(self, orig_signal, sl, tag=None):
         self.orig_signal = orig_signal
@@ -194,13 +325,23 @@ class SignalSlice(Signal):
         else:
             self.tag = tag
 
-        # Save error string to location where it is initialized
-        self._init_loc = get_init_str()
+        # Save location where it is initialized, for error messages
+        self._origin = get_init_loc()
+
+    @property
+    def slice(self):
+        return self._slice
+
+    @slice.setter
+    def slice(self, sl):
+        self._slice = sl
+        self._index, self._basic = _normalize_index(sl)  # Resolved once, instead of at every access
+        self._seed_slice = (slice(None), ) + (self._index if isinstance(self._index, tuple) else (self._index, ))
 
     @property
     def state(self):
         try:
-            return None if self.orig_signal.state is None else self.orig_signal.state[self.slice]
+            return None if self.orig_signal.state is None else self.orig_signal.state[self._index]
         except Exception as e:
             # Possibilities: Unslicable object (TypeError) or Wrong dimensions or out of range (IndexError)
             raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.state (getter). Signal details:" +
@@ -209,16 +350,24 @@ class SignalSlice(Signal):
     @state.setter
     def state(self, new_state):
         try:
-            self.orig_signal.state[self.slice] = new_state
+            self.orig_signal.state[self._index] = new_state
+            self.orig_signal._increment_version()
         except Exception as e:
             # Possibilities: Unslicable object (TypeError) or Wrong dimensions or out of range (IndexError)
             raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.state (setter). Signal details:" +
                           self._err_str()).with_traceback(sys.exc_info()[2])
 
+    @property
+    def version(self):
+        return self.orig_signal.version
+
+    def _increment_version(self):
+        self.orig_signal._increment_version()
+
     @property
     def sensitivity(self):
         try:
-            return None if self.orig_signal.sensitivity is None else self.orig_signal.sensitivity[self.slice]
+            return None if self.orig_signal.sensitivity is None else self.orig_signal.sensitivity[self._index]
         except Exception as e:
             # Possibilities: Unslicable object (TypeError) or Wrong dimensions or out of range (IndexError)
             raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.sensitivity (getter). Signal details:" +
@@ -230,23 +379,135 @@ class SignalSlice(Signal):
             if self.orig_signal.sensitivity is None:
                 if new_sens is None:
                     return  # Sensitivity doesn't need to be initialized when it is set to None
-                try:
-                    self.orig_signal.sensitivity = self.orig_signal.state * 0  # Make a new copy with 0 values
-                except TypeError:
-                    if self.orig_signal.state is None:
-                        raise TypeError("Could not initialize sensitivity because state is not set" + self._err_str())
-                    else:
-                        raise TypeError(f"Could not initialize sensitivity for type \'{type(self.orig_signal.state).__name__}\'")
+                self._allocate_sensitivity()
 
             if new_sens is None:
                 new_sens = 0  # reset() uses this
 
-            self.orig_signal.sensitivity[self.slice] = new_sens
+            self.orig_signal.sensitivity[self._index] = new_sens
         except Exception as e:
             # Possibilities: Unslicable object (TypeError) or Wrong dimensions or out of range (IndexError)
             raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.state (setter). Signal details:" +
                           self._err_str()).with_traceback(sys.exc_info()[2])
 
+    def _allocate_sensitivity(self):
+        try:
+            self.orig_signal.sensitivity = self.orig_signal._zero_sensitivity()  # Make a copy with 0 values
+        except TypeError:
+            if self.orig_signal.state is None:
+                raise TypeError("Could not initialize sensitivity because state is not set" + self._err_str())
+            else:
+                raise TypeError(f"Could not initialize sensitivity for type \'{type(self.orig_signal.state).__name__}\'")
+
+    def add_sensitivity(self, ds: Any):
+        """ Add a new term to the sensitivity, in-place into the sensitivity of the source signal """
+        if ds is None:
+            return
+        orig = self.orig_signal
+        target = orig.state if orig.sensitivity is None else orig.sensitivity
+        if not isinstance(target, np.ndarray) or target.dtype == object or \
+                not isinstance(ds, (np.ndarray, np.generic, *_builtin_scalars)) or \
+                not np.can_cast(np.result_type(ds), target.dtype, casting='same_kind'):
+            return super().add_sensitivity(ds)  # Generic types, which are updated with get, add, and set
+        if orig.sensitivity is None:
+            self._allocate_sensitivity()
+        sens = orig.sensitivity
+        try:
+            if not self._basic:
+                np.add.at(sens, self._index, ds)  # Scatter-add, which also accumulates repeated indices
+                return self
+            view = sens[self._index]
+            if isinstance(view, np.ndarray):
+                view += ds  # Updates the original sensitivity directly
+            else:
+                sens[self._index] += ds  # Single entry
+            return self
+        except TypeError:
+            raise TypeError(f"Adding wrong type '{type(ds).__name__}' to the sensitivity '{type(sens).__name__}'" +
+                            self._err_str())
+        except ValueError:
+            raise ValueError(f"Cannot add argument of shape {np.shape(ds)} to the sensitivity of shape "
+                             f"{np.shape(sens[self._index])}" + self._err_str()) from None
+
+    @property
+    def sensitivity_multi(self):
+        try:
+            sens = self.orig_signal.sensitivity_multi
+            return None if sens is None else sens[self._seed_slice]
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.sensitivity_multi (getter). "
+                                   "Signal details:" + self._err_str()).with_traceback(sys.exc_info()[2])
+
+    @sensitivity_multi.setter
+    def sensitivity_multi(self, new_sens):
+        try:
+            if self.orig_signal.sensitivity_multi is None:
+                if new_sens is None:
+                    return
+                if self.orig_signal.state is None:
+                    raise TypeError("Could not initialize sensitivity because state is not set" + self._err_str())
+                n_seeds = len(new_sens)
+                shape = (n_seeds, *np.shape(self.orig_signal.state))
+                self.orig_signal.sensitivity_multi = np.zeros(shape, dtype=np.result_type(self.orig_signal.state,
+                                                                                           new_sens))
+
+            self.orig_signal.sensitivity_multi[self._seed_slice] = 0 if new_sens is None else new_sens
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.sensitivity_multi (setter). "
+                                   "Signal details:" + self._err_str()).with_traceback(sys.exc_info()[2])
+
+    @property
+    def tangent(self):
+        try:
+            return None if self.orig_signal.tangent is None else self.orig_signal.tangent[self._index]
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.tangent (getter). Signal details:" +
+                          self._err_str()).with_traceback(sys.exc_info()[2])
+
+    @tangent.setter
+    def tangent(self, new_tan):
+        try:
+            if self.orig_signal.tangent is None:
+                if new_tan is None:
+                    return
+                if self.orig_signal.state is None:
+                    raise TypeError("Could not initialize tangent because state is not set" + self._err_str())
+                self.orig_signal.tangent = np.zeros(np.shape(self.orig_signal.state),
+                                                    dtype=np.result_type(self.orig_signal.state, new_tan))
+
+            self.orig_signal.tangent[self._index] = 0 if new_tan is None else new_tan
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.tangent (setter). Signal details:" +
+                          self._err_str()).with_traceback(sys.exc_info()[2])
+
+    @property
+    def sensitivity_tangent(self):
+        try:
+            sens = self.orig_signal.sensitivity_tangent
+            return None if sens is None else sens[self._index]
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.sensitivity_tangent (getter). "
+                                   "Signal details:" + self._err_str()).with_traceback(sys.exc_info()[2])
+
+    @sensitivity_tangent.setter
+    def sensitivity_tangent(self, new_sens):
+        try:
+            if self.orig_signal.sensitivity_tangent is None:
+                if new_sens is None:
+                    return
+                if self.orig_signal.state is None:
+                    raise TypeError("Could not initialize sensitivity because state is not set" + self._err_str())
+                self.orig_signal.sensitivity_tangent = np.zeros(np.shape(self.orig_signal.state),
+                                                                dtype=np.result_type(self.orig_signal.state, new_sens))
+
+            self.orig_signal.sensitivity_tangent[self._index] = 0 if new_sens is None else new_sens
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised in SignalSlice.sensitivity_tangent (setter). "
+                                   "Signal details:" + self._err_str()).with_traceback(sys.exc_info()[2])
+
+    def _recycle_sensitivity(self):
+        pass  # The sensitivity is part of the source signal
+
     def reset(self, keep_alloc: bool = None):
         """ Reset the sensitivities to zero or None
         This must be called to clear internal memory of subsequent sensitivity calculations.
@@ -255,9 +516,75 @@ class SignalSlice(Signal):
         """
         if self.sensitivity is not None:
             self.sensitivity = None
+        if self.sensitivity_multi is not None:
+            self.sensitivity_multi = None
+        if self.sensitivity_tangent is not None:
+            self.sensitivity_tangent = None
         return self
 
 
+_builtin_scalars = (float, int, complex, bool)
+_builtin_scalar_types = frozenset(_builtin_scalars)  # For fast lookup of exact types
+_sequence_types = frozenset((list, tuple, set))
+
+
+def _is_same_scalar(a: Any, b: Any):
+    """ Checks if two values are identical scalars (of the same type) """
+    if type(a) is not type(b):
+        return False
+    if type(a) in _builtin_scalars:
+        return a == b
+    if not np.isscalar(a):
+        return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _copy_array(val: Any):
+    """ Copies numerical arrays and scalars for later comparison, other types are not stored """
+    if val is None or np.isscalar(val):
+        return val
+    if isinstance(val, np.ndarray) and val.dtype != object:
+        return val.copy()
+    return _NotComparable
+
+
+def _is_same_array(stored: Any, val: Any):
+    """ Checks if a value is identical to a value stored with :func:`_copy_array` """
+    if stored is _NotComparable:
+        return False
+    if stored is None or val is None:
+        return stored is None and val is None
+    if np.shape(stored) != np.shape(val):
+        return False
+    return bool(np.array_equal(stored, val))
+
+
+class _NotComparable:
+    """ Placeholder for values that cannot be compared """
+    pass
+
+
+def _stack_seeds(values: list):
+    """ Stack the values of a number of seeds into one object, with a leading dimension for the seeds """
+    if all(v is None for v in values):
+        return None
+    ref = next(v for v in values if v is not None)
+    if np.isscalar(ref) or (isinstance(ref, np.ndarray) and ref.dtype != object):
+        return np.stack([np.zeros_like(ref) if v is None else np.asarray(v) for v in values])
+    stacked = np.empty(len(values), dtype=object)
+    for i, v in enumerate(values):
+        stacked[i] = ref*0 if v is None else v
+    return stacked
+
+
+def _signal_version(sig: Any):
+    """ Get the state version of a signal, or None if the signal does not keep track of changes """
+    return getattr(sig, 'version', None)
+
+
 def make_signals(*args):
     """ Batch-initialize a number of Signals
     :param args: Tags for a number of Signals
@@ -269,6 +596,98 @@ def make_signals(*args):
     return ret
 
 
+class PackedSignals:
+    """ Packs the states and sensitivities of multiple signals into contiguous vectors, e.g. for an optimizer
+
+    Assigning a vector to :attr:`state` sets the state of each signal to a view of its part of the vector, reshaped to
+    the original shape of the state. After :meth:`bind_sensitivity`, the sensitivities of the signals are views into
+    one vector as well, such that the sensitivity analysis accumulates directly into it. Only the signals of which the
+    state or sensitivity has been replaced in the meantime (*e.g.* by a reset), as well as scalars and sliced signals,
+    are copied when reading :attr:`state` and :meth:`gather_sensitivity`.
+
+    >> packed = PackedSignals([sx, sy])
+
+    >> x = packed.state  # Contiguous design vector
+
+    >> packed.state = xnew  # Sets sx.state and sy.state as views of xnew, without copying
+
+    Args:
+        signals: The signals to pack
+    """
+    def __init__(self, signals: Union[Signal, List[Signal]]):
+        self.signals = _parse_to_list(signals)
+        states = [s.state for s in self.signals]
+        self.cumlens, self.dtype = _array_layout(states)
+        self.n = int(self.cumlens[-1])
+        self._shapes = [np.shape(x) for x in states]
+        self._bindable = [isinstance(x, np.ndarray) and not isinstance(s, SignalSlice)
+                          for s, x in zip(self.signals, states)]
+        self._state, self._state_views = np.empty(self.n, dtype=self.dtype), [None for _ in self.signals]
+        self._sens, self._sens_views = None, [None for _ in self.signals]
+        self.state = _concatenate_to_array(states, out=self._state)[0]
+
+    def _part(self, vec: np.ndarray, i: int):
+        return vec[self.cumlens[i]:self.cumlens[i+1]]
+
+    @property
+    def state(self):
+        """ The contiguous vector with the states of all signals """
+        for i, s in enumerate(self.signals):
+            if s.state is not self._state_views[i]:
+                self._part(self._state, i)[...] = np.ravel(s.state)
+                self._state_views[i] = None
+        return self._state
+
+    @state.setter
+    def state(self, x: np.ndarray):
+        x = np.asarray(x)
+        if x.shape != (self.n, ):
+            raise ValueError(f"Cannot set a packed state of shape {x.shape} for {self.n} values")
+        if x.dtype != self.dtype or not x.flags.c_contiguous:
+            x = x.astype(self.dtype)
+        self._state = x
+        for i, s in enumerate(self.signals):
+            if self._bindable[i]:
+                self._state_views[i] = self._part(x, i).reshape(self._shapes[i])
+                s.state = self._state_views[i]
+            else:
+                s.state = x[self.cumlens[i]] if len(self._shapes[i]) == 0 else self._part(x, i).reshape(self._shapes[i])
+                self._state_views[i] = None
+
+    def bind_sensitivity(self, out: np.ndarray = None):
+        """ Set the sensitivities of the signals to zero-valued views into one contiguous vector
+
+        Args:
+            out (optional): The vector to use, which is allocated if not given
+
+        Returns:
+            The vector of sensitivities
+        """
+        self._sens = np.zeros(self.n, dtype=self.dtype) if out is None else out
+        self._sens[...] = 0
+        for i, s in enumerate(self.signals):
+            if self._bindable[i]:
+                self._sens_views[i] = self._part(self._sens, i).reshape(self._shapes[i])
+                s.sensitivity = self._sens_views[i]
+            else:
+                self._sens_views[i] = None
+        return self._sens
+
+    def gather_sensitivity(self):
+        """ The contiguous vector with the sensitivities of all signals, which are zero if not set
+
+        Only the sensitivities which are not bound (anymore) are copied into the vector.
+        """
+        if self._sens is None:
+            self._sens = np.zeros(self.n, dtype=self.dtype)
+        for i, s in enumerate(self.signals):
+            sens = s.sensitivity
+            if sens is not self._sens_views[i]:
+                self._part(self._sens, i)[...] = 0 if sens is None else np.ravel(sens)
+                self._sens_views[i] = None
+        return self._sens
+
+
 def _is_valid_signal(sig: Any):
     """ Checks if the argument is a valid Signal object
     :param sig: The object to check
@@ -293,36 +712,62 @@ def _is_valid_module(mod: Any):
     return False
 
 
-def _check_function_signature(fn, signals):
-    """ Checks the function signature against given signal list
+_signature_cache = dict()
+
+
+def _function_signature_args(fn):
+    """ Determines the minimum and maximum number of positional arguments of a response_ or sensitivity_ function
+    The result is cached per function, so the signature is only inspected once for each Module subclass.
     :param fn: response_ or sensitivity_ function of a Module
-    :param signals: The signals involved
+    :return: min_args, max_args (-1 for variable number of arguments)
     """
+    key = getattr(fn, '__func__', fn)
+    if key in _signature_cache:
+        return _signature_cache[key]
     min_args, max_args = 0, 0
-    callstr = f"{type(fn.__self__).__name__}.{fn.__name__}{inspect.signature(fn)}"
     for s, p in inspect.signature(fn).parameters.items():
         if p.kind == inspect.Parameter.POSITIONAL_ONLY or p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
             if p.default != inspect.Parameter.empty:
-                raise SyntaxError(f"{callstr} must not have default values \"{p}\"")
+                raise SyntaxError(f"{_fmt_call(fn)} must not have default values \"{p}\"")
             min_args += 1
             if max_args >= 0:
                 max_args += 1
         elif p.kind == inspect.Parameter.VAR_POSITIONAL:
             max_args = -1
         elif p.kind == inspect.Parameter.KEYWORD_ONLY:
-            raise SyntaxError(f"{callstr} may not contain keyword arguments \"{p}\"")
+            raise SyntaxError(f"{_fmt_call(fn)} may not contain keyword arguments \"{p}\"")
         elif p.kind == inspect.Parameter.VAR_KEYWORD:
-            raise SyntaxError(f"{callstr} may not contain \"{p}\"")
+            raise SyntaxError(f"{_fmt_call(fn)} may not contain \"{p}\"")
+    _signature_cache[key] = (min_args, max_args)
+    return min_args, max_args
+
+
+def _fmt_call(fn):
+    return f"{type(fn.__self__).__name__}.{fn.__name__}{inspect.signature(fn)}"
+
+
+def _check_function_signature(fn, signals):
+    """ Checks the function signature against given signal list
+    :param fn: response_ or sensitivity_ function of a Module
+    :param signals: The signals involved
+    """
+    min_args, max_args = _function_signature_args(fn)
     if len(signals) < min_args:
-        raise TypeError(f"Not enough arguments ({len(signals)}) for {callstr}")
+        raise TypeError(f"Not enough arguments ({len(signals)}) for {_fmt_call(fn)}")
     if max_args >= 0 and len(signals) > max_args:
-        raise TypeError(f"Too many arguments ({len(signals)}) for {callstr}")
+        raise TypeError(f"Too many arguments ({len(signals)}) for {_fmt_call(fn)}")
 
 
 class RegisteredClass(object):
     """
     Abstract base class that can keep track of its subclasses and can instantiate them as well, based on their name.
     """
+    _generation = 0  # Incremented when a new subclass is defined
+    _subclass_cache = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        RegisteredClass._generation += 1
 
     @classmethod
     def create(cls, sub_type: str, *args, **kwargs):
@@ -344,8 +789,16 @@ class RegisteredClass(object):
     def all_subclasses(cls):
         """
         Looks for subclasses of this class, used in creation
+        The result is cached until a new subclass is defined or one of the subclasses is deleted.
         :return: List of (unique) subclasses
         """
+        cached = RegisteredClass._subclass_cache.get(cls)
+        if cached is not None and cached[0] == RegisteredClass._generation:
+            subs_out = {k: ref() for k, ref in cached[1].items()}
+            duplicates = [(d, ref()) for d, ref in cached[2]]
+            if all(v is not None for v in subs_out.values()) and all(do is not None for _, do in duplicates):
+                cls._warn_duplicates(subs_out, duplicates)
+                return subs_out
 
         # Recursive search for subclasses
         def get_subs(cl):
@@ -375,13 +828,21 @@ class RegisteredClass(object):
                     duplicate_obj.append(sc)
                 seen[scn] += 1
 
-        # Emit warning if duplicates are found
-        for d, do in zip(duplicates, duplicate_obj):
-            warnings.warn("Duplicated module '{}', currently defined as {}, duplicate definition at {}"
-                          .format(d, subs_out[d], do), Warning)
+        # Store weak references, such that deleted subclasses are not kept alive by the cache
+        RegisteredClass._subclass_cache[cls] = (RegisteredClass._generation,
+                                                {k: weakref.ref(v) for k, v in subs_out.items()},
+                                                [(d, weakref.ref(do)) for d, do in zip(duplicates, duplicate_obj)])
 
+        cls._warn_duplicates(subs_out, list(zip(duplicates, duplicate_obj)))
         return subs_out
 
+    @staticmethod
+    def _warn_duplicates(subs_out: dict, duplicates: list):
+        """ Emit warning if duplicates are found """
+        for d, do in duplicates:
+            warnings.warn("Duplicated module '{}', currently defined as {}, duplicate definition at {}"
+                          .format(d, subs_out[d], do), Warning)
+
     @classmethod
     def print_children(cls):
         print(": ".join([cls.__name__+" subtypes", ", ".join(cls.all_subclasses().keys())]))
@@ -408,6 +869,19 @@ class Module(ABC, RegisteredClass):
     >> Module(sig_in=[inputs], sig_out=[outputs]
     """
 
+    # Flag if the response can be re-evaluated at any time without side effects, to restore its outputs
+    recomputable = False
+
+    # Indices of the outputs of which the previous state may be overwritten by the response (see `Network`)
+    _reusable_outputs = frozenset()
+
+    # Floating point type for the computations of the module, or None to follow the inputs (see `Network`)
+    _precision = None
+
+    @property
+    def _init_loc(self):
+        return fmt_init_loc(self._origin)
+
     def _err_str(self, module_signature: bool = True, init: bool = True, fn=None):
         str_list = []
 
@@ -427,7 +901,7 @@ class Module(ABC, RegisteredClass):
     # flake8: noqa: C901
     def __init__(self, sig_in: Union[Signal, List[Signal]] = None, sig_out: Union[Signal, List[Signal]] = None,
                  *args, **kwargs):
-        self._init_loc = get_init_str()
+        self._origin = get_init_loc()
 
         self.sig_in = _parse_to_list(sig_in)
         self.sig_out = _parse_to_list(sig_out)
@@ -453,13 +927,7 @@ class Module(ABC, RegisteredClass):
 
         try:
             # If no output signals are given, but are required, try to initialize them here
-            req_args = 0
-            for s, p in inspect.signature(self._sensitivity).parameters.items():
-                if p.kind == inspect.Parameter.POSITIONAL_ONLY or p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
-                    if req_args >= 0:
-                        req_args += 1
-                elif p.kind == inspect.Parameter.VAR_POSITIONAL:
-                    req_args = -1
+            _, req_args = _function_signature_args(self._sensitivity)
             if len(self.sig_out) == 0 and req_args >= 0 and req_args != len(self.sig_out):
                 # Initialize a number of output signals with default names
                 self.sig_out = [Signal(f"{type(self).__name__}_output{i}") for i in range(req_args)]
@@ -470,6 +938,7 @@ class Module(ABC, RegisteredClass):
             raise type(e)(str(e) + "\n\t| Module details:" +
                           self._err_str(fn=self._sensitivity)).with_traceback(sys.exc_info()[2])
 
+    @traced('module')
     def response(self):
         """ Calculate the response from sig_in and output this to sig_out """
         try:
@@ -493,6 +962,7 @@ class Module(ABC, RegisteredClass):
     def __call__(self):
         return self.response()
 
+    @traced('module')
     def sensitivity(self):
         """  Calculate sensitivities using backpropagation
 
@@ -508,19 +978,175 @@ class Module(ABC, RegisteredClass):
             # Calculate the new sensitivities of the inputs
             sens_out = _parse_to_list(self._sensitivity(*sens_in))
 
+            # Add the sensitivities to the signals
+            self._add_input_sensitivities(sens_out)
+
+            return self
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity(). Module details:" +
+                          self._err_str(fn=self._sensitivity)).with_traceback(sys.exc_info()[2])
+
+    @traced('module')
+    def sensitivity_multi(self):
+        """ Calculate the sensitivities for multiple seeds at once, using backpropagation
+
+        The stacked sensitivities in ``sensitivity_multi`` of the output signals, with a leading dimension for the
+        seeds, are backpropagated to ``sensitivity_multi`` of the input signals. This way, for instance, the gradients
+        of multiple responses are calculated in one sweep. Modules without outputs are skipped.
+        """
+        try:
+            sens_in = [getattr(s, 'sensitivity_multi', None) for s in self.sig_out]
+
+            if all([s is None for s in sens_in]):
+                return  # If none of the adjoint variables is set, or there are no outputs
+
+            # Calculate the new sensitivities of the inputs
+            sens_out = _parse_to_list(self._sensitivity_multi(*sens_in))
+
             # Check if enough sensitivities are calculated
             if len(sens_out) != len(self.sig_in):
                 raise TypeError(f"Number of sensitivities calculated ({len(sens_out)}) is unequal to "
                                 f"number of input signals ({len(self.sig_in)})")
 
-            # Add the sensitivities to the signals
             for i, ds in enumerate(sens_out):
-                self.sig_in[i].add_sensitivity(ds)
+                self.sig_in[i].add_sensitivity_multi(ds)
 
             return self
         except Exception as e:
-            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity(). Module details:" +
-                          self._err_str(fn=self._sensitivity)).with_traceback(sys.exc_info()[2])
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity_multi(). Module details:" +
+                          self._err_str(fn=self._sensitivity_multi)).with_traceback(sys.exc_info()[2])
+
+    @traced('module')
+    def tangent(self):
+        """ Propagate the tangents (directional derivatives) of the inputs forward to the outputs
+
+        Based on the ``tangent`` of the input signals, the tangents of the output signals are calculated by the
+        linearized response (Jacobian-vector product). Input signals without a tangent are considered to be constant.
+        """
+        try:
+            tan_in = [s.tangent for s in self.sig_in]
+
+            if all([t is None for t in tan_in]):
+                for s in self.sig_out:
+                    s.tangent = None
+                return self  # None of the inputs is perturbed
+
+            tan_out = _parse_to_list(self._tangent(*tan_in))
+
+            # Check if enough tangents are calculated
+            if len(tan_out) != len(self.sig_out):
+                raise TypeError(f"Number of tangents calculated ({len(tan_out)}) is unequal to "
+                                f"number of output signals ({len(self.sig_out)})")
+
+            for i, dy in enumerate(tan_out):
+                self.sig_out[i].tangent = dy
+            return self
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling tangent(). Module details:" +
+                          self._err_str(fn=self._tangent)).with_traceback(sys.exc_info()[2])
+
+    @traced('module')
+    def sensitivity_tangent(self):
+        """ Propagate the tangents of the sensitivities backward (forward-over-reverse differentiation)
+
+        This differentiates the sensitivity analysis in the direction given by the ``tangent`` of the input signals,
+        which must be propagated first using :meth:`tangent`. The ``sensitivity_tangent`` of the outputs, together with
+        their ``sensitivity``, are backpropagated to the ``sensitivity_tangent`` of the inputs. For a scalar response
+        this results in the Hessian-vector product.
+        """
+        try:
+            sens = [s.sensitivity for s in self.sig_out]
+            sens_tan = [s.sensitivity_tangent for s in self.sig_out]
+
+            if len(self.sig_out) > 0 and all([s is None for s in sens + sens_tan]):
+                return  # If none of the adjoint variables is set
+
+            # Calculate the new sensitivity tangents of the inputs
+            sens_out = _parse_to_list(self._sensitivity_tangent(*sens_tan))
+
+            # Check if enough sensitivities are calculated
+            if len(sens_out) != len(self.sig_in):
+                raise TypeError(f"Number of sensitivity tangents calculated ({len(sens_out)}) is unequal to "
+                                f"number of input signals ({len(self.sig_in)})")
+
+            for i, ds in enumerate(sens_out):
+                self.sig_in[i].add_sensitivity_tangent(ds)
+
+            return self
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity_tangent(). Module details:" +
+                          self._err_str(fn=self._sensitivity_tangent)).with_traceback(sys.exc_info()[2])
+
+    def _out_buffer(self, i: int, shape: tuple, dtype: Any = np.float64):
+        """ Get an array to write the response of output `i` into
+
+        If the network allows it (see ``reuse_outputs`` of :class:`Network`) and the output signal still holds the array
+        of the previous response with equal shape and type, this array is returned to be overwritten in-place.
+        Otherwise, a new (uninitialized) array is allocated.
+        """
+        buf = self._reused_output(i)
+        if buf is not None and buf.shape == tuple(shape) and buf.dtype == dtype:
+            return buf
+        buf = np.empty(shape, dtype=dtype)
+        self._keep_output(i, buf)
+        return buf
+
+    def _reused_output(self, i: int):
+        """ The object given out for output `i` in the previous response, if it may be overwritten in-place """
+        if i not in self._reusable_outputs:
+            return None
+        refs = self.__dict__.get('_out_refs', dict())
+        obj = refs[i]() if i in refs else None
+        return obj if obj is not None and obj is self.sig_out[i].state else None
+
+    def _keep_output(self, i: int, obj: Any):
+        """ Remember the object given out for output `i`, to be overwritten in the next response if allowed """
+        if i in self._reusable_outputs:
+            # A weak reference, such that discarded states can be freed
+            self.__dict__.setdefault('_out_refs', dict())[i] = weakref.ref(obj)
+
+    def _cast(self, val):
+        """ Convert a floating point array to the precision of the module (see ``precision`` of :class:`Network`)
+
+        Complex arrays are converted to the complex type of equal precision. Other values are returned unchanged.
+        """
+        if self._precision is None or not isinstance(val, np.ndarray) or not np.issubdtype(val.dtype, np.inexact):
+            return val
+        dtype = self._precision if np.isrealobj(val) else np.result_type(self._precision, np.complex64)
+        return val if val.dtype == dtype else val.astype(dtype)
+
+    def _typed(self, val, dtype):
+        """ Get a constant of the module (*e.g.* an element matrix) as the given floating point type
+
+        Complex constants are converted to the complex type of equal precision. The conversion is only done once, and
+        is kept for the next calls with the same type.
+        """
+        if not np.issubdtype(dtype, np.inexact):
+            return val
+        dtype = np.result_type(dtype, np.complex64) if np.iscomplexobj(val) else np.dtype(dtype)
+        if val.dtype == dtype:
+            return val
+        cache = self.__dict__.setdefault('_typed_cache', dict())
+        key = (id(val), dtype)
+        if key not in cache or cache[key][0] is not val:
+            cache[key] = (val, val.astype(dtype))
+        return cache[key][1]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_out_refs', None)  # Weak references to the output buffers cannot be pickled
+        state.pop('_typed_cache', None)
+        return state
+
+    def _add_input_sensitivities(self, sens_out: list):
+        """ Add the calculated sensitivities to the input signals """
+        # Check if enough sensitivities are calculated
+        if len(sens_out) != len(self.sig_in):
+            raise TypeError(f"Number of sensitivities calculated ({len(sens_out)}) is unequal to "
+                            f"number of input signals ({len(self.sig_in)})")
+
+        for i, ds in enumerate(sens_out):
+            self.sig_in[i].add_sensitivity(ds)
 
     def reset(self):
         """ Reset the state of the sensitivities (they are set to zero or to None) """
@@ -546,6 +1172,35 @@ class Module(ABC, RegisteredClass):
             stderr_warning(f"Sensitivity routine is used, but not defined, in {type(self).__name__}")
         return [None for _ in self.sig_in]
 
+    def _sensitivity_multi(self, *args):
+        """ Sensitivities for stacked seeds, by default by evaluating :meth:`_sensitivity` for each seed """
+        n_seeds = len(next(a for a in args if a is not None))
+        sens = []
+        for i in range(n_seeds):
+            dx = _parse_to_list(self._sensitivity(*[None if a is None else a[i] for a in args]))
+            if len(dx) != len(self.sig_in):
+                raise TypeError(f"Number of sensitivities calculated ({len(dx)}) is unequal to "
+                                f"number of input signals ({len(self.sig_in)})")
+            sens.append(dx)
+        return [_stack_seeds([dx[j] for dx in sens]) for j in range(len(self.sig_in))]
+
+    def _tangent(self, *args):
+        """ Forward-mode derivative: calculates the output tangents from the input tangents, which may be None """
+        raise NotImplementedError(f"Tangent routine is not defined in {type(self).__name__}")
+
+    def _sensitivity_tangent(self, *args):
+        """ Forward-over-reverse derivative: calculates the tangents of the input sensitivities
+
+        The arguments are the tangents of the output sensitivities (which may be None). The output sensitivities and
+        the input tangents are available in the signals.
+        """
+        raise NotImplementedError(f"Sensitivity tangent routine is not defined in {type(self).__name__}")
+
+    def _symbolic_expression(self):
+        """ Symbolic (``sympy``) expression of an elementwise response in terms of ``inp0, inp1, ...``, or None if the
+        response cannot be expressed as such. This is used by :meth:`Network.fuse`. """
+        return None
+
     def _reset(self):
         pass
 
@@ -562,9 +1217,72 @@ class Network(Module):
     >> Network([ {type="module1", sig_in=[sig1, sig2], sig_out=[sig3]},
                  {type="module2", sig_in=[sig3], sig_out=[sig4]} ])
 
+    Independent modules (e.g. the branches of a robust formulation) can be executed concurrently on a pool of
+    threads by setting ``n_threads``. The execution order is then determined from the dependencies between the modules,
+    which are obtained from their input and output signals. Numerical modules, such as sparse factorizations, einsum
+    contractions, and convolutions, release the GIL and thus profit from multiple threads.
+    The threads are stopped with :meth:`close`, or upon leaving a ``with`` block of the network, and otherwise when
+    the network is garbage collected.
+
+    With ``incremental=True``, only the modules of which the inputs have changed since their last evaluation are
+    re-evaluated. Changes are detected using the version counter of :attr:`Signal.version`, which is incremented upon
+    (re-)assignment of a state. In-place changes to the state arrays of the external inputs (*e.g.* ``x.state[:] = 5``)
+    are detected as well, by comparison with a copy of their previous state. The states of intermediate signals are
+    only changed by the modules producing them. Likewise, in the sensitivity analysis a module with unchanged inputs and
+    unchanged output sensitivities adds its previous contributions, without evaluating its sensitivity again. The
+    sensitivities of intermediate signals are identified by the (re-)evaluations contributing to them, and only the
+    seeds of the sensitivity analysis are compared by value. Modules without inputs are always evaluated.
+
+    To reduce the peak memory usage of large problems, the states of intermediate signals can be discarded after the
+    response, by passing the modules that produce them in ``recompute`` (or ``'auto'`` for all modules that are
+    :attr:`Module.recomputable`). During the sensitivity analysis, the discarded states are recomputed on demand and
+    discarded again as soon as they are no longer needed. Only signals which are used as input by another module within
+    the network are discarded. If a ``memory_budget`` is given, only the largest states are discarded until the
+    remaining states fit within the budget. Statistics on the memory saved and the number of recomputations are reported
+    in :attr:`checkpoint_stats`.
+
+    Directional derivatives are calculated in forward mode with :meth:`tangent`, after setting the ``tangent`` of the
+    perturbed input signals. This is cheaper than the sensitivity analysis in case of few inputs and many outputs.
+    Subsequently, :meth:`sensitivity_tangent` differentiates the sensitivity analysis in the same direction, which
+    gives Hessian-vector products (see :func:`pymoto.hessian_vector_product`).
+
+    In :meth:`reset`, the sensitivities of all signals are reset once. With ``recycle_buffers=True``, the sensitivity
+    arrays are kept and re-used in the next sensitivity analysis, such that no new arrays are allocated every
+    iteration. Note that any references to sensitivities are then overwritten, so they must be copied before a reset.
+
+    Similarly, with ``reuse_outputs=True`` modules which support it (*e.g.* :class:`FilterConv`, :class:`EinSum`) write
+    their response in-place into the array of their previous response. This is only done for the intermediate signals,
+    which are used as input by another module within the network, and only as long as the signal still holds the array
+    given out by the module. The modules consuming such a signal are evaluated after it in the same response, so they
+    never see a partially updated state. References to the states of intermediate signals, which are kept across
+    iterations, must be copied however. Nested networks use their own ``reuse_outputs`` option.
+
+    The ``precision`` option sets the floating point type in which the modules calculate, *e.g.* ``np.float32`` to
+    halve the memory traffic of filters, projections and element-wise operations on large design fields. Modules which
+    support it (*e.g.* :class:`FilterConv`, :class:`AssembleGeneral`, :class:`MathGeneral`) convert their inputs and
+    constants (*e.g.* element matrices, once) to this type, and others preserve the type of their inputs. The linear
+    solve (:class:`LinSolve`) is always done in double precision, as are the optimizers. The sensitivities coming from
+    the linear solve thus stay in double precision, until they pass a module with lower precision. Nested networks use
+    their own ``precision`` option.
+
+    Args:
+        *args: The modules (or their definitions)
+
+    Keyword Args:
+        print_timing (optional): Print the evaluation time of each module in the response. For more detailed
+          statistics see :meth:`enable_profiling`
+        n_threads (optional): Number of threads to execute the modules with
+        incremental (optional): Only re-evaluate modules of which the inputs have changed
+        recompute (optional): List of modules of which the output states may be discarded and recomputed, or
+          ``'auto'`` for all recomputable modules
+        memory_budget (optional): The number of bytes the (recomputable) intermediate states are allowed to occupy
+        recycle_buffers (optional): Re-use the arrays of the sensitivities after a reset
+        reuse_outputs (optional): Let modules overwrite the arrays of their previous response for intermediate signals
+        precision (optional): Floating point type of the computations within the modules, *e.g.* ``np.float32``
     """
-    def __init__(self, *args, print_timing=False):
-        self._init_loc = get_init_str()
+    def __init__(self, *args, print_timing=False, n_threads=1, incremental=False, recompute=None,
+                 memory_budget=None, recycle_buffers=False, reuse_outputs=False, precision=None):
+        self._origin = get_init_loc()
 
         # Obtain the internal blocks
         self.mods = _parse_to_list(*args)
@@ -579,42 +1297,765 @@ class Network(Module):
         # Check validity of modules
         for m in self.mods:
             if not _is_valid_module(m):
-                raise TypeError(f"Argument is not a valid Module, type=\'{type(mod).__name__}\'.")
+                raise TypeError(f"Argument is not a valid Module, type=\'{type(m).__name__}\'.")
 
-        # Gather all the input and output signals of the internal blocks
-        all_in = set()
-        all_out = set()
-        [all_in.update(b.sig_in) for b in self.mods]
-        [all_out.update(b.sig_out) for b in self.mods]
-        in_unique = all_in - all_out
+        # Initialize the parent module, inputs and outputs are determined from the internal blocks
+        super().__init__([], [])
 
-        # Initialize the parent module, with correct inputs and outputs
-        super().__init__(list(in_unique), list(all_out))
+        # Index of the producing and consuming modules of each signal
+        self._producers = dict()
+        self._consumers = dict()
+        for m in self.mods:
+            self._register(m)
 
         self.print_timing = print_timing
+        self.n_threads = n_threads
+        self.incremental = incremental
+        self.recompute = recompute
+        self.memory_budget = memory_budget
+        self.recycle_buffers = recycle_buffers
+        self.reuse_outputs = reuse_outputs
+        self.precision = precision
+        self.checkpoint_stats = dict()
+        self.profiler = None
+        self._executor = None
+        self._dependencies = dict()
+        self._cones = dict()
+        self._records = dict()
+        self._contributions = dict()
+        self._seeds = dict()
+        self._input_states = dict()
+        self._discarded = dict()
+        self.compiled = False
+        self._plan = None
+        self._signals = None
+        self._reusable = None
+
+    @property
+    def sig_in(self):
+        """ The external inputs of the network, which are not produced by any of its modules """
+        if self._sig_in is None:
+            self._sig_in = list(self._external_in)
+        return self._sig_in
+
+    @sig_in.setter
+    def sig_in(self, signals):
+        self._external_in = dict.fromkeys(signals)
+        self._sig_in = None
+
+    def _register(self, m):
+        """ Add the signals of a module to the producer/consumer index and update the in- and outputs """
+        for s in m.sig_in:
+            self._consumers.setdefault(s, []).append(m)
+            if s not in self._producers and s not in self._external_in:
+                self._external_in[s] = None
+                self._sig_in = None
+        for s in m.sig_out:
+            if s not in self._producers:
+                self._producers[s] = m
+                self.sig_out.append(s)
+            if s in self._external_in:
+                self._external_in.pop(s)
+                self._sig_in = None
+
+    def producer(self, sig):
+        """ Get the module which calculates the state of a signal, or None if it is an input of the network """
+        return self._producers.get(sig)
+
+    def consumers(self, sig):
+        """ Get the modules which use the given signal as input """
+        return list(self._consumers.get(sig, []))
 
     def timefn(self, fn):
         start_t = time.time()
         fn()
         print(f"Evaluating {fn} took {time.time() - start_t} s")
 
-    def response(self):
+    def enable_profiling(self, memory: bool = False, profiler: Profiler = None):
+        """ Start collecting evaluation statistics of all modules, including the ones in nested networks
+
+        Args:
+            memory (optional): Also trace the allocated memory (slow)
+            profiler (optional): Use an existing profiler, e.g. to combine the statistics of multiple networks
+
+        Returns:
+            The :class:`Profiler` containing the statistics
+        """
+        self.profiler = Profiler(memory=memory) if profiler is None else profiler
+        for m in self.mods:
+            if isinstance(m, Network):
+                m.enable_profiling(profiler=self.profiler)
+        return self.profiler
+
+    def disable_profiling(self):
+        """ Stop collecting evaluation statistics
+
+        Returns:
+            The :class:`Profiler` containing the statistics collected so far
+        """
+        profiler, self.profiler = self.profiler, None
+        for m in self.mods:
+            if isinstance(m, Network):
+                m.disable_profiling()
+        if profiler is not None:
+            profiler.stop()
+        return profiler
+
+    def _run_module(self, m, phase: str):
+        """ Execute one phase (`response`, `sensitivity`, or `reset`) of a single module """
+        if self.profiler is None:
+            self._call_module(m, phase)
+        else:
+            self.profiler.call(m, phase, lambda: self._call_module(m, phase), parent=self)
+
+    def _call_module(self, m, phase: str):
+        if self.incremental and phase == 'response':
+            self._incremental_response(m)
+        elif self.incremental and phase == 'sensitivity':
+            self._incremental_sensitivity(m)
+        elif phase == 'response' and self.print_timing:
+            self.timefn(m.response)
+        else:
+            getattr(m, phase)()
+
+    def _incremental_response(self, m):
+        """ Evaluate the response of a module, only if any of its inputs has changed """
+        rec = self._records.setdefault(id(m), dict(n_eval=0))
+        v_in = tuple(_signal_version(s) for s in m.sig_in)
+        v_out = tuple(_signal_version(s) for s in m.sig_out)
+        if len(v_in) > 0 and None not in v_in and None not in v_out and \
+                rec.get('v_in') == v_in and rec.get('v_out') == v_out:
+            return  # Nothing has changed, the outputs are still valid
+
         if self.print_timing:
-            [self.timefn(b.response) for b in self.mods]
+            self.timefn(m.response)
         else:
-            [b.response() for b in self.mods]
+            m.response()
+        rec['n_eval'] += 1
+        rec['v_in'] = v_in
+        rec['v_out'] = tuple(_signal_version(s) for s in m.sig_out)
+
+    def _incremental_sensitivity(self, m):
+        """ Evaluate the sensitivities of a module, or re-use the previous ones if nothing has changed """
+        if type(m).sensitivity is not Module.sensitivity:  # Custom sensitivity behavior (e.g. a Network)
+            for s in m.sig_in:  # Its contributions cannot be traced, so the sensitivities are compared by value
+                self._contributions[id(base_signal(s))] = None
+            m.sensitivity()
+            return
+        try:
+            sens_in = [s.sensitivity for s in m.sig_out]
+            if len(m.sig_out) > 0 and all([s is None for s in sens_in]):
+                return  # If none of the adjoint variables is set
 
-    def sensitivity(self):
-        [b.sensitivity() for b in reversed(self.mods)]
+            rec = self._records.setdefault(id(m), dict(n_eval=0))
+            rec.setdefault('n_sens', 0)
+            key = (rec['n_eval'], tuple(_signal_version(s) for s in m.sig_in),
+                   tuple(self._sensitivity_key(s) for s in m.sig_out))
+            prev = rec.get('sens')
+            if prev is not None and prev[0] == key and len(sens_in) > 0:
+                sens_out = prev[1]
+            else:
+                sens_out = _parse_to_list(m._sensitivity(*sens_in))
+                rec['n_sens'] += 1
+                rec['sens'] = (key, sens_out)
+
+            # Register the contributions, which identify the sensitivities of the inputs in the next iteration
+            token = (id(m), rec['n_sens'])
+            for s, ds in zip(m.sig_in, sens_out):
+                if ds is None:
+                    continue
+                s = base_signal(s)
+                if id(s) not in self._contributions:  # Only traceable if no sensitivity was set before
+                    self._contributions[id(s)] = [] if s.sensitivity is None else None
+                contrib = self._contributions[id(s)]
+                if contrib is not None:
+                    contrib.append(token)
+            m._add_input_sensitivities(sens_out)
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity(). Module details:" +
+                          m._err_str(fn=m._sensitivity)).with_traceback(sys.exc_info()[2])
+
+    def _sensitivity_key(self, s):
+        """ Identifies the sensitivity of a signal, to determine if it has changed since the previous iteration
+
+        Sensitivities which are only made up of contributions by modules of this network are identified by these
+        contributions. Others (*e.g.* the seeds of the sensitivity analysis) are compared by their value.
+        """
+        if s.sensitivity is None:
+            return None
+        contrib = self._contributions.get(id(base_signal(s)))
+        if contrib is not None:
+            return tuple(sorted(contrib))  # Independent of the order of (concurrent) contributions
+        stored, n = self._seeds.get(id(s), (_NotComparable, 0))
+        if not _is_same_array(stored, s.sensitivity):
+            stored, n = _copy_array(s.sensitivity), n + 1
+            self._seeds[id(s)] = (stored, n)
+        return 'seed', n
+
+    def _detect_in_place_changes(self):
+        """ Increment the version of the external inputs of which the state array has been modified in-place """
+        for s in self.sig_in:
+            if not isinstance(s.state, np.ndarray) or s.state.dtype == object or _signal_version(s) is None:
+                continue
+            prev = self._input_states.get(id(s))
+            if prev is not None and prev[0] == s.version:
+                if _is_same_array(prev[1], s.state):
+                    continue
+                s._increment_version()
+            self._input_states[id(s)] = (s.version, _copy_array(s.state))
+
+    def _execute(self, phase: str, mods: list = None):
+        """ Execute one phase of all (or the given) modules, either sequentially or concurrently on the thread pool """
+        with self._module_settings():
+            self._execute_phase(phase, mods)
+
+    def _execute_phase(self, phase: str, mods: list = None):
+        if mods is None and self.compiled and phase in ('response', 'sensitivity') and self._plan_applicable():
+            self._execute_plan(phase)
+            return
+        key = phase if mods is None else (phase, tuple(id(m) for m in mods))
+        mods = self.mods if mods is None else mods
+        if phase != 'response' and phase != 'reset' and len(self._discarded) > 0:
+            self._checkpointed_execute(phase, mods)
+            return
+        mods = mods if phase in ('response', 'tangent') else mods[::-1]
+        if self.n_threads is None or self.n_threads <= 1 or len(mods) <= 1:
+            for m in mods:
+                self._run_module(m, phase)
+            return
+
+        if key not in self._dependencies:
+            self._dependencies[key] = build_dependencies(mods, phase)
+        tasks = [lambda m=m: self._run_module(m, phase) for m in mods]
+        execute_graph(tasks, self._dependencies[key], self._thread_pool())
+
+    def _thread_pool(self):
+        """ The pool of `n_threads` threads (at least one) to execute the modules on """
+        n = self.n_threads if self.n_threads is not None and self.n_threads > 1 else 1
+        if self._executor is None or self._executor[0] != n:
+            self.close()
+            pool = ThreadPoolExecutor(max_workers=n, thread_name_prefix='pymoto')
+            self._executor = (n, pool, weakref.finalize(self, pool.shutdown, wait=False))
+        return self._executor[1]
+
+    def close(self):
+        """ Shut down the thread pool of the network, which is started again when needed """
+        if self._executor is not None:
+            self._executor[2]()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def _execute_async(self, phase: str, mods: list = None, executor=None):
+        """ Execute one phase of the modules on an executor, each module as soon as its dependencies are done """
+        with self._module_settings():
+            await self._execute_phase_async(phase, mods, executor)
+
+    async def _execute_phase_async(self, phase: str, mods: list = None, executor=None):
+        loop = asyncio.get_running_loop()
+        executor = self._thread_pool() if executor is None else executor
+        key = phase if mods is None else (phase, tuple(id(m) for m in mods))
+        mods = self.mods if mods is None else mods
+        if phase != 'response' and phase != 'reset' and len(self._discarded) > 0:
+            futures = [executor.submit(self._checkpointed_execute, phase, mods)]
+            deps = [set()]
+        else:
+            mods = mods if phase in ('response', 'tangent') else mods[::-1]
+            if key not in self._dependencies:
+                self._dependencies[key] = build_dependencies(mods, phase)
+            deps = self._dependencies[key]
+            futures = [None for _ in mods]
+
+        async def run(i):
+            if len(deps[i]) > 0:
+                await asyncio.gather(*[tasks[j] for j in deps[i]])
+            if futures[i] is None:
+                futures[i] = executor.submit(self._run_module, mods[i], phase)
+            await asyncio.wrap_future(futures[i], loop=loop)
+
+        tasks = []
+        for i in range(len(futures)):  # The dependencies of a module always precede it
+            tasks.append(asyncio.ensure_future(run(i)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Do not start any further modules, but wait for the running ones to leave the signals in a valid state
+            for t in tasks:
+                t.cancel()
+            running = [asyncio.wrap_future(f, loop=loop) for f in futures if f is not None and not f.cancel()]
+            await asyncio.gather(*tasks, *running, return_exceptions=True)
+            raise
+
+    def compile(self):
+        """ Prepare a flat execution plan, which reduces the overhead of evaluating many (cheap) modules
+
+        The implementations and the signals of all modules are looked up once, and the checks of the generic
+        :meth:`Module.response` and :meth:`Module.sensitivity` are done in one place. For modules with a single input
+        and output :class:`Signal`, the states and sensitivities are accessed directly. In :meth:`reset` only the
+        modules with an internal state are visited. The plan is used for sequential execution without profiling,
+        tracing, incremental evaluation, or recomputation, and is rebuilt automatically after modules are appended.
+        Nested networks are compiled as well.
+
+        The remaining overhead is mostly the call of the module implementation itself, *e.g.* about 0.4 us per module
+        for the response and 0.4 us for the reset and sensitivity of a chain of scalar operations, compared to 3.4 us
+        and 5.4 us without plan (see ``tests/bench_many_modules.py``).
+
+        Returns:
+            self
+        """
+        for m in self.mods:
+            if isinstance(m, Network):
+                m.compile()
+        self.compiled = True
+        self._plan = self._build_plan()
+        return self
+
+    def _plan_applicable(self):
+        return (self.n_threads is None or self.n_threads <= 1) and not self.incremental and not self.print_timing \
+            and self.profiler is None and Tracer.active is None and len(self._discarded) == 0
+
+    def _build_plan(self):
+        """ For each module the implementation, or None for modules with custom behavior, and its signals
+
+        Modules with a single input and output :class:`Signal` are marked, for which the signals are accessed directly.
+        """
+        plan = dict(response=[], sensitivity=[], reset=[])
+        for m in self.mods:
+            resp = m._response if type(m).response is Module.response else None
+            sens = m._sensitivity if type(m).sensitivity is Module.sensitivity else None
+            direct = len(m.sig_in) == 1 and len(m.sig_out) == 1 and type(m.sig_in[0]) is Signal and \
+                type(m.sig_out[0]) is Signal
+            sig_in, sig_out = (m.sig_in[0], m.sig_out[0]) if direct else (tuple(m.sig_in), tuple(m.sig_out))
+            plan['response'].append((direct and resp is not None, m, resp, sig_in, sig_out))
+            plan['sensitivity'].append((direct and sens is not None, m, sens, sig_in, sig_out))
+            if isinstance(m, Network) or type(m).reset is not Module.reset or type(m)._reset is not Module._reset:
+                plan['reset'].append(m)
+        plan['sensitivity'].reverse()
+        plan['reset'].reverse()
+        return plan
+
+    def _execute_plan(self, phase: str):
+        if self._plan is None:
+            self._plan = self._build_plan()
+        if phase == 'response':
+            self._execute_plan_response(self._plan['response'])
+        else:
+            self._execute_plan_sensitivity(self._plan['sensitivity'])
+
+    @staticmethod
+    def _execute_plan_response(plan: list):
+        m, fn = None, None
+        try:
+            for direct, m, fn, sig_in, sig_out in plan:
+                if direct:
+                    val = fn(sig_in._state)
+                    if val is not None and type(val) not in _sequence_types:
+                        # Inlined Signal.state setter, identical builtin scalars do not count as a change
+                        old, sig_out._state = sig_out._state, val
+                        if type(val) not in _builtin_scalar_types or type(old) is not type(val) or old != val:
+                            sig_out._version += 1
+                        continue
+                    sig_out = (sig_out, )
+                elif fn is None:
+                    m.response()
+                    continue
+                else:
+                    val = fn(sig_in[0].state) if len(sig_in) == 1 else fn(*[s.state for s in sig_in])
+                val = _parse_to_list(val)
+                if len(val) != len(sig_out):
+                    raise TypeError(f"Number of responses calculated ({len(val)}) is unequal to "
+                                    f"number of output signals ({len(sig_out)})")
+                for s, v in zip(sig_out, val):
+                    s.state = v
+        except Exception as e:
+            if fn is None:
+                raise  # Already reported by the module itself
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling response(). Module details:" +
+                          m._err_str(fn=m._response)).with_traceback(sys.exc_info()[2])
+
+    @staticmethod
+    def _execute_plan_sensitivity(plan: list):
+        m, fn = None, None
+        try:
+            for direct, m, fn, sig_in, sig_out in plan:
+                if direct:
+                    dy = sig_out.sensitivity
+                    if dy is None:
+                        continue  # If the adjoint variable is not set
+                    ds = fn(dy)
+                    if ds is None:
+                        continue
+                    if type(ds) not in _sequence_types:
+                        # Inlined Signal.add_sensitivity for builtin scalars
+                        cur = sig_in.sensitivity
+                        if type(ds) in _builtin_scalar_types and (cur is None or type(cur) in _builtin_scalar_types):
+                            sig_in.sensitivity = ds if cur is None else cur + ds
+                        else:
+                            sig_in.add_sensitivity(ds)
+                        continue
+                    sens_out = _parse_to_list(ds)
+                    sig_in = (sig_in, )
+                elif fn is None:
+                    m.sensitivity()
+                    continue
+                else:
+                    sens_in = [s.sensitivity for s in sig_out]
+                    if len(sig_out) > 0 and all([ds is None for ds in sens_in]):
+                        continue  # If none of the adjoint variables is set
+                    sens_out = _parse_to_list(fn(*sens_in))
+                if len(sens_out) != len(sig_in):
+                    raise TypeError(f"Number of sensitivities calculated ({len(sens_out)}) is unequal to "
+                                    f"number of input signals ({len(sig_in)})")
+                for s, ds in zip(sig_in, sens_out):
+                    s.add_sensitivity(ds)
+        except Exception as e:
+            if fn is None:
+                raise  # Already reported by the module itself
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling sensitivity(). Module details:" +
+                          m._err_str(fn=m._sensitivity)).with_traceback(sys.exc_info()[2])
+
+    def _cone(self, inputs: list = None, outputs: list = None):
+        """ The modules (in order) which depend on any of the inputs, and contribute to any of the outputs """
+        key = (None if inputs is None else tuple(inputs), None if outputs is None else tuple(outputs))
+        if key in self._cones:
+            return self._cones[key]
+
+        mods = self.mods
+        if inputs is not None:
+            affected = set(id(base_signal(s)) for s in inputs)
+            downstream = []
+            for m in mods:
+                if any(id(base_signal(s)) in affected for s in m.sig_in):
+                    downstream.append(m)
+                    affected.update(id(base_signal(s)) for s in m.sig_out)
+            mods = downstream
+        if outputs is not None:
+            needed = set(id(base_signal(s)) for s in outputs)
+            upstream = []
+            for m in reversed(mods):
+                if any(id(base_signal(s)) in needed for s in m.sig_out):
+                    upstream.append(m)
+                    needed.update(id(base_signal(s)) for s in m.sig_in)
+            mods = upstream[::-1]
+        self._cones[key] = mods
+        return mods
+
+    def subnetwork(self, inputs: Union[Signal, List[Signal]] = None, outputs: Union[Signal, List[Signal]] = None):
+        """ Create a network with only the modules that connect the given inputs to the given outputs
+
+        Args:
+            inputs (optional): Only include modules that depend on any of these signals
+            outputs (optional): Only include modules that contribute to any of these signals
+
+        Returns:
+            A new :class:`Network`, which shares the modules with this network
+        """
+        mods = self._cone(None if inputs is None else _parse_to_list(inputs),
+                          None if outputs is None else _parse_to_list(outputs))
+        return Network(*mods, **self._options(mods))
+
+    def _options(self, mods: list):
+        """ The keyword arguments to create a network of the given modules with the same settings as this one """
+        recompute = [m for m in self.recompute if m in mods] if isinstance(self.recompute, list) else self.recompute
+        return dict(print_timing=self.print_timing, n_threads=self.n_threads, incremental=self.incremental,
+                    recompute=recompute, memory_budget=self.memory_budget, recycle_buffers=self.recycle_buffers,
+                    reuse_outputs=self.reuse_outputs, precision=self.precision)
+
+    def unused_modules(self, outputs: Union[Signal, List[Signal]]):
+        """ Find the modules which do not contribute to any of the given outputs, e.g. plotting modules
+
+        These modules can be skipped by evaluating ``response(outputs=...)``, or by using :meth:`subnetwork`.
+
+        Args:
+            outputs: The signals of interest, e.g. the objective and constraints of an optimization problem
+
+        Returns:
+            List of modules
+        """
+        used = set(id(m) for m in self._cone(outputs=_parse_to_list(outputs)))
+        return [m for m in self.mods if id(m) not in used]
+
+    def _recompute_candidates(self):
+        """ Signals which can be discarded after the response, with their producing module """
+        if self.recompute is None or self.recompute is False:
+            return dict()
+        if isinstance(self.recompute, str) and self.recompute.lower() == 'auto':
+            mods = [m for m in self.mods if getattr(m, 'recomputable', False)]
+        else:
+            mods = _parse_to_list(self.recompute)
+            for m in mods:
+                if m not in self.mods:
+                    raise ValueError(f"Module '{type(m).__name__}' selected for recomputation is not part of the "
+                                     f"network" + self._err_str())
+        consumed = set(id(s) for m in self.mods for s in m.sig_in)
+        candidates = dict()
+        for m in mods:
+            for s in m.sig_out:
+                if isinstance(s, SignalSlice) or id(s) not in consumed or s.state is None:
+                    continue
+                candidates[id(s)] = (s, m)
+        return candidates
+
+    def _discard_states(self):
+        """ Discard the states of intermediate signals after the response, within the memory budget """
+        candidates = self._recompute_candidates()
+        sizes = {k: _nbytes(s.state) for k, (s, m) in candidates.items()}
+        discard = list(candidates.keys())
+        if self.memory_budget is not None:
+            # Discard the largest states first, until the remaining states fit within the budget
+            discard = sorted(discard, key=lambda k: sizes[k], reverse=True)
+            retained = sum(sizes.values())
+            n_discard = 0
+            while retained > self.memory_budget and n_discard < len(discard):
+                retained -= sizes[discard[n_discard]]
+                n_discard += 1
+            discard = discard[:n_discard]
+
+        self._discarded = {k: candidates[k] for k in discard}
+        for s, _ in self._discarded.values():
+            s.state = None
+        self.checkpoint_stats = dict(n_discarded=len(discard), discarded_bytes=sum(sizes[k] for k in discard),
+                                     peak_restored_bytes=0, n_recomputed=0)
+
+    def _restore_state(self, sig, restored: dict):
+        """ Recompute the state of a discarded signal, by evaluating its producer (recursively) """
+        key = id(base_signal(sig))
+        if key not in self._discarded or key in restored:
+            return
+        s, m = self._discarded[key]
+        for s_in in m.sig_in:
+            self._restore_state(s_in, restored)
+        self._run_module(m, 'response')
+        self.checkpoint_stats['n_recomputed'] += 1
+        for s_out in m.sig_out:
+            if id(s_out) in self._discarded:
+                restored[id(s_out)] = _nbytes(s_out.state)
+        self.checkpoint_stats['peak_restored_bytes'] = max(self.checkpoint_stats['peak_restored_bytes'],
+                                                           sum(restored.values()))
+
+    def _checkpointed_execute(self, phase: str, mods: list):
+        """ Forward or backward pass in which the discarded states are recomputed on demand, segment by segment """
+        order = mods if phase == 'tangent' else mods[::-1]
+
+        # Position in the pass of the last module that needs each signal
+        last_use = dict()
+        for n, m in enumerate(order):
+            for s in m.sig_in + m.sig_out:
+                last_use[id(base_signal(s))] = n
+
+        restored = dict()
+        for n, m in enumerate(order):
+            for s in m.sig_in + m.sig_out:
+                self._restore_state(s, restored)
+            self._run_module(m, phase)
+
+            # Discard the states which are not used anymore in the remainder of the pass
+            for key in [k for k in restored if last_use.get(k, -1) <= n]:
+                self._discarded[key][0].state = None
+                restored.pop(key)
+
+    @traced('network')
+    def response(self, outputs: Union[Signal, List[Signal]] = None):
+        """ Calculate the response of all modules
+
+        Args:
+            outputs (optional): Only evaluate the modules which are required to calculate these signals
+        """
+        self._discarded = dict()
+        if self.incremental:
+            self._detect_in_place_changes()
+        self._execute('response', None if outputs is None else self._cone(outputs=_parse_to_list(outputs)))
+        if self.recompute is not None:
+            self._discard_states()
+
+    @contextmanager
+    def _module_settings(self):
+        """ Apply the settings of the network to its modules during one call, and restore them afterwards
+
+        The modules may be shared with other networks (*e.g.* copies made by :meth:`subnetwork`), so the settings are
+        not kept on the modules. With ``reuse_outputs``, the modules may overwrite the outputs which are intermediate
+        signals of the network, and with ``precision`` they calculate in the given floating point type.
+        """
+        settings = []
+        if self.reuse_outputs:
+            if self._reusable is None:
+                self._reusable = [(m, frozenset(i for i, s in enumerate(m.sig_out)
+                                                if type(s) is Signal and s in self._consumers))
+                                  for m in self.mods if not isinstance(m, Network)]
+            settings += [(m, '_reusable_outputs', outputs) for m, outputs in self._reusable]
+        if self.precision is not None:
+            dtype = np.dtype(self.precision)
+            settings += [(m, '_precision', dtype) for m in self.mods if not isinstance(m, Network)]
+        if len(settings) == 0:
+            yield
+            return
+        missing = object()
+        previous = [(m, name, vars(m).get(name, missing)) for m, name, _ in settings]
+        for m, name, val in settings:
+            setattr(m, name, val)
+        try:
+            yield
+        finally:
+            for m, name, val in reversed(previous):
+                if val is missing:
+                    vars(m).pop(name, None)
+                else:
+                    setattr(m, name, val)
+
+    @traced('network')
+    def sensitivity(self, seeds: Union[Signal, List[Signal]] = None, wrt: Union[Signal, List[Signal]] = None):
+        """ Calculate the sensitivities of all modules using backpropagation
+
+        Args:
+            seeds (optional): Only backpropagate through the modules contributing to these signals, of which the
+              sensitivities are set
+            wrt (optional): Only backpropagate through the modules which depend on these signals
+        """
+        if seeds is None and wrt is None:
+            self._execute('sensitivity')
+        else:
+            self._execute('sensitivity', self._cone(None if wrt is None else _parse_to_list(wrt),
+                                                    None if seeds is None else _parse_to_list(seeds)))
+
+    @traced('network')
+    async def response_async(self, outputs: Union[Signal, List[Signal]] = None, executor=None):
+        """ Calculate the response of all modules without blocking the event loop of ``asyncio``
+
+        The modules are dispatched to an executor (by default the thread pool of ``n_threads`` threads), each as soon as
+        the modules it depends on are finished. Cancelling the evaluation does not start any further modules, but waits
+        for the running modules to finish.
+
+        Args:
+            outputs (optional): Only evaluate the modules which are required to calculate these signals
+            executor (optional): The ``concurrent.futures.Executor`` to run the modules on
+        """
+        self._discarded = dict()
+        if self.incremental:
+            self._detect_in_place_changes()
+        await self._execute_async('response', None if outputs is None else self._cone(outputs=_parse_to_list(outputs)),
+                                  executor)
+        if self.recompute is not None:
+            self._discard_states()
+
+    @traced('network')
+    async def sensitivity_async(self, seeds: Union[Signal, List[Signal]] = None,
+                                wrt: Union[Signal, List[Signal]] = None, executor=None):
+        """ Calculate the sensitivities of all modules without blocking the event loop (see :meth:`response_async`)
+
+        Args:
+            seeds (optional): Only backpropagate through the modules contributing to these signals, of which the
+              sensitivities are set
+            wrt (optional): Only backpropagate through the modules which depend on these signals
+            executor (optional): The ``concurrent.futures.Executor`` to run the modules on
+        """
+        if seeds is None and wrt is None:
+            await self._execute_async('sensitivity', None, executor)
+        else:
+            await self._execute_async('sensitivity', self._cone(None if wrt is None else _parse_to_list(wrt),
+                                                                None if seeds is None else _parse_to_list(seeds)),
+                                      executor)
+
+    @traced('network')
+    def sensitivity_multi(self):
+        self._execute('sensitivity_multi')
+
+    @traced('network')
+    def tangent(self):
+        self._execute('tangent')
+
+    @traced('network')
+    def sensitivity_tangent(self):
+        self._execute('sensitivity_tangent')
 
     def reset(self):
-        [b.reset() for b in reversed(self.mods)]
+        """ Reset the sensitivities of all signals (each one once), and the internal state of all modules """
+        if self._signals is None:
+            self._signals = list({id(s): s for s in self._all_signals()}.values())
+        try:
+            if self.compiled:
+                self._reset_signals_direct()
+            else:
+                for s in self._signals:
+                    if self.recycle_buffers and isinstance(s, Signal):
+                        s._recycle_sensitivity()
+                    s.reset()
+        except Exception as e:
+            raise type(e)(str(e) + "\n\t| Above error was raised when calling reset(). Module details:" +
+                          self._err_str()).with_traceback(sys.exc_info()[2])
+        self._reset()
+
+    def _reset_signals_direct(self):
+        """ Reset the signals for a compiled network, with inlined :meth:`Signal.reset` for plain signals """
+        recycle = self.recycle_buffers
+        for s in self._signals:
+            if type(s) is not Signal or s.keep_alloc:
+                if recycle and isinstance(s, Signal):
+                    s._recycle_sensitivity()
+                s.reset()
+                continue
+            s.sensitivity_multi = None
+            s.sensitivity_tangent = None
+            sens = s.sensitivity
+            if sens is not None:
+                if recycle and type(sens) is np.ndarray and sens.dtype != object:
+                    s._spare = sens
+                s.sensitivity = None
+
+    def _all_signals(self):
+        """ All signals of the modules, including those in nested networks """
+        for m in self.mods:
+            if isinstance(m, Network):
+                yield from m._all_signals()
+            else:
+                yield from m.sig_in
+                yield from m.sig_out
+
+    def _reset(self):
+        self._contributions = dict()
+        if self.compiled and self.profiler is None:
+            if self._plan is None:
+                self._plan = self._build_plan()
+            for m in self._plan['reset']:  # Only the modules with an internal state to reset
+                self._reset_module(m)
+            return
+        for m in reversed(self.mods):
+            if self.profiler is None:
+                self._reset_module(m)
+            else:
+                self.profiler.call(m, 'reset', lambda: self._reset_module(m), parent=self)
+
+    @staticmethod
+    def _reset_module(m):
+        """ Reset the internal state of a module, of which the signals are already reset """
+        if isinstance(m, Network):
+            m._reset()
+        elif type(m).reset is not Module.reset:
+            m.reset()  # Custom reset behavior
+        else:
+            try:
+                m._reset()
+            except Exception as e:
+                raise type(e)(str(e) + "\n\t| Above error was raised when calling reset(). Module details:" +
+                              m._err_str(fn=m._reset)).with_traceback(sys.exc_info()[2])
 
     def _response(self, *args):
         pass  # Unused
 
     def __copy__(self):
-        return Network(*self.mods)
+        return Network(*self.mods, print_timing=self.print_timing, n_threads=self.n_threads,
+                       incremental=self.incremental, recompute=self.recompute, memory_budget=self.memory_budget,
+                       recycle_buffers=self.recycle_buffers, reuse_outputs=self.reuse_outputs,
+                       precision=self.precision)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['_executor'] = None
+        state['profiler'] = None
+        return state
 
     def copy(self):
         return self.__copy__()
@@ -628,25 +2069,110 @@ class Network(Module):
     def __iter__(self):
         return iter(self.mods)
 
+    def fuse(self, keep: Union[Signal, List[Signal]] = None):
+        """ Fuse chains of elementwise modules (e.g. :class:`MathGeneral` and :class:`Scaling`) into single modules
+
+        An elementwise module of which the output is only used by a next elementwise module, is combined with that
+        module into one :class:`MathGeneral` with a symbolically composed expression. The response and the (chain-ruled)
+        derivatives are then each evaluated by one generated function, which saves the intermediate arrays and the
+        repeated evaluation of derivatives. Note that the states of the intermediate signals are not calculated anymore.
+
+        Args:
+            keep (optional): Signals of which the state must remain available, e.g. for plotting or as response of an
+              optimization problem
+
+        Returns:
+            The number of modules which have been removed
+        """
+        from sympy import Symbol
+        from .modules.generic import MathGeneral
+        keep = set(id(base_signal(s)) for s in _parse_to_list(keep))
+
+        # Number of modules using each signal, including its slices
+        uses = dict()
+        for m in self.mods:
+            for key in set(id(base_signal(s)) for s in m.sig_in):
+                uses[key] = uses.get(key, 0) + 1
+        producers = dict(self._producers)
+
+        n_fused = 0
+        j = 0
+        while j < len(self.mods):
+            m2 = self.mods[j]
+            e2 = m2._symbolic_expression()
+            for t in ([] if e2 is None else m2.sig_in):
+                m1 = producers.get(t)
+                if m1 is None or isinstance(t, SignalSlice) or id(t) in keep or uses.get(id(t)) != 1 or \
+                        len(m1.sig_out) != 1:
+                    continue
+                e1 = m1._symbolic_expression()
+                if e1 is None:
+                    continue
+
+                # Compose the expressions, in terms of the inputs of the fused module
+                sig_in = [s for s in m2.sig_in if s is not t]
+                sig_in += [s for s in m1.sig_in if not any(s is s2 for s2 in sig_in)]
+                var = {id(s): Symbol(f"inp{i}") for i, s in reversed(list(enumerate(sig_in)))}
+                e1 = e1.xreplace({Symbol(f"inp{i}"): var[id(s)] for i, s in enumerate(m1.sig_in)})
+                expr = e2.xreplace({Symbol(f"inp{i}"): e1 if s is t else var[id(s)] for i, s in enumerate(m2.sig_in)})
+                fused = MathGeneral(sig_in, m2.sig_out[0], expression=expr)
+                fused._origin = m2._origin
+
+                # Update the bookkeeping
+                uses.pop(id(t))
+                for key in set(id(base_signal(s)) for s in m1.sig_in) & \
+                        set(id(base_signal(s)) for s in m2.sig_in if s is not t):
+                    uses[key] -= 1
+                producers.pop(t)
+                producers[m2.sig_out[0]] = fused
+                self.mods[j] = fused
+                self.mods.remove(m1)
+                j = self.mods.index(fused)  # The producer is not necessarily listed before, continue with the new module
+                n_fused += 1
+                break
+            else:
+                j += 1
+
+        if n_fused > 0:
+            self._reindex()
+        return n_fused
+
+    def _reindex(self):
+        """ Rebuild the signal index and clear all cached information after the modules have changed """
+        self._producers = dict()
+        self._consumers = dict()
+        self.sig_in = []
+        self.sig_out = []
+        for m in self.mods:
+            self._register(m)
+        if isinstance(self.recompute, list):
+            self.recompute = [m for m in self.recompute if m in self.mods]
+        self._dependencies.clear()
+        self._cones.clear()
+        self._plan = None
+        self._signals = None
+        self._reusable = None
+        self._records.clear()
+        self._discarded = dict()
+
     def append(self, *newmods):
         modlist = _parse_to_list(*newmods)
 
         # Check if the blocks are initialized, else create them
         for i, m in enumerate(modlist):
             if not _is_valid_module(m):
-                raise TypeError(f"Argument #{i} is not a valid module, type=\'{type(mod).__name__}\'.")
+                raise TypeError(f"Argument #{i} is not a valid module, type=\'{type(m).__name__}\'.")
 
         # Obtain the internal blocks
         self.mods.extend(modlist)
-
-        # Gather all the input and output signals of the internal blocks
-        all_in = set()
-        all_out = set()
-        [all_in.update(m.sig_in) for m in self.mods]
-        [all_out.update(m.sig_out) for m in self.mods]
-        in_unique = all_in - all_out
-
-        self.sig_in = _parse_to_list(in_unique)
-        self.sig_out = _parse_to_list(all_out)
+        self._dependencies.clear()
+        self._cones.clear()
+        self._plan = None
+        self._signals = None
+        self._reusable = None
+
+        # Update the input and output signals with the new blocks
+        for m in modlist:
+            self._register(m)
 
         return modlist[-1].sig_out[0] if len(modlist[-1].sig_out) == 1 else modlist[-1].sig_out  # Returns the output signal
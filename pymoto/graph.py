@@ -0,0 +1,107 @@
+""" Dependency graph of the modules inside a Network, and (concurrent) scheduling of their execution """
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def base_signal(sig):
+    """ Obtain the source signal of a (possibly nested) SignalSlice
+
+    Args:
+        sig: The signal
+
+    Returns:
+        The original signal which holds the data
+    """
+    while hasattr(sig, 'orig_signal'):
+        sig = sig.orig_signal
+    return sig
+
+
+def _phase_access(mod, phase: str):
+    """ Get the signals that are read and written by a module in a given phase
+
+    Args:
+        mod: The module
+        phase: `response`, `tangent`, `sensitivity` or `reset`
+
+    Returns:
+        reads, writes: Lists of (unique) base signals
+    """
+    if phase in ('response', 'tangent'):  # Forward passes
+        reads, writes = mod.sig_in, mod.sig_out
+    elif phase == 'reset':
+        reads, writes = [], mod.sig_in + mod.sig_out
+    else:  # Reverse passes read the output sensitivities and accumulate into the input sensitivities
+        reads, writes = mod.sig_out, mod.sig_in
+    reads = list({id(s): s for s in map(base_signal, reads)}.values())
+    writes = list({id(s): s for s in map(base_signal, writes)}.values())
+    return reads, writes
+
+
+def build_dependencies(mods: list, phase: str = 'response'):
+    """ Determine the execution dependencies between modules, based on their signal accesses
+
+    The list order of the modules is the reference (sequential) order. Module ``j`` must wait for an earlier module
+    ``i`` if ``i`` writes a signal that ``j`` reads or writes, or if ``i`` reads a signal that ``j`` writes. This
+    guarantees the same outcome as sequential execution, while independent modules can run concurrently.
+
+    Args:
+        mods: List of modules, in order of (sequential) execution
+        phase (optional): The phase which is executed (`response`, `tangent`, `sensitivity`, or `reset`)
+
+    Returns:
+        List with for each module the set of module indices it depends on
+    """
+    deps = [set() for _ in mods]
+    last_writer = dict()
+    readers = dict()
+    for i, m in enumerate(mods):
+        reads, writes = _phase_access(m, phase)
+        for s in reads:
+            key = id(s)
+            if key in last_writer:
+                deps[i].add(last_writer[key])
+            readers.setdefault(key, []).append(i)
+        for s in writes:
+            key = id(s)
+            if key in last_writer:
+                deps[i].add(last_writer[key])
+            deps[i].update(readers.pop(key, []))
+            last_writer[key] = i
+        deps[i].discard(i)
+    return deps
+
+
+def execute_graph(tasks: list, deps: list, executor):
+    """ Execute a set of tasks concurrently, respecting their dependencies
+
+    Tasks become available for execution as soon as all the tasks they depend on are finished. In case any of the tasks
+    raises an error, no new tasks are started, the running ones are finished and the (first) error is raised.
+
+    Args:
+        tasks: List of callables without arguments
+        deps: For each task a set of task indices it depends on (see :func:`build_dependencies`)
+        executor: A ``concurrent.futures.Executor`` to run the tasks on
+    """
+    n_waiting = [len(d) for d in deps]
+    dependents = [[] for _ in tasks]
+    for i, d in enumerate(deps):
+        for j in d:
+            dependents[j].append(i)
+
+    running = {executor.submit(tasks[i]): i for i in range(len(tasks)) if n_waiting[i] == 0}
+    error = None
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for f in sorted(done, key=running.get):
+            i = running.pop(f)
+            if f.exception() is not None:
+                error = f.exception() if error is None else error
+                continue
+            if error is not None:
+                continue
+            for j in dependents[i]:
+                n_waiting[j] -= 1
+                if n_waiting[j] == 0:
+                    running[executor.submit(tasks[j])] = j
+    if error is not None:
+        raise error
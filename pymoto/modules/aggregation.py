@@ -130,6 +130,11 @@ class Aggregation(Module):
         dx[self.select] += self.sf * dfdy * dydx
         return dx
 
+    def _tangent(self, dx):
+        x = self.sig_in[0].state
+        dydx = self.aggregation_derivative(x[self.select])
+        return self.sf * np.sum(dydx * dx[self.select])
+
 
 class PNorm(Aggregation):
     r""" P-norm aggregration
@@ -1,11 +1,12 @@
 """ Assembly modules for finite element analysis """
 import sys
+import weakref
 from typing import Union
 
 import numpy as np
-from scipy.sparse import csc_matrix
+from scipy.sparse import csc_matrix, coo_matrix, issparse
 
-from pymoto import Module, DyadCarrier, DomainDefinition
+from pymoto import Module, DyadCarrier, DomainDefinition, MatrixFreeOperator
 
 try:
     from opt_einsum import contract as einsum
@@ -13,6 +14,12 @@ except ModuleNotFoundError:
     from numpy import einsum
 
 
+def _unique(a: np.ndarray):
+    """ Sorted unique values of an integer array (sorting is faster than the hashing of ``np.unique`` here) """
+    a = np.sort(a)
+    return a[np.concatenate(([True], a[1:] != a[:-1]))] if len(a) > 0 else a
+
+
 class AssembleGeneral(Module):
     r""" Assembles a sparse matrix according to element scaling :math:`\mathbf{A} = \sum_e x_e \mathbf{A}_e`
 
@@ -28,6 +35,9 @@ class AssembleGeneral(Module):
     Output Signal:
         - ``A``: system matrix of size ``(n, n)``
 
+    For a batch of scaling vectors of size ``(Nbatch, Nel)``, the output is a stack of matrices with equal sparsity
+    pattern, as object array of size ``(Nbatch)``. The values of all matrices are calculated at once.
+
     Args:
         domain: The domain-definition for which should be assembled
         element_matrix: The element matrix for one element :math:`\mathbf{K}_e`
@@ -35,10 +45,21 @@ class AssembleGeneral(Module):
           These boundary conditions are enforced by setting the row and column of that dof to zero.
         bcdiagval (optional): Value to put on the diagonal of the matrix at dofs where boundary conditions are active.
         matrix_type (optional): The matrix type to construct. This is a constructor which must accept the arguments
-          ``matrix_type((vals, (row_idx, col_idx)), shape=(n, n))``
+          ``matrix_type((vals, (row_idx, col_idx)), shape=(n, n))``. For CSC and CSR matrices, the structure of the
+          matrix is determined once, after which only its values are calculated. With ``reuse_outputs`` of
+          :class:`Network`, the values are then updated in-place in the previous matrix. With
+          :class:`MatrixFreeOperator`, no matrix is assembled at all, for use with iterative solvers.
         add_constant (optional): A constant (e.g. matrix) to add.
+
+    Attributes:
+        chunk_size: Number of entries of the element matrices which are processed at once, for CSC and CSR matrices
+          and for a dense sensitivity. This limits the temporary memory of the calculations, which otherwise scales
+          with the number of elements times the size of the element matrix.
     """
 
+    recomputable = True
+    chunk_size = 2**18
+
     def _prepare(self, domain: DomainDefinition, element_matrix: np.ndarray, bc=None, bcdiagval=None,
                  matrix_type=csc_matrix, add_constant=None):
         self.elmat = element_matrix
@@ -47,15 +68,30 @@ class AssembleGeneral(Module):
         self.nnode = domain.nnodes
 
         self.dofconn = domain.get_dofconnectivity(self.ndof)
-
-        # Row and column indices for the matrix
-        self.rows = np.kron(self.dofconn, np.ones((1, domain.elemnodes*self.ndof), dtype=int)).flatten()
-        self.cols = np.kron(self.dofconn, np.ones((domain.elemnodes * self.ndof, 1), dtype=int)).flatten()
         self.matrix_type = matrix_type
 
         # Boundary conditions
         self.bc = bc
         self.bcdiagval = np.max(element_matrix) if bcdiagval is None else bcdiagval
+        self.add_constant = add_constant
+
+        self._matrix_free = isinstance(matrix_type, type) and issubclass(matrix_type, MatrixFreeOperator)
+        if self._matrix_free:  # Only the element matrix and the connectivity are used
+            self._compressed = False
+            bc = np.zeros(0, dtype=int) if bc is None else bc
+            self._constant = coo_matrix((np.full(len(bc), self.bcdiagval), (bc, bc)), shape=(self.n, self.n)).tocsr()
+            if add_constant is not None:
+                self._constant = self._constant + add_constant if issparse(add_constant) else \
+                    self._constant.toarray() + add_constant
+            return
+
+        self._compressed = self._sparsity_pattern()
+        if self._compressed:
+            return
+
+        # Row and column indices for the matrix
+        self.rows = np.kron(self.dofconn, np.ones((1, domain.elemnodes*self.ndof), dtype=int)).flatten()
+        self.cols = np.kron(self.dofconn, np.ones((domain.elemnodes * self.ndof, 1), dtype=int)).flatten()
         if bc is not None:
             self.bcselect = np.argwhere(np.bitwise_not(np.bitwise_or(np.isin(self.rows, self.bc),
                                                                      np.isin(self.cols, self.bc)))).flatten()
@@ -65,20 +101,192 @@ class AssembleGeneral(Module):
         else:
             self.bcselect = None
 
-        self.add_constant = add_constant
+    def _element_entries(self, el: slice, fmt: str, isbc: np.ndarray):
+        """ Keys ``major * n + minor`` (*e.g.* ``col * n + row`` for CSC) of the entries of the element matrices in
+        range `el`, excluding the rows and columns with boundary conditions, and the indices of the entries in the
+        flattened element values """
+        conn = self.dofconn[el].astype(np.int64)
+        rows = np.repeat(conn, conn.shape[1], axis=1).ravel()
+        cols = np.tile(conn, (1, conn.shape[1])).ravel()
+        major, minor = (cols, rows) if fmt == 'csc' else (rows, cols)
+        keep = np.flatnonzero(~(isbc[rows] | isbc[cols]))
+        return major[keep] * self.n + minor[keep], keep + el.start * self.elmat.size
+
+    def _sparsity_pattern(self):
+        """ Determine the structure (``indptr``, ``indices``) of a CSC or CSR matrix once, together with the entries
+        of the element matrices belonging to each position in its ``data`` array
+
+        The entries of the element matrices are processed in chunks of :attr:`chunk_size`, which bounds the temporary
+        memory. What is kept is the index of each entry of the element matrices, sorted by position (as ``int32`` if
+        possible), and the start of each position. This map still has one entry per element matrix entry, being 4
+        bytes for each of the ``nel * m**2`` entries (about 2.3 times the number of nonzeros for 3D hexahedral
+        elements), instead of the 16 bytes of the row and column indices of the (row, col) construction. During the
+        setup, the peak memory additionally contains a few arrays of ``int64`` with the length of the number of
+        nonzeros.
+
+        Returns:
+            False if the structure is not determined, in case of another matrix type or a constant which is not sparse
+        """
+        try:
+            fmt = self.matrix_type((np.zeros(1), (np.zeros(1, dtype=int), np.zeros(1, dtype=int))), shape=(1, 1)).format
+        except Exception:
+            return False
+        if fmt not in ('csc', 'csr') or (self.add_constant is not None and not issparse(self.add_constant)):
+            return False
+
+        nel, m = self.dofconn.shape[0], self.elmat.size
+        chunk_el = max(1, self.chunk_size // m)  # Number of elements per chunk
+        chunks = [slice(e, min(e + chunk_el, nel)) for e in range(0, nel, chunk_el)]
+        isbc = np.zeros(self.n, dtype=bool)
+        bc = np.zeros(0, dtype=np.int64) if self.bc is None else np.asarray(self.bc, dtype=np.int64)
+        isbc[bc] = True
+
+        # Values which do not depend on the scaling: the diagonal of the boundary conditions and the constant
+        const = coo_matrix((self.n, self.n)) if self.add_constant is None else coo_matrix(self.add_constant)
+        major, minor = (const.col, const.row) if fmt == 'csc' else (const.row, const.col)
+        base_keys = np.concatenate((bc * self.n + bc, major.astype(np.int64) * self.n + minor))
+        base_vals = np.concatenate((np.full(len(bc), self.bcdiagval), const.data))
+
+        # All positions in the matrix, of which the unique positions of each chunk are mostly distinct
+        keys = _unique(np.concatenate([_unique(base_keys)] +
+                                      [_unique(self._element_entries(el, fmt, isbc)[0]) for el in chunks]))
+        nnz = len(keys)
+        indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // self.n, minlength=self.n), out=indptr[1:])
+        mat = self.matrix_type((np.zeros(nnz), keys % self.n, indptr), shape=(self.n, self.n))
+        self._indices, self._indptr = mat.indices, mat.indptr  # In the index type chosen by scipy
+        self._nnz = nnz
+
+        self._base_pos, inv = np.unique(np.searchsorted(keys, base_keys), return_inverse=True)
+        self._base = np.zeros(len(self._base_pos), dtype=np.result_type(self.elmat, base_vals, np.float64))
+        np.add.at(self._base, inv, base_vals)
+
+        # Sort the entries by position (counting sort), such that the values are summed in a single pass
+        itype = np.int32 if nel * m < 2**31 else np.int64
+        counts = np.zeros(nnz, dtype=np.int64)
+        for el in chunks:
+            pos = np.searchsorted(keys, np.sort(self._element_entries(el, fmt, isbc)[0]))
+            counts += np.bincount(pos, minlength=nnz)
+        starts = np.zeros(nnz + 1, dtype=np.int64)
+        np.cumsum(counts, out=starts[1:])
+        self._entries = np.empty(starts[-1], dtype=itype)
+        fill = counts  # Next free slot of each position
+        fill[:] = starts[:-1]
+        for el in chunks:
+            chunk_keys, entries = self._element_entries(el, fmt, isbc)
+            order = np.argsort(chunk_keys, kind='stable')
+            pos = np.searchsorted(keys, chunk_keys[order])  # Searching sorted values is faster
+            first = np.flatnonzero(np.diff(pos, prepend=-1))
+            n_pos = np.diff(first, append=len(pos))
+            rank = np.arange(len(pos)) - np.repeat(first, n_pos)
+            self._entries[fill[pos] + rank] = entries[order]
+            fill[pos[first]] += n_pos
+        del keys, counts, fill
+
+        self._starts = starts.astype(itype)
+        self._empty = np.flatnonzero(starts[1:] == starts[:-1])  # Positions without entries (boundary conditions)
+        bounds = np.searchsorted(starts, np.arange(self.chunk_size, starts[-1], self.chunk_size), side='right') - 1
+        bounds = np.unique(np.concatenate(([0], bounds)))
+        self._chunks = list(zip(bounds, np.append(bounds[1:], nnz)))
+        return True
+
+    def _matrix_data(self, xscale: np.ndarray, constant: bool = True, out: np.ndarray = None):
+        """ The values of the matrix in the structure of :meth:`_sparsity_pattern`, of which any leading (batch)
+        dimensions of `xscale` are the leading dimensions """
+        elvals = self._typed(self.elmat, xscale.real.dtype).ravel()
+        base = self._typed(self._base, xscale.real.dtype)
+        xscale = xscale.astype(np.result_type(xscale, elvals), copy=False)
+        if out is None:
+            out = np.empty(xscale.shape[:-1] + (self._nnz, ), dtype=np.result_type(xscale, base))
+        for p0, p1 in self._chunks:
+            entries = self._entries[self._starts[p0]:self._starts[p1]]
+            if len(entries) == 0:
+                out[..., p0:p1] = 0
+                continue
+            el, k = np.divmod(entries, self.elmat.size)
+            vals = np.take(xscale, el, axis=-1)
+            vals *= elvals[k]
+            local_starts = self._starts[p0:p1] - self._starts[p0]
+            q = p0 + np.searchsorted(local_starts, len(entries))  # Any trailing positions are empty
+            np.add.reduceat(vals, local_starts[:q - p0], axis=-1, out=out[..., p0:q])
+        out[..., self._empty] = 0
+        if constant:
+            out[..., self._base_pos] += base
+        return out
 
     def _response(self, xscale: np.ndarray):
         nel = self.dofconn.shape[0]
-        assert xscale.size == nel, f"Input vector wrong size ({xscale.size}), must be of size #nel ({nel})"
-        scaled_el = ((self.elmat.flatten()[np.newaxis]).T * xscale).flatten(order='F')
+        assert xscale.shape[-1] == nel and xscale.ndim <= 2, \
+            f"Input vector wrong size ({xscale.shape}), must be of size #nel ({nel}) or (#batch, #nel)"
+        xscale = self._cast(xscale)
+        if self._matrix_free:
+            return self._operator(xscale)
+        if self._compressed:
+            return self._response_compressed(xscale)
+
+        elmat = self._typed(self.elmat, xscale.real.dtype)
+        scaled_el = (xscale[..., np.newaxis] * elmat.flatten()).reshape(xscale.shape[:-1] + (-1, ))
 
         # Set boundary conditions
         if self.bc is not None:
             # Remove entries that correspond to bc before initializing
-            mat_values = np.concatenate((scaled_el[self.bcselect], self.bcdiagval*np.ones(len(self.bc))))
+            bcdtype = scaled_el.dtype if np.isrealobj(self.bcdiagval) else None
+            bcvals = np.full(xscale.shape[:-1] + (len(self.bc), ), self.bcdiagval, dtype=bcdtype)
+            mat_values = np.concatenate((scaled_el[..., self.bcselect], bcvals), axis=-1)
         else:
             mat_values = scaled_el
 
+        if mat_values.ndim == 1:
+            return self._build_matrix(mat_values)
+        mats = np.empty(len(mat_values), dtype=object)
+        for i, vals in enumerate(mat_values):
+            mats[i] = self._build_matrix(vals)
+        return mats
+
+    def _response_compressed(self, xscale: np.ndarray):
+        """ Fill the data of the matrix with the precomputed structure, in-place in the previous matrix if allowed """
+        shape = (self.n, self.n)
+        if xscale.ndim > 1:
+            data = self._matrix_data(xscale)
+            mats = np.empty(len(data), dtype=object)
+            for i, d in enumerate(data):
+                mats[i] = self.matrix_type((d, *self._structure()), shape=shape)
+            return mats
+
+        mat = self._reused_output(0)
+        real = xscale.real.dtype
+        dtype = np.result_type(xscale, self._typed(self.elmat, real), self._typed(self._base, real))
+        refs = self.__dict__.get('_out_structure', ())  # Weak references to the structure of the previous matrix
+        if mat is None or mat.dtype != dtype or mat.data.shape != (self._nnz, ) or len(refs) == 0 or \
+                mat.indices is not refs[0]() or mat.indptr is not refs[1]():  # The structure has been changed
+            mat = self.matrix_type((np.empty(self._nnz, dtype=dtype), *self._structure()), shape=shape)
+            self._out_structure = (weakref.ref(mat.indices), weakref.ref(mat.indptr))
+            self._keep_output(0, mat)
+        self._matrix_data(xscale, out=mat.data)
+        return mat
+
+    def _structure(self):
+        """ Copies of ``indices`` and ``indptr`` for a new matrix, which may be modified in-place by scipy (*e.g.* by
+        ``eliminate_zeros()``) without affecting the next matrices """
+        return self._indices.copy(), self._indptr.copy()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop('_out_structure', None)  # Weak references cannot be pickled
+        return state
+
+    def _operator(self, xscale: np.ndarray, constant: bool = True):
+        """ The matrix-free operator for the scaling, or a stack of operators for a batch """
+        if xscale.ndim > 1:
+            ops = np.empty(len(xscale), dtype=object)
+            for i, x in enumerate(xscale):
+                ops[i] = self._operator(x, constant=constant)
+            return ops
+        return self.matrix_type(self._typed(self.elmat, xscale.real.dtype), self.dofconn, scaling=xscale, n=self.n,
+                                bc=self.bc, constant=self._constant if constant else None)
+
+    def _build_matrix(self, mat_values):
+        """ Construct the matrix from the values of the entries at the (row, column) positions """
         try:
             mat = self.matrix_type((mat_values, (self.rows, self.cols)), shape=(self.n, self.n))
         except TypeError as e:
@@ -93,18 +301,69 @@ class AssembleGeneral(Module):
     def _sensitivity(self, dgdmat: Union[DyadCarrier, np.ndarray]):
         if dgdmat.size <= 0:
             return [None]
+        if self.sig_in[0].state.ndim > 1:
+            # A batch of matrices, of which the dyads are contracted at once, as for multiple seeds
+            if all(isinstance(d, DyadCarrier) for d in dgdmat):
+                return self._sensitivity_multi(list(dgdmat))
+            return np.stack([self._contract(d) for d in dgdmat])
+        return self._contract(dgdmat)
+
+    def _contract(self, dgdmat: Union[DyadCarrier, np.ndarray]):
+        """ Contract the sensitivity of a single matrix with the element matrices """
         if self.bc is not None:
             dgdmat[self.bc, :] = 0.0
             dgdmat[:, self.bc] = 0.0
         if isinstance(dgdmat, np.ndarray):
-            dx = np.zeros_like(self.sig_in[0].state)
-            for i in range(len(dx)):
-                indu, indv = np.meshgrid(self.dofconn[i], self.dofconn[i], indexing='ij')
-                dx[i] = einsum("ij,ij->", self.elmat, dgdmat[indu, indv])
+            nel = self.dofconn.shape[0]
+            dx = np.zeros(nel, dtype=self.sig_in[0].state.dtype)
+            chunk_el = max(1, self.chunk_size // self.elmat.size)
+            for e in range(0, nel, chunk_el):  # Gather the element blocks of the dense matrix in chunks
+                conn = self.dofconn[e:e + chunk_el]
+                dx[e:e + chunk_el] = einsum("eij,ij->e", dgdmat[conn[:, :, None], conn[:, None, :]], self.elmat)
             return dx
         elif isinstance(dgdmat, DyadCarrier):
             return dgdmat.contract(self.elmat, self.dofconn, self.dofconn)
 
+    def _sensitivity_multi(self, dgdmat):
+        if not all(isinstance(d, DyadCarrier) for d in dgdmat):
+            return super()._sensitivity_multi(dgdmat)
+
+        # Contract the dyads of all seeds at once
+        n_seeds = len(dgdmat)
+        nel = self.dofconn.shape[0]
+        seed_id = np.repeat(np.arange(n_seeds), [len(d.u) for d in dgdmat])
+        if seed_id.size == 0:
+            return np.zeros((n_seeds, nel), dtype=np.result_type(self.elmat, *[d.dtype for d in dgdmat]))
+        U = np.array([u for d in dgdmat for u in d.u]).T
+        V = np.array([v for d in dgdmat for v in d.v]).T
+        if self.bc is not None:
+            U[self.bc, :] = 0.0
+            V[self.bc, :] = 0.0
+        dx_dyads = einsum("eiD,ij,ejD->eD", U[self.dofconn], self.elmat, V[self.dofconn], optimize=True)
+
+        # Sum the contributions of the dyads belonging to each seed
+        dx = np.zeros((n_seeds, nel), dtype=dx_dyads.dtype)
+        np.add.at(dx.T, (slice(None), seed_id), dx_dyads)
+        return dx
+
+    def _tangent(self, dx):
+        # The matrix is linear in x; the boundary conditions and the constant do not depend on x
+        if self._matrix_free:
+            return self._operator(dx, constant=False)
+        if self._compressed:
+            return self.matrix_type((self._matrix_data(dx, constant=False), *self._structure()),
+                                    shape=(self.n, self.n))
+        scaled_el = ((self.elmat.flatten()[np.newaxis]).T * dx).flatten(order='F')
+        if self.bc is not None:
+            mat_values = np.concatenate((scaled_el[self.bcselect], np.zeros(len(self.bc), dtype=scaled_el.dtype)))
+        else:
+            mat_values = scaled_el
+        return self.matrix_type((mat_values, (self.rows, self.cols)), shape=(self.n, self.n))
+
+    def _sensitivity_tangent(self, ddgdmat):
+        # The matrix is linear in x, thus the sensitivity tangent follows from the sensitivity routine
+        return None if ddgdmat is None else self._sensitivity(ddgdmat)
+
 
 def get_B(dN_dx, voigt=True):
     """ Gets the strain-displacement relation (Cook, eq 3.1-9, P.80)
@@ -335,6 +594,8 @@ class ElementOperation(Module):
         domain: The domain defining element and nodal connectivity
         element_matrix: The element operator matrix :math:`\mathbf{B}` of size ``(..., n_dof_per_element)``
     """
+    recomputable = True
+
     def _prepare(self, domain: DomainDefinition, element_matrix: np.ndarray):
         if element_matrix.shape[-1] % domain.elemnodes != 0:
             raise IndexError("Size of last dimension of element operator matrix is not compatible with mesh. "
@@ -348,10 +609,14 @@ class ElementOperation(Module):
 
     def _response(self, u):
         assert u.size == self.usiz
-        return einsum('...k, lk -> ...l', self.element_matrix, u[self.dofconn], optimize=True)
+        u = self._cast(u)
+        elmat = self._typed(self.element_matrix, u.real.dtype)
+        y = self._out_buffer(0, elmat.shape[:-1] + (self.dofconn.shape[0], ), np.result_type(elmat, u))
+        return einsum('...k, lk -> ...l', elmat, u[self.dofconn], out=y, optimize=True)
 
     def _sensitivity(self, dy):
-        du_el = einsum('...k, ...l -> lk', self.element_matrix, dy, optimize=True)
+        dy = self._cast(dy)
+        du_el = einsum('...k, ...l -> lk', self._typed(self.element_matrix, dy.real.dtype), dy, optimize=True)
         du = np.zeros_like(self.sig_in[0].state)
         np.add.at(du, self.dofconn, du_el)
         return du
@@ -3,6 +3,7 @@ from abc import ABC
 import numpy as np
 from pymoto import Module
 from ..utils import _parse_to_list
+from ..common.profiling import traced
 
 try:  # AutoDiff module
     import jax
@@ -21,6 +22,7 @@ class AutoMod(Module, ABC):
                               f"Import failed with error: {_jax_error}")
         super().__init__(*args, **kwargs)
 
+    @traced('module')
     def response(self):
         # Calculate the response and tangent operator (JAX Vector-Jacobian product)
         y, self.vjp_fn = jax.vjp(self._response, *[s.state for s in self.sig_in])
@@ -30,6 +32,7 @@ class AutoMod(Module, ABC):
         for i, s in enumerate(self.sig_out):
             s.state = y[i]
 
+    @traced('module')
     def sensitivity(self):
         # Gather the output sensitivities
         dfdv = [s.sensitivity for s in self.sig_out]
@@ -50,3 +53,15 @@ class AutoMod(Module, ABC):
                 s.add_sensitivity(dfdx[i])
             else:
                 s.add_sensitivity(dfdx[i])
+
+    def _sensitivity_multi(self, *dfdv):
+        dfdv = list(dfdv)
+        n_seeds = len(next(df for df in dfdv if df is not None))
+        for i in range(len(dfdv)):
+            if dfdv[i] is None:  # JAX does not accept None as 0
+                dfdv[i] = np.zeros((n_seeds, *np.shape(self.sig_out[i].state)))
+
+        dfdv = tuple(dfdv) if len(dfdv) > 1 else dfdv[0]
+
+        # Vectorized backward sensitivity for all seeds
+        return _parse_to_list(jax.vmap(self.vjp_fn)(dfdv))
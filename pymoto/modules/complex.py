@@ -65,6 +65,8 @@ class MakeComplex(Module):
     Output Signal:
         - ``z``: Complex value
     """
+    recomputable = True
+
     def _response(self, x, y):
         return x + 1j*y
 
@@ -81,6 +83,8 @@ class RealPart(Module):
     Output Signal:
         - ``x``: Real part
     """
+    recomputable = True
+
     def _response(self, z):
         return np.real(z)
 
@@ -97,6 +101,8 @@ class ImagPart(Module):
     Output Signal:
         - ``y``: Imaginary part
     """
+    recomputable = True
+
     def _response(self, z):
         return np.imag(z)
 
@@ -113,6 +119,8 @@ class ComplexNorm(Module):
     Output Signal:
         - ``A``: Complex norm (real valued)
     """
+    recomputable = True
+
     def _response(self, z):
         return np.absolute(z)
 
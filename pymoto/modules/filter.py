@@ -24,6 +24,9 @@ class FilterConv(Module):
             The first values are used to pad the end and the
             end values are used to pad the beginning.
 
+    The input may have leading (batch) dimensions, *e.g.* of size ``(n_designs, n_el)``, in which case all designs are
+    filtered at once.
+
     Args:
         domain: The DomainDefinition
         radius (optional): Filter radius
@@ -37,6 +40,8 @@ class FilterConv(Module):
         zmin_bc(optional): Boundary condition at minimum z (only in 3D)
         zmax_bc(optional): Bounadry condition at maximum z (only in 3D)
     """
+    recomputable = True
+
     def _prepare(self, domain: DomainDefinition, radius: float = None, relative_units: bool = True, weights: np.ndarray = None,
                  xmin_bc='symmetric', xmax_bc='symmetric',
                  ymin_bc='symmetric', ymax_bc='symmetric',
@@ -151,11 +156,21 @@ class FilterConv(Module):
         self.overrides.append(((el_x[index], el_y[index], el_z[index]), value))
 
     def get_padded_vector(self, x):
-        xpad = x[self.el3d_pad]
+        xpad = x[..., self.el3d_pad]
         for index, value in self.overrides:
-            xpad[index] = value
+            xpad[(..., *index)] = value
         return xpad
 
+    def _kernel(self, x):
+        """ The filtering kernel in the precision of `x`, with leading unit dimensions for the batch dimensions """
+        w = self._typed(self.weights, x.real.dtype)
+        return w.reshape((1, ) * (x.ndim - 1) + w.shape)
+
+    @staticmethod
+    def _batch_index(x, ind):
+        """ Index of the last (element) axis of `x`, for use with ``np.add.at`` """
+        return (slice(None), ) * (x.ndim - 1) + (ind, )
+
     def set_filter_radius(self, radius: float, relative_units: bool = True):
         if relative_units:
             dx, dy, dz = 1.0, 1.0, 1.0
@@ -173,20 +188,35 @@ class FilterConv(Module):
         self.weights /= np.sum(self.weights)  # Volume preserving
 
     def _response(self, x):
+        x = self._cast(x)
         xpad = self.get_padded_vector(x)
-        y3d = convolve(xpad, self.weights, mode='valid')
-        y = np.zeros_like(x)
-        np.add.at(y, self.el3d_orig, y3d)
+        y3d = convolve(xpad, self._kernel(x), mode='valid')
+        y = self._out_buffer(0, x.shape, x.dtype)
+        y.fill(0)
+        np.add.at(y, self._batch_index(y, self.el3d_orig), y3d)
         return y
 
     def _sensitivity(self, dfdv):
-        dx3d = correlate(dfdv[self.el3d_orig], self.weights, mode='full')
+        dfdv = self._cast(dfdv)
+        dx3d = correlate(dfdv[..., self.el3d_orig], self._kernel(dfdv), mode='full')
         for index, _ in self.overrides:
-            dx3d[index] = 0
+            dx3d[(..., *index)] = 0
         dx = np.zeros_like(self.sig_in[0].state)
-        np.add.at(dx, self.el3d_pad, dx3d)
+        np.add.at(dx, self._batch_index(dx, self.el3d_pad), dx3d)
         return dx
 
+    def _tangent(self, dx):
+        dxpad = dx[..., self.el3d_pad]
+        for index, _ in self.overrides:
+            dxpad[(..., *index)] = 0  # Overridden (padded) values are constant
+        dy3d = convolve(dxpad, self._kernel(dx), mode='valid')
+        dy = np.zeros_like(dx)
+        np.add.at(dy, self._batch_index(dy, self.el3d_orig), dy3d)
+        return dy
+
+    def _sensitivity_tangent(self, ddfdv):
+        return None if ddfdv is None else self._sensitivity(ddfdv)
+
 
 class Filter(Module):
     r""" Abstract base class for any linear filter with normalization
@@ -205,11 +235,16 @@ class Filter(Module):
     Output Signal:
         - ``y``: Filtered field :math:`\mathbf{y}`
 
+    The input may have leading (batch) dimensions, *e.g.* of size ``(n_designs, n_el)``, in which case all designs are
+    filtered at once.
+
     Keyword Args:
         nonpadding (numpy.array[int]): An array with indices at places where
           :math:`s_i = \max(\mathbf{s}) \: \forall\: i \notin \mathcal{N}`. For a density filter this mimics having values
           of `0` outside of the domain, thus emulating padding of the boundaries.
     """
+    recomputable = True
+
     def _prepare(self, *args, nonpadding=None, **kwargs):
         self.H = self._calculate_h(*args, **kwargs).tocsc()
 
@@ -229,10 +264,22 @@ class Filter(Module):
         raise NotImplementedError("Filter not implemented.")
 
     def _response(self, x):
-        return np.asarray(self.H * x[np.newaxis].T / self.Hs)[:, 0]
+        x = self._cast(x)
+        H, Hs = self._typed(self.H, x.real.dtype), self._typed(self.Hs, x.real.dtype)
+        # Any leading (batch) dimensions are filtered at once, as columns of a matrix
+        return np.asarray(H * x.reshape(-1, x.shape[-1]).T / Hs).T.reshape(x.shape)
 
     def _sensitivity(self, dfdy):
-        return np.asarray(self.H * (dfdy[np.newaxis].T / self.Hs))[:, 0]
+        dfdy = self._cast(dfdy)
+        H, Hs = self._typed(self.H, dfdy.real.dtype), self._typed(self.Hs, dfdy.real.dtype)
+        dx = np.asarray(H * (dfdy.reshape(-1, dfdy.shape[-1]).T / Hs)).T.reshape(dfdy.shape)
+        return dx.astype(np.result_type(self.sig_in[0].state, dx), copy=False)
+
+    def _tangent(self, dx):
+        return self._response(dx)
+
+    def _sensitivity_tangent(self, ddfdy):
+        return None if ddfdy is None else self._sensitivity(ddfdy)
 
 
 class DensityFilter(Filter):
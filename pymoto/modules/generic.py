@@ -1,7 +1,7 @@
 """ Generic modules, valid for general mathematical operations """
 import numpy as np
 from pymoto.core_objects import Module
-from pymoto.utils import _concatenate_to_array, _split_from_array
+from pymoto.utils import _array_layout, _concatenate_to_array, _contiguous_view, _split_from_array
 try:
     from opt_einsum import contract as einsum  # Faster einsum
 except ModuleNotFoundError:
@@ -37,6 +37,9 @@ class MathGeneral(Module):
             assert (abs(m.sig_out[0].state[1] - sin(2.5)*4.8) < 1e-10)
             assert (abs(m.sig_out[0].state[2] - sin(9.4)*4.8) < 1e-10)
 
+    The inputs are broadcast according to the rules of NumPy, such that a batch of designs (*e.g.* of size
+    ``(Nbatch, n)``) can be combined with inputs shared by the whole batch.
+
     Input signals:
         ``*args`` (`float` or `np.ndarray`): Any number of numerical inputs which match the provided expression
 
@@ -44,86 +47,163 @@ class MathGeneral(Module):
         ``y`` (`float` or `np.ndarray`): Result of the mathematical operation
 
     Args:
-        expression (str): The mathematical expression to be evaluated
+        expression (str): The mathematical expression to be evaluated, or a ``sympy`` expression in terms of the
+          variables ``inp0``, ``inp1``, ...
 
     References:
       - `Sympy documentation <https://docs.sympy.org/latest/index.html>`_
     """
+    recomputable = True
+
     def _prepare(self, expression):
-        from sympy import lambdify
+        from sympy import sympify
         from sympy.parsing.sympy_parser import parse_expr
 
-        expression = expression.replace("^", "**").lower()  # Case insensitive
-
-        # Replace powers
-        expr = parse_expr(expression)
-
         # Variables
         var_names = []
         for i in range(len(self.sig_in)):
             var_names += ["inp{}".format(i), ]
 
-        # Named variables <RHO, X, ...> are converted to <sig0, sig1, ...>
-        trn = {}
-        for i, s in enumerate(self.sig_in):
-            if len(s.tag):
-                if s.tag.lower() in var_names and s.tag.lower() in expression:
-                    raise RuntimeError("Name '{}' multiple defined".format(s.tag.lower()))
-                trn[s.tag.lower()] = var_names[i]
+        if isinstance(expression, str):
+            expression = expression.replace("^", "**").lower()  # Case insensitive
+
+            # Replace powers
+            expr = parse_expr(expression)
 
-        expr = [expr.subs(trn)]
-        self.f = lambdify(var_names, expr, "numpy")
+            # Named variables <RHO, X, ...> are converted to <sig0, sig1, ...>
+            trn = {}
+            for i, s in enumerate(self.sig_in):
+                if len(s.tag):
+                    if s.tag.lower() in var_names and s.tag.lower() in expression:
+                        raise RuntimeError("Name '{}' multiple defined".format(s.tag.lower()))
+                    trn[s.tag.lower()] = var_names[i]
+
+            expr = [expr.subs(trn)]
+        else:  # Symbolic expression in terms of <inp0, inp1, ...>, e.g. from Network.fuse()
+            expr = [sympify(expression)]
+
+        self._expr, self._var_names = expr[0], var_names
+        self._lambdify()
+
+    def _lambdify(self):
+        """ Generate the numerical functions of the expression and its derivatives """
+        from sympy import lambdify
+
+        # Common subexpressions are only evaluated once, which saves temporary arrays
+        self.f = lambdify(self._var_names, [self._expr], "numpy", cse=True)
 
         # Determine derivatives
         dx = []
-        for i in range(len(self.sig_in)):
-            dx += [expr[0].diff(var_names[i])]
+        for v in self._var_names:
+            dx += [self._expr.diff(v)]
+
+        self.df = lambdify(self._var_names, dx, "numpy", cse=True)
 
-        self.df = lambdify(var_names, dx, "numpy")
+        # Second derivatives are only determined when required
+        self.d2f = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(f=None, df=None, d2f=None)  # The generated functions cannot be pickled, they are re-generated
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lambdify()
 
     def _response(self, *args):
-        self.x = args
-        return self.f(*args)
+        self.x = tuple(self._cast(a) for a in args)
+        return self.f(*self.x)
+
+    def _symbolic_expression(self):
+        return self._expr
 
     def _sensitivity(self, df_dy):
         dg_df = self.df(*self.x)  # This could be moved to _response(): less computations but more memory usage
+        return [self._reduce_to_input(i, df_dy*dg_df[i]) for i in range(len(self.sig_in))]
 
+    def _reduce_to_input(self, i, dg_dx_add):
+        """ Convert a contribution to the sensitivity of input `i` to the shape and type of its state """
         # Initialize sensitivities with zeroed out memory. This should ensure identical type of state and sensitivity
+        try:
+            dg_dxi = self.sig_in[i].state.copy()
+            dg_dxi[...] = 0
+        except (AttributeError, TypeError):  # Not numpy or zero-dimension array
+            dg_dxi = self.sig_in[i].state * 0
+
+        if np.isrealobj(dg_dxi) and np.iscomplexobj(dg_dx_add):
+            dg_dx_add = np.real(dg_dx_add)
+
+        # Add the contribution according to broadcasting rules of NumPy
+        # https://numpy.org/doc/stable/user/basics.broadcasting.html
+        if (not hasattr(dg_dxi, '__len__')) or (hasattr(dg_dxi, 'ndim') and dg_dxi.ndim == 0):
+            # Scalar type or 0-dimensional array
+            dg_dxi += np.sum(dg_dx_add)
+        elif dg_dxi.shape != dg_dx_add.shape:
+            # Reverse broadcast https://stackoverflow.com/questions/76002989/numpy-is-there-a-reverse-broadcast
+            n_leading_dims = dg_dx_add.ndim - dg_dxi.ndim
+            broadcasted_dims = tuple(range(n_leading_dims))
+            for ii in range(dg_dx_add.ndim - n_leading_dims):
+                if dg_dxi.shape[ii] == 1 and dg_dx_add.shape[ii+n_leading_dims] != 1:
+                    broadcasted_dims = (*broadcasted_dims, n_leading_dims+ii)
+
+            dg_dx_add1 = np.add.reduce(dg_dx_add, axis=broadcasted_dims, keepdims=True)  # Sum broadcasted axis
+            dg_dxi += np.squeeze(dg_dx_add1, axis=tuple(range(n_leading_dims)))  # Squeeze out singleton axis
+        else:
+            dg_dxi += dg_dx_add
+        return dg_dxi
+
+    def _sensitivity_multi(self, df_dy):
+        dg_df = self.df(*self.x)  # Only evaluated once for all seeds
+        n_seeds = df_dy.shape[0]
+
         dg_dx = []
-        for s in self.sig_in:
-            try:
-                dg_dxi = s.state.copy()
-                dg_dxi[...] = 0
-            except (AttributeError, TypeError):  # Not numpy or zero-dimension array
-                dg_dxi = s.state * 0
-            # assert (isinstance(dg_dxi, type(s.state)))
-            dg_dx.append(dg_dxi)
-
-        # Sum if input is scalar
-        for i, sig in enumerate(self.sig_in):
-            dg_dx_add = df_dy*dg_df[i]
-            if np.isrealobj(dg_dx[i]) and np.iscomplexobj(dg_dx_add):
+        for i, s in enumerate(self.sig_in):
+            shape = np.shape(s.state)
+            dg_dx_add = df_dy * np.asarray(dg_df[i])[np.newaxis, ...]
+            if np.isrealobj(s.state) and np.iscomplexobj(dg_dx_add):
                 dg_dx_add = np.real(dg_dx_add)
 
-            # Add the contribution according to broadcasting rules of NumPy
-            # https://numpy.org/doc/stable/user/basics.broadcasting.html
-            if (not hasattr(dg_dx[i], '__len__')) or (hasattr(dg_dx[i], 'ndim') and dg_dx[i].ndim == 0):
-                # Scalar type or 0-dimensional array
-                dg_dx[i] += np.sum(dg_dx_add)
-            elif dg_dx[i].shape != dg_dx_add.shape:
-                # Reverse broadcast https://stackoverflow.com/questions/76002989/numpy-is-there-a-reverse-broadcast
-                n_leading_dims = dg_dx_add.ndim - dg_dx[i].ndim
-                broadcasted_dims = tuple(range(n_leading_dims))
-                for ii in range(dg_dx_add.ndim - n_leading_dims):
-                    if dg_dx[i].shape[ii] == 1 and dg_dx_add.shape[ii+n_leading_dims] != 1:
-                        broadcasted_dims = (*broadcasted_dims, n_leading_dims+ii)
-
-                dg_dx_add1 = np.add.reduce(dg_dx_add, axis=broadcasted_dims, keepdims=True)  # Sum broadcasted axis
-                dg_dx[i] += np.squeeze(dg_dx_add1, axis=tuple(range(n_leading_dims)))  # Squeeze out singleton axis
-            else:
-                dg_dx[i] += dg_dx_add
+            # Reverse broadcast, keeping the leading dimension of the seeds
+            n_leading_dims = dg_dx_add.ndim - 1 - len(shape)
+            summed_dims = tuple(range(1, 1 + n_leading_dims))
+            for ii in range(len(shape)):
+                if shape[ii] == 1 and dg_dx_add.shape[1 + n_leading_dims + ii] != 1:
+                    summed_dims = (*summed_dims, 1 + n_leading_dims + ii)
+            dg_dx_add = np.add.reduce(dg_dx_add, axis=summed_dims, keepdims=True)
+            dg_dx.append(np.reshape(dg_dx_add, (n_seeds, *shape)))
+        return dg_dx
+
+    def _tangent(self, *dx):
+        dg_df = self.df(*self.x)
+        y = self.sig_out[0].state
+        dy = y * 0
+        for i, dxi in enumerate(dx):
+            if dxi is not None:
+                dy = dy + dg_df[i] * dxi
+        if np.isrealobj(y) and np.iscomplexobj(dy):
+            dy = np.real(dy)
+        return dy
+
+    def _sensitivity_tangent(self, ddf_dy):
+        if self.d2f is None:
+            from sympy import lambdify
+            d2x = [[self._expr.diff(vi, vj) for vj in self._var_names] for vi in self._var_names]
+            self.d2f = lambdify(self._var_names, d2x, "numpy", cse=True)
+
+        df_dy = self.sig_out[0].sensitivity
+        dg_df = self.df(*self.x)
+        d2g_df2 = self.d2f(*self.x)
+        dx = [s.tangent for s in self.sig_in]
 
-            # assert (isinstance(dg_dx[i], type(sig.state)))
+        dg_dx = []
+        for i in range(len(self.sig_in)):
+            dg_dx_add = None if ddf_dy is None else ddf_dy*dg_df[i]
+            for j, dxj in enumerate(dx):
+                if df_dy is None or dxj is None:
+                    continue
+                dg_dx_add = df_dy*d2g_df2[i][j]*dxj if dg_dx_add is None else dg_dx_add + df_dy*d2g_df2[i][j]*dxj
+            dg_dx.append(None if dg_dx_add is None else self._reduce_to_input(i, dg_dx_add))
         return dg_dx
 
 
@@ -150,6 +230,10 @@ class EinSum(Module):
     Many more advanced operations are supported (see References), with exception of expressions with repeated indices
     (*e.g.* ``iij->ij``).
 
+    Inputs with one more dimension than their indices in the expression are treated as a batch, of which the leading
+    dimension is also the leading dimension of the output. For instance, ``"i,i->"`` with inputs of size ``(Nbatch, n)``
+    and ``(n)`` results in a vector of size ``(Nbatch)``. This requires an explicit output (``->``) in the expression.
+
     An optimized version of ``einsum`` is available by installing the package
     `opt_einsum <https://optimized-einsum.readthedocs.io/en/stable/>`_.
 
@@ -168,14 +252,45 @@ class EinSum(Module):
       - `EinStein summation in Numpy <https://obilaniu6266h16.wordpress.com/2016/02/04/einstein-summation-in-numpy/>`_
       - `Optimized Einsum opt_einsum <https://optimized-einsum.readthedocs.io/en/stable/>`_
     """
+    recomputable = True
+
     def _prepare(self, expression: str):
         self.expr = expression
         cmd = self.expr.split("->")
         self.indices_in = [s.strip() for s in cmd[0].split(",")]
         self.indices_out = cmd[1] if "->" in self.expr else ''
+        self._expression = (self.expr, self.indices_in, self.indices_out)
+
+    def _set_batch(self, args):
+        """ Add an index to the expression for inputs with a leading batch dimension (or remove it otherwise) """
+        expr, indices_in, indices_out = self._expression
+        batched = ["..." not in ind and np.ndim(a) == len(ind) + 1 for a, ind in zip(args, indices_in)]
+        if "->" in expr and any(batched):
+            i_batch = next(c for c in "zyxwvutsrqponmlkjihgfedcbaZYXWVUTSRQPONMLKJIHGFEDCBA" if c not in expr)
+            indices_in = [i_batch + ind if b else ind for ind, b in zip(indices_in, batched)]
+            indices_out = i_batch + indices_out.strip()
+            expr = ",".join(indices_in) + "->" + indices_out
+        self.expr, self.indices_in, self.indices_out = expr, indices_in, indices_out
 
     def _response(self, *args):
-        return [einsum(self.expr, *args, optimize=True)]
+        args = [self._cast(a) for a in args]
+        self._set_batch(args)
+        shape = self._output_shape(args)
+        if shape is None or len(shape) == 0:
+            return [einsum(self.expr, *args, optimize=True)]
+        y = self._out_buffer(0, shape, np.result_type(*args))
+        return [einsum(self.expr, *args, out=y, optimize=True)]
+
+    def _output_shape(self, args):
+        """ Shape of the output array, or None if it cannot be determined from the explicit indices """
+        if "->" not in self.expr or "..." in self.expr or len(args) != len(self.indices_in):
+            return None
+        sizes = dict()
+        for ind, a in zip(self.indices_in, args):
+            if np.ndim(a) != len(ind):
+                return None
+            sizes.update(zip(ind, np.shape(a)))
+        return tuple(sizes[c] for c in self.indices_out.strip())
 
     def _sensitivity(self, df_in):
         n_in = len(self.sig_in)
@@ -195,46 +310,131 @@ class EinSum(Module):
                 mat = np.ones_like(self.sig_in[0].state)
             return df_in * mat
 
+        self._check_repeated_indices()
+        states = [s.state for s in self.sig_in]
+        return [self._contract_adjoint(ar, df_in, states) for ar in range(n_in)]
+
+    def _check_repeated_indices(self):
         for ind_in in self.indices_in:
             if len(set(ind_in)) < len(ind_in):
                 raise TypeError("Sensitivities for repeated incides '{}' not supported for any other than trace 'ii->'."
                                 .format(self.expr))
 
+    def _adjoint_operands(self, ar, args, i_seed=''):
+        """ Expression and operands to contract the output sensitivity with, for the sensitivity of argument `ar`
+
+        The optional index `i_seed` is prepended to the output sensitivity and the result, for stacked seeds.
+        """
+        ind_in = [self.indices_out]
+        ind_in += [elem for i, elem in enumerate(self.indices_in) if i != ar]
+        arg_in = [a for i, a in enumerate(args) if i != ar]
+        ind_out = self.indices_in[ar]
+        if not set(ind_out) <= set("".join(ind_in)):  # E.g. a batch of sums "zi->z", broadcast to the input shape
+            ind_in.append(ind_out)
+            arg_in.append(np.ones_like(self.sig_in[ar].state))
+        ind_in[0] = i_seed + ind_in[0]
+        return ",".join(ind_in)+"->"+i_seed+ind_out, arg_in
+
+    def _contract_adjoint(self, ar, df_in, args):
+        """ Contract the output sensitivity with all arguments except number `ar` """
+        op, arg_in = self._adjoint_operands(ar, args)
+        arg_complex = [np.iscomplexobj(a) for a in arg_in]
+        if not np.iscomplexobj(self.sig_in[ar].state) and np.any(arg_complex) and np.iscomplexobj(df_in):
+            da_i = np.zeros_like(self.sig_in[ar].state)+0j
+            einsum(op, df_in, *arg_in, out=da_i, optimize=True)
+            da_i = da_i.real
+        else:
+            da_i = np.zeros_like(self.sig_in[ar].state)
+            einsum(op, df_in, *arg_in, out=da_i, optimize=True)
+        return da_i
+
+    def _sensitivity_multi(self, df_in):
+        n_in = len(self.sig_in)
+        n_seeds = df_in.shape[0]
+        if (self.indices_out == '') and n_in == 1:
+            # Exceptions for a single input and scalar output (see _sensitivity)
+            return self._sensitivity(1.0)[np.newaxis, ...] * df_in.reshape((n_seeds, ) + (1, )*self.sig_in[0].state.ndim)
+
+        self._check_repeated_indices()
+
+        # Additional index for the seeds
+        i_seed = next(c for c in "zyxwvutsrqponmlkjihgfedcbaZYXWVUTSRQPONMLKJIHGFEDCBA" if c not in self.expr)
+
+        states = [s.state for s in self.sig_in]
         df_out = []
         for ar in range(n_in):
-            ind_in = [self.indices_out]
-            ind_in += [elem for i, elem in enumerate(self.indices_in) if i != ar]
-            arg_in = [s.state for i, s in enumerate(self.sig_in) if i != ar]
-            arg_complex = [np.iscomplexobj(s.state) for i, s in enumerate(self.sig_in) if i != ar]
-            ind_out = self.indices_in[ar]
-
-            op = ",".join(ind_in)+"->"+ind_out
-            if not np.iscomplexobj(self.sig_in[ar].state) and np.any(arg_complex) and np.iscomplexobj(df_in):
-                da_i = np.zeros_like(self.sig_in[ar].state)+0j
-                einsum(op, df_in, *arg_in, out=da_i, optimize=True)
+            op, arg_in = self._adjoint_operands(ar, states, i_seed)
+            da_i = einsum(op, df_in, *arg_in, optimize=True)
+            if not np.iscomplexobj(self.sig_in[ar].state):
                 da_i = da_i.real
-            else:
-                da_i = np.zeros_like(self.sig_in[ar].state)
-                einsum(op, df_in, *arg_in, out=da_i, optimize=True)
+            df_out.append(da_i)
+        return df_out
+
+    def _tangent(self, *dx):
+        # Product rule, the tangent of each input is contracted with the states of the other inputs
+        dy = None
+        for ar, dxi in enumerate(dx):
+            if dxi is None:
+                continue
+            args = [dxi if i == ar else s.state for i, s in enumerate(self.sig_in)]
+            dy_i = einsum(self.expr, *args, optimize=True)
+            dy = dy_i if dy is None else dy + dy_i
+        return [dy]
+
+    def _sensitivity_tangent(self, ddf_in):
+        n_in = len(self.sig_in)
+        if (self.indices_out == '') and n_in == 1:
+            return None if ddf_in is None else self._sensitivity(ddf_in)  # Linear operation
+
+        self._check_repeated_indices()
+        df_in = self.sig_out[0].sensitivity
+        states = [s.state for s in self.sig_in]
+        dx = [s.tangent for s in self.sig_in]
+
+        # Product rule, for each input the tangents of all other inputs contribute
+        df_out = []
+        for ar in range(n_in):
+            da_i = None if ddf_in is None else self._contract_adjoint(ar, ddf_in, states)
+            for j, dxj in enumerate(dx):
+                if j == ar or dxj is None or df_in is None:
+                    continue
+                da_ij = self._contract_adjoint(ar, df_in, [dxj if i == j else a for i, a in enumerate(states)])
+                da_i = da_ij if da_i is None else da_i + da_ij
             df_out.append(da_i)
         return df_out
 
 
 class ConcatSignal(Module):
-    """ Concatenates data of multiple signals into one big vector """
+    """ Concatenates data of multiple signals into one big vector
+
+    If multiple inputs are consecutive parts of one contiguous array (*e.g.* the variables of a :class:`PackedSignals`),
+    the output is a view of this array and no data is copied.
+    """
+    recomputable = True
+
     def _response(self, *args):
-        state, self.cumlens = _concatenate_to_array(list(args))
-        return state
+        self.cumlens, dtype = _array_layout(args)
+        state = _contiguous_view(args)
+        if state is not None and state.dtype == dtype:
+            return state
+        return _concatenate_to_array(args, out=self._out_buffer(0, (self.cumlens[-1], ), dtype))[0]
 
     def _sensitivity(self, dy):
         dsens = [np.zeros_like(s.state) for s in self.sig_in]
         dx = _split_from_array(dy, self.cumlens)
         for i, s in enumerate(self.sig_in):
-            if not isinstance(dsens[i], type(s.state)):
-                dsens[i] = type(s.state)(dx[i])
+            if not isinstance(dsens[i], type(s.state)):  # E.g. a Python scalar
+                dsens[i] = type(s.state)(dx[i].item() if dx[i].size == 1 else dx[i])
                 continue
             try:
                 dsens[i][...] = dx[i]
             except TypeError:
                 dsens[i] = type(s.state)(dx[i])
         return dsens
+
+    def _tangent(self, *dx):
+        dx = [np.zeros_like(s.state) if dxi is None else dxi for s, dxi in zip(self.sig_in, dx)]
+        return _concatenate_to_array(dx)[0]
+
+    def _sensitivity_tangent(self, ddy):
+        return [None for _ in self.sig_in] if ddy is None else self._sensitivity(ddy)
@@ -1,4 +1,5 @@
 """ Specialized linear algebra modules """
+import copy
 import warnings
 from inspect import currentframe, getframeinfo
 
@@ -230,6 +231,18 @@ class LinSolve(Module):
     Output Signal:
       - ``x`` (`vector`): Solution vector of size ``(n)`` or block-vector of size ``(n, Nrhs)``
 
+    The system matrix can also be a :class:`MatrixFreeOperator`, which is solved with an iterative solver (by default
+    :class:`solvers.CG`). As for a sparse matrix, its sensitivity is then a :class:`DyadCarrier`.
+
+    A matrix or right-hand-side of lower precision (*e.g.* ``float32``) is converted to double precision, such that the
+    solution is always calculated in double precision.
+
+    A batch of systems is solved in case ``A`` is a stack of matrices, *i.e.* an object array of size ``(Nbatch)``
+    with sparse matrices (see :class:`AssembleGeneral`) or a dense array of size ``(Nbatch, n, n)``. The right-hand-side
+    is then either shared by all systems, or has a leading batch dimension as ``(Nbatch, n)`` or ``(Nbatch, n, Nrhs)``.
+    The systems are solved in turn, each with its own solver, which keeps its factorization for the sensitivity
+    analysis and its symbolic analysis for the next iterations.
+
     Keyword Args:
         dep_tol: Tolerance for detecting linear dependence of solution vectors (default = ``1e-5``)
         hermitian: Flag to omit the automatic detection for Hermitian matrix, saves some work for large matrices
@@ -248,10 +261,24 @@ class LinSolve(Module):
         self.issymmetric = symmetric
         self.solver = solver
         self.u = None  # Solution storage
-
-    def _response(self, mat, rhs):
-        # Do some detections on the matrix type
-        self.issparse = sps.issparse(mat)  # Check if it is a sparse matrix
+        self.batch_solvers = None  # Solvers for each system in a batch
+
+    @staticmethod
+    def _double(x):
+        """ Convert a (sparse) array of lower floating point precision to double precision """
+        if not hasattr(x, 'dtype') or not np.issubdtype(x.dtype, np.inexact):
+            return x
+        dtype = np.promote_types(x.dtype, np.float64)
+        return x if x.dtype == dtype else x.astype(dtype)
+
+    @staticmethod
+    def _is_batch(mat):
+        """ Check if the matrix is a stack of matrices, as object array or three-dimensional dense array """
+        return isinstance(mat, np.ndarray) and (mat.dtype == object or mat.ndim == 3)
+
+    def _detect(self, mat, rhs):
+        """ Do some detections on the matrix type """
+        self.issparse = not isinstance(mat, np.ndarray)  # Check if it is a sparse matrix (or matrix-free operator)
         self.iscomplex = np.iscomplexobj(mat)  # Check if it is a complex-valued matrix
         if not self.iscomplex and self.issymmetric is not None:
             self.ishermitian = self.issymmetric
@@ -262,45 +289,167 @@ class LinSolve(Module):
                             "This case can simply be solved by running two rhs (one for the real part and "
                             "one for the imaginary.")
 
-        # Determine the solver we want to use
-        if self.solver is None:
-            self.solver = auto_determine_solver(mat, ishermitian=self.ishermitian)
-        if not isinstance(self.solver, LDAWrapper) and self.use_lda_solver:
+    def _update_solver(self, solver, mat):
+        """ Update the solver with a new matrix, where the solver is determined first if it is not given """
+        if solver is None:
+            solver = auto_determine_solver(mat, ishermitian=self.ishermitian)
+        if not isinstance(solver, LDAWrapper) and self.use_lda_solver:
             lda_kwargs = dict(hermitian=self.ishermitian, symmetric=self.issymmetric)
-            if hasattr(self.solver, 'tol'):
-                lda_kwargs['tol'] = self.solver.tol * 2
-            self.solver = LDAWrapper(self.solver, **lda_kwargs)
+            if hasattr(solver, 'tol'):
+                lda_kwargs['tol'] = solver.tol * 2
+            solver = LDAWrapper(solver, **lda_kwargs)
+        solver.update(mat)
+        return solver
+
+    def _response(self, mat, rhs):
+        if self._is_batch(mat):
+            return self._response_batch(mat, rhs)
+        mat, rhs = self._double(mat), self._double(rhs)
+        self._detect(mat, rhs)
 
         # Update solver with new matrix
-        self.solver.update(mat)
+        self.solver = self._update_solver(self.solver, mat)
 
         # Solution
         self.u = self.solver.solve(rhs, x0=self.u)
 
         return self.u
 
+    @staticmethod
+    def _rhs_is_batch(mat, rhs):
+        """ Check if the right-hand-side has a leading batch dimension, or is shared by all systems of the batch """
+        return np.ndim(rhs) >= 2 and rhs.shape[0] == len(mat) and rhs.shape[1] == mat[0].shape[0]
+
+    def _response_batch(self, mat, rhs):
+        n_batch = len(mat)
+        self._detect(self._double(mat[0]), rhs)
+        if self.batch_solvers is None or len(self.batch_solvers) != n_batch:
+            # The given solver is copied, as each system of the batch keeps its own factorization
+            self.batch_solvers = [copy.deepcopy(self.solver) for _ in range(n_batch)]
+            self.u = None
+        rhs_batch = self._rhs_is_batch(mat, rhs)
+        u = []
+        for i in range(n_batch):
+            self.batch_solvers[i] = self._update_solver(self.batch_solvers[i], self._double(mat[i]))
+            rhs_i = self._double(rhs[i] if rhs_batch else rhs)
+            u.append(self.batch_solvers[i].solve(rhs_i, x0=None if self.u is None else self.u[i]))
+        self.u = np.stack(u)
+        return self.u
+
     def _sensitivity(self, dfdv):
         mat, rhs = [s.state for s in self.sig_in]
+        if self._is_batch(mat):
+            return self._sensitivity_batch(dfdv)
         # lam = self.solver.solve(dfdv.conj(), trans='H').conj()
-        lam = self.solver.solve(dfdv, trans='T')
+        lam = self.solver.solve(self._double(dfdv), trans='T')
+
+        dmat = self._outer(-lam, self.u)
+
+        db = np.real(lam) if np.isrealobj(rhs) else lam
+
+        return dmat, db
+
+    def _sensitivity_batch(self, dfdv):
+        mat, rhs = [s.state for s in self.sig_in]
+        lam = np.stack([solver.solve(self._double(dfdv[i]), trans='T') for i, solver in enumerate(self.batch_solvers)])
 
         if self.issparse:
-            if self.u.ndim > 1:
-                dmat = DyadCarrier(list(-lam.T), list(self.u.T))
+            dmat = np.empty(len(lam), dtype=object)
+            for i in range(len(lam)):
+                dmat[i] = self._outer(-lam[i], self.u[i])
+        else:
+            dmat = np.stack([self._outer(-lam[i], self.u[i]) for i in range(len(lam))])
+
+        db = np.real(lam) if np.isrealobj(rhs) else lam
+        if not self._rhs_is_batch(mat, rhs):
+            db = db.sum(axis=0)  # The right-hand-side is shared by all systems
+
+        return dmat, db
+
+    def _outer(self, a, b):
+        """ The (sum of the) outer products of `a` and `b`, as DyadCarrier in case of a sparse matrix """
+        if self.issparse:
+            if b.ndim > 1:
+                mat = DyadCarrier(list(a.T), list(b.T))
+            else:
+                mat = DyadCarrier(a, b)
+        else:
+            if b.ndim > 1:
+                mat = np.einsum("iB,jB->ij", a, b, optimize=True)
             else:
-                dmat = DyadCarrier(-lam, self.u)
+                mat = np.outer(a, b)
+        return mat if self.iscomplex else mat.real
+
+    def _solve(self, rhs, trans='N'):
+        """ Solve, where a complex right-hand-side for a real sparse matrix is split in real and imaginary part """
+        if self.issparse and not self.iscomplex and np.iscomplexobj(rhs):
+            return self.solver.solve(rhs.real, trans=trans) + 1j*self.solver.solve(rhs.imag, trans=trans)
+        return self.solver.solve(rhs, trans=trans)
+
+    def _sensitivity_multi(self, dfdv):
+        mat, rhs = [s.state for s in self.sig_in]
+        n_seeds = dfdv.shape[0]
+
+        # Solve all adjoint problems at once, with the seeds as block right-hand-side (skipping zero seeds)
+        rhs_block = np.moveaxis(dfdv, 0, 1).reshape(dfdv.shape[1], -1)
+        nonzero = np.any(rhs_block != 0, axis=0)
+        if np.any(nonzero):
+            lam_nonzero = self.solver.solve(rhs_block[:, nonzero], trans='T')
+            lam = np.zeros(rhs_block.shape, dtype=lam_nonzero.dtype)
+            lam[:, nonzero] = lam_nonzero.reshape(rhs_block.shape[0], -1)
+        else:
+            lam = np.zeros_like(rhs_block)
+        lam = np.moveaxis(lam.reshape(dfdv.shape[1], n_seeds, *dfdv.shape[2:]), 1, 0)  # Seeds in leading dimension
+
+        if self.issparse:
+            dmat = np.empty(n_seeds, dtype=object)
+            for i in range(n_seeds):
+                if self.u.ndim > 1:
+                    dmat[i] = DyadCarrier(list(-lam[i].T), list(self.u.T))
+                else:
+                    dmat[i] = DyadCarrier(-lam[i], self.u)
+                if not self.iscomplex:
+                    dmat[i] = dmat[i].real
         else:
             if self.u.ndim > 1:
-                dmat = np.einsum("iB,jB->ij", -lam, self.u, optimize=True)
+                dmat = np.einsum("siB,jB->sij", -lam, self.u, optimize=True)
             else:
-                dmat = np.outer(-lam, self.u)
-        if not self.iscomplex:
-            dmat = dmat.real
+                dmat = np.einsum("si,j->sij", -lam, self.u, optimize=True)
+            if not self.iscomplex:
+                dmat = dmat.real
 
         db = np.real(lam) if np.isrealobj(rhs) else lam
 
         return dmat, db
 
+    def _tangent(self, dmat, drhs):
+        # Differentiating A x = b gives A dx = db - dA x
+        r = np.zeros_like(self.u) if drhs is None else drhs
+        if dmat is not None:
+            r = r - dmat @ self.u
+        return self._solve(r)
+
+    def _sensitivity_tangent(self, ddfdv):
+        rhs = self.sig_in[1].state
+        dfdv = self.sig_out[0].sensitivity
+        dmat, du = self.sig_in[0].tangent, self.sig_out[0].tangent
+
+        # Tangent of the adjoint solution: A^T dlam = d(dfdv) - dA^T lam
+        lam = None if dfdv is None else self.solver.solve(dfdv, trans='T')
+        r = ddfdv
+        if lam is not None and dmat is not None:
+            r = -(dmat.T @ lam) if r is None else r - dmat.T @ lam
+        if r is None and (lam is None or du is None):
+            return None, None
+        dlam = np.zeros_like(self.u) if r is None else self._solve(r, trans='T')
+
+        # Differentiate dmat = -lam x u and db = lam
+        ddmat = self._outer(-dlam, self.u)
+        if lam is not None and du is not None:
+            ddmat = ddmat + self._outer(-lam, du)
+        ddb = np.real(dlam) if np.isrealobj(rhs) else dlam
+        return ddmat, ddb
+
 
 class EigenSolve(Module):
     r""" Solves the (generalized) eigenvalue problem :math:`\mathbf{A}\mathbf{q}_i = \lambda_i \mathbf{B} \mathbf{q}_i`
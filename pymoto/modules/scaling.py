@@ -27,6 +27,8 @@ class Scaling(Module):
         minval: Minimum value :math:`x_\text{min}` for negative-null-form constraint
         minval: Maximum value :math:`x_\text{max}` for negative-null-form constraint
     """
+    recomputable = True
+
     def _prepare(self, scaling: float = 100.0, minval: float = None, maxval: float = None):
         self.minval = minval
         self.maxval = maxval
@@ -57,3 +59,23 @@ class Scaling(Module):
         else:
             return dg
 
+    def _symbolic_expression(self):
+        if not hasattr(self, 'sf') or np.size(self.sf) != 1:
+            return None  # The scaling factor is only known after the first response
+        from sympy import Symbol
+        x = Symbol('inp0')
+        if self.minval is not None:
+            g = 1 - x/self.minval
+        elif self.maxval is not None:
+            g = x/self.maxval - 1
+        else:
+            g = x
+        return g * float(self.sf)
+
+    def _tangent(self, dx):
+        # The response is linear in x, with constant scaling factor
+        return self._sensitivity(dx)
+
+    def _sensitivity_tangent(self, ddy):
+        return None if ddy is None else self._sensitivity(ddy)
+
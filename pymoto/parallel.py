@@ -0,0 +1,269 @@
+""" Execution of independent sub-networks in persistent worker processes """
+import traceback
+import weakref
+import multiprocessing as mp
+try:
+    from multiprocessing import shared_memory
+    _has_shared_memory = True
+except ImportError:  # Python < 3.8
+    _has_shared_memory = False
+from typing import Union, List
+
+import numpy as np
+
+from .core_objects import Module, Network
+from .graph import base_signal
+from .common.profiling import traced
+from .utils import _parse_to_list
+
+
+def _is_shareable(val):
+    return isinstance(val, np.ndarray) and val.dtype != object
+
+
+def _encode(val, block):
+    """ Write an array into a shared memory block if it fits, otherwise send the value itself """
+    if block is not None and _is_shareable(val) and 0 < val.nbytes <= block.size:
+        np.ndarray(val.shape, dtype=val.dtype, buffer=block.buf)[...] = val
+        return 'shm', block.name, val.shape, val.dtype.str
+    return 'obj', val
+
+
+def _decode(msg, block):
+    """ Obtain a value sent by :func:`_encode`, arrays in shared memory are copied """
+    if msg[0] == 'obj':
+        return msg[1]
+    _, _, shape, dtype = msg
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+
+
+class _AttachedBlocks:
+    """ The shared memory blocks of the parent process, as attached to by a worker (by key) """
+    def __init__(self):
+        self.blocks = dict()
+
+    def get(self, key, names: dict):
+        """ Get the block for the key, given the current names of the blocks of the parent """
+        name = names.get(key)
+        blk = self.blocks.get(key)
+        if blk is not None and blk.name != name:  # The parent has replaced the block
+            self.blocks.pop(key).close()
+            blk = None
+        if blk is None and name is not None:
+            blk = shared_memory.SharedMemory(name=name)
+            self.blocks[key] = blk
+        return blk
+
+    def close(self):
+        for blk in self.blocks.values():
+            blk.close()
+        self.blocks.clear()
+
+
+def _worker(conn):
+    """ Main loop of a worker process, which holds one branch and executes the commands of the parent """
+    branch, inputs, outputs = None, None, None
+    blocks = _AttachedBlocks()
+    signals = None
+    while True:
+        cmd, *args = conn.recv()
+        if cmd == 'stop':
+            blocks.close()
+            break
+        try:
+            result = None
+            if cmd == 'init':
+                branch, inputs, outputs = args
+                signals = list({id(s): s for s in map(base_signal, branch._all_signals())}.values())
+            elif cmd == 'response':
+                values, names, reset = args
+                if reset:
+                    branch.reset()
+                for i, (s, v) in enumerate(zip(inputs, values)):
+                    s.state = _decode(v, blocks.get(('in', i), names))
+                branch.response()
+                result = [_encode(s.state, blocks.get(('out', i), names)) for i, s in enumerate(outputs)]
+            elif cmd == 'sensitivity':
+                values, names, reset = args
+                if reset:
+                    branch.reset()
+                for s in signals:  # Only the new contributions are sent back
+                    s.reset()
+                for i, (s, v) in enumerate(zip(outputs, values)):
+                    s.sensitivity = _decode(v, blocks.get(('dout', i), names))
+                branch.sensitivity()
+                result = [_encode(s.sensitivity, blocks.get(('din', i), names)) for i, s in enumerate(inputs)]
+            conn.send(('ok', result))
+        except Exception as e:
+            try:
+                conn.send(('error', e, traceback.format_exc()))
+            except Exception:  # The exception itself cannot be pickled
+                conn.send(('error', RuntimeError(repr(e)), traceback.format_exc()))
+
+
+def _shutdown(workers: list, blocks: list):
+    """ Stop the worker processes and release the shared memory blocks """
+    for proc, conn in workers:
+        try:
+            conn.send(('stop', ))
+        except (OSError, ValueError):
+            pass
+    for proc, conn in workers:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+        conn.close()
+    workers.clear()
+    for branch_blocks in blocks:
+        for blk in branch_blocks.values():
+            blk.close()
+            blk.unlink()
+        branch_blocks.clear()
+
+
+class ParallelNetwork(Module):
+    """ Executes independent branches (sub-networks) concurrently, each in its own persistent worker process
+
+    In contrast to the threads of :class:`Network` (``n_threads``), the branches are not limited by the global
+    interpreter lock, which is useful if they are dominated by Python code. Typical examples are the different designs
+    of a robust formulation, or load cases with different boundary conditions, each with their own assembly and solve.
+
+    Each branch is copied to a worker process once, at construction. The branches must therefore not have been evaluated
+    yet, and the modules must be picklable. All data of the modules (*e.g.* element matrices, index arrays,
+    factorizations) then persists within the workers between the iterations. Every response and sensitivity analysis,
+    only the states of the inputs and the (exported) outputs of the branches, and their sensitivities, are exchanged.
+    Arrays of at least ``shm_threshold`` bytes are exchanged through ``multiprocessing.shared_memory``, instead of
+    being pickled. The blocks of shared memory are allocated once and re-used in the next iterations. Shared memory
+    requires Python 3.8 or newer; on older versions all arrays are pickled.
+
+    The workers are started with the ``spawn`` method, so a script using this module must guard its main code with
+    ``if __name__ == "__main__":``. The workers are stopped with :meth:`close`, or when the module is deleted.
+
+    >> ParallelNetwork(branch1, branch2, ...)
+
+    Args:
+        *args: The branches, either a :class:`Network` or a list of modules each. The branches must not share any
+          output signals.
+
+    Keyword Args:
+        outputs (optional): The signals which are transferred back from the workers. By default these are all output
+          signals of the branches, which are not used within the same branch.
+        shm_threshold (optional): Minimum size in bytes of the arrays which are exchanged via shared memory
+    """
+    def __init__(self, *args, outputs: Union[List, None] = None, shm_threshold: int = 2**16):
+        self.branches = [b if isinstance(b, Network) else Network(b) for b in args]
+        self.shm_threshold = shm_threshold
+
+        self._inputs, self._outputs = [], []
+        select = None if outputs is None else set(map(id, _parse_to_list(outputs)))
+        for b in self.branches:
+            self._inputs.append(b.sig_in)
+            if select is None:
+                self._outputs.append([s for s in b.sig_out if len(b.consumers(s)) == 0])
+            else:
+                self._outputs.append([s for s in b.sig_out if id(s) in select])
+
+        sig_in = list({id(s): s for s in sum(self._inputs, [])}.values())
+        sig_out = sum(self._outputs, [])
+        if len(set(map(id, sig_out))) != len(sig_out):
+            raise ValueError("The branches of a ParallelNetwork cannot have any outputs in common")
+        super().__init__(sig_in, sig_out)
+
+        # Start the persistent workers, which each receive one branch
+        ctx = mp.get_context('spawn')
+        self._workers = []
+        self._blocks = [dict() for _ in self.branches]
+        self._reset_pending = [False for _ in self.branches]
+        self._finalizer = weakref.finalize(self, _shutdown, self._workers, self._blocks)
+        for b, inp, out in zip(self.branches, self._inputs, self._outputs):
+            conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child_conn, ), daemon=True, name='pymoto-worker')
+            proc.start()
+            child_conn.close()
+            self._workers.append((proc, conn))
+            conn.send(('init', b, inp, out))
+        self._gather('init')
+
+    def _block(self, ib: int, key: tuple, nbytes: int):
+        """ A shared memory block of branch `ib` with at least the given size, or None for small arrays """
+        if not _has_shared_memory or nbytes < self.shm_threshold:
+            return None
+        blk = self._blocks[ib].get(key)
+        if blk is not None and blk.size < nbytes:
+            blk.close()
+            blk.unlink()
+            blk = None
+        if blk is None:
+            blk = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._blocks[ib][key] = blk
+        return blk
+
+    def _send(self, ib: int, cmd: str, in_key: str, out_key: str, values: list):
+        """ Send a command with values to branch `ib`, together with the blocks to exchange the values through """
+        msgs = []
+        for i, v in enumerate(values):
+            blk = self._block(ib, (in_key, i), v.nbytes) if _is_shareable(v) else None
+            msgs.append(_encode(v, blk))
+        names = {key: blk.name for key, blk in self._blocks[ib].items() if key[0] in (in_key, out_key)}
+        reset, self._reset_pending[ib] = self._reset_pending[ib], False
+        self._workers[ib][1].send((cmd, msgs, names, reset))
+
+    def _gather(self, phase: str):
+        """ Receive the results of all branches, of which errors are raised after all results are received """
+        results, error = [], None
+        for ib, (proc, conn) in enumerate(self._workers):
+            try:
+                res = conn.recv()
+            except EOFError:
+                res = ('error', RuntimeError("Worker process has terminated unexpectedly"), '')
+            if res[0] == 'error' and error is None:
+                error = (ib, res[1], res[2])
+            results.append(res[1] if res[0] == 'ok' else None)
+        if error is not None:
+            ib, e, tb = error
+            raise type(e)(str(e) + f"\n\t| Above error was raised in worker process of branch {ib} when calling "
+                                   f"{phase}():\n" + tb + "\t| Module details:" + self._err_str())
+        return results
+
+    def _receive(self, ib: int, out_key: str, msgs: list):
+        """ Decode the values sent by branch `ib`, and allocate blocks for large arrays which were pickled """
+        values = []
+        for i, msg in enumerate(msgs):
+            key = (out_key, i)
+            values.append(_decode(msg, self._blocks[ib].get(key)))
+            if msg[0] == 'obj' and _is_shareable(values[-1]):
+                self._block(ib, key, values[-1].nbytes)  # To be used in the next iteration
+        return values
+
+    @traced('module')
+    def response(self):
+        for ib in range(len(self.branches)):
+            self._send(ib, 'response', 'in', 'out', [s.state for s in self._inputs[ib]])
+        results = self._gather('response')
+        for ib, msgs in enumerate(results):
+            for s, v in zip(self._outputs[ib], self._receive(ib, 'out', msgs)):
+                s.state = v
+        return self
+
+    @traced('module')
+    def sensitivity(self):
+        for ib in range(len(self.branches)):
+            self._send(ib, 'sensitivity', 'dout', 'din', [s.sensitivity for s in self._outputs[ib]])
+        results = self._gather('sensitivity')
+        for ib, msgs in enumerate(results):
+            for s, ds in zip(self._inputs[ib], self._receive(ib, 'din', msgs)):
+                s.add_sensitivity(ds)
+
+    def _response(self, *args):
+        pass  # Unused
+
+    def _reset(self):
+        # The branches are reset in the workers before their next evaluation, to save a round-trip
+        self._reset_pending = [True for _ in self.branches]
+
+    def close(self):
+        """ Stop the worker processes and release the shared memory """
+        self._finalizer()
+
+    def __getstate__(self):
+        raise TypeError("A ParallelNetwork cannot be pickled, as it is bound to its worker processes")
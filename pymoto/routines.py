@@ -1,7 +1,8 @@
 import warnings
 import numpy as np
-from .utils import _parse_to_list, _concatenate_to_array
-from .core_objects import Signal, SignalSlice, Module, Network
+from .utils import _parse_to_list
+from .core_objects import Signal, SignalSlice, Module, Network, PackedSignals
+from .graph import base_signal
 from .common.mma import MMA
 from typing import List, Iterable, Union, Callable
 from scipy.sparse import issparse
@@ -50,21 +51,15 @@ def finite_difference(blk: Module, fromsig: Union[Signal, Iterable[Signal]] = No
 
     # In case a Network is passed, only the blocks connecting input and output need execution
     if isinstance(blk, Network):
-        i_first, i_last = -1, -1
-        for i, b in enumerate(blk.mods):
-            # Find the first module which requires any of the input signals
-            if i_first < 0 and _has_signal_overlap(inps, b.sig_in):
-                i_first = i
-            # Find the last module that generates any of the output signals
-            if _has_signal_overlap(outps, b.sig_out):
-                i_last = i
-        if i_first < 0:
+        if not any(_has_signal_overlap(inps, b.sig_in) for b in blk.mods):
             raise RuntimeError("Could not find any modules that use any of the provided input signals")
-        if i_last < 0:
+        if not any(_has_signal_overlap(outps, b.sig_out) for b in blk.mods):
             raise RuntimeError("Could not find any modules that use any of the provided output signals")
-        blks_pre = Network(blk.mods[:i_first])
-        blk = Network(blk.mods[i_first:i_last+1])
-        # Precompute only once for any blocks before first occurrence of <inps>
+        blk_full, blk = blk, blk.subnetwork(inputs=inps, outputs=outps)
+        # Precompute only once for any blocks that are required, but do not depend on <inps>
+        in_cone = set(id(b) for b in blk.mods)
+        mods_pre = [b for b in blk_full.subnetwork(outputs=outps).mods if id(b) not in in_cone]
+        blks_pre = Network(mods_pre, **blk_full._options(mods_pre))
         blks_pre.response()
 
     print("Inputs:")
@@ -294,6 +289,53 @@ def obtain_sensitivities(signals: Iterable[Signal]) -> List:
     return sens
 
 
+def hessian_vector_product(function: Module, variables: Union[Signal, Iterable[Signal]], response: Signal, v):
+    """ Calculates the product of the Hessian of a scalar response with a direction vector
+
+    The exact Hessian-vector product is obtained by forward-over-reverse differentiation: the direction is propagated
+    forward as tangent (:meth:`Module.tangent`), after which the sensitivities and their tangents are propagated
+    backward (:meth:`Module.sensitivity_tangent`). The response of the function must have been evaluated beforehand.
+    After the call, the ``sensitivity`` of the variables contains the gradient of the response, and the tangents of all
+    signals are cleared.
+
+    Args:
+        function: The Module or Network
+        variables: The Signals with respect to which the derivatives are calculated
+        response: The scalar response Signal
+        v: The direction, with one array for each variable
+
+    Returns:
+        List of Hessian-vector products, one for each variable
+    """
+    variables = _parse_to_list(variables)
+    v = [v] if len(variables) == 1 else _parse_to_list(v)
+    if len(v) != len(variables):
+        raise ValueError(f"Number of directions ({len(v)}) is unequal to the number of variables ({len(variables)})")
+
+    # All signals which obtain a tangent, including the intermediate signals of a network
+    signals = function._all_signals() if isinstance(function, Network) else [*function.sig_in, *function.sig_out]
+    signals = list({id(s): s for s in map(base_signal, [*variables, *signals])}.values())
+
+    function.reset()
+    try:
+        for s, vi in zip(variables, v):
+            s.tangent = vi
+        function.tangent()
+
+        response.sensitivity = 1.0
+        function.sensitivity()
+        function.sensitivity_tangent()
+    finally:
+        for s in signals:
+            s.tangent = None
+
+    hv = []
+    for s in variables:
+        hs = s.sensitivity_tangent
+        hv.append(np.zeros_like(s.state) if hs is None else hs)
+    return hv
+
+
 def minimize_oc(function, variables, objective: Signal,
                 tolx=1e-4, tolf=1e-4, maxit=100, xmin=0.0, xmax=1.0, move=0.2,
                 l1init=0, l2init=100000, l1l2tol=1e-4, maxvol=None, verbosity=2):
@@ -318,7 +360,8 @@ def minimize_oc(function, variables, objective: Signal,
 
     """
     variables = _parse_to_list(variables)
-    xval, cumlens = _concatenate_to_array([s.state for s in variables])
+    packed = PackedSignals(variables)  # The variables are views into the packed design vector
+    xval = packed.state
 
     if maxvol is None:
         maxvol = np.sum(xval)
@@ -340,8 +383,9 @@ def minimize_oc(function, variables, objective: Signal,
         # Calculate sensitivity of the objective
         function.reset()
         objective.sensitivity = 1.0
+        packed.bind_sensitivity()
         function.sensitivity()
-        dfdx, _ = _concatenate_to_array(obtain_sensitivities(variables))
+        dfdx = packed.gather_sensitivity()
         maxdfdx = max(dfdx)
         if maxdfdx > 1e-15:
             warnings.warn(f"OC only works for negative sensitivities: max(dfdx) = {maxdfdx}. Clipping positive values.")
@@ -363,8 +407,7 @@ def minimize_oc(function, variables, objective: Signal,
 
         xval = xnew
         # Set the new states
-        for i, s in enumerate(variables):
-            s.state = xnew[cumlens[i]:cumlens[i + 1]]
+        packed.state = xnew
 
 
 def minimize_mma(function, variables, responses, **kwargs):
@@ -21,6 +21,15 @@ def auto_determine_solver(A, isdiagonal=None, islowertriangular=None, isuppertri
     :param ispositivedefinite: Manual override for positive definiteness
     :return: LinearSolver which should be 'best' for the matrix
     """
+    if is_matrix_free(A):
+        # Without the matrix only an iterative solver is possible (imported here, as it depends on this module)
+        from .iterative import CG, DampedJacobi
+        if ishermitian is None:
+            ishermitian = matrix_is_hermitian(A)
+        if not ishermitian:
+            raise TypeError("Only Hermitian matrix-free operators are supported, which are solved with CG")
+        return CG(preconditioner=DampedJacobi())
+
     issparse = sps.issparse(A)  # Check if the matrix is sparse
     issquare = A.shape[0] == A.shape[1]  # Check if the matrix is square
 
@@ -113,6 +113,10 @@ class ILU(Preconditioner):
 class GeometricMultigrid(Preconditioner):
     """ Geometric multigrid preconditioner
 
+    The matrix can also be a :class:`pymoto.MatrixFreeOperator`, of which the coarse level is determined
+    element-by-element with :meth:`pymoto.MatrixFreeOperator.coarsen`. The coarse level remains matrix-free if the inner
+    level is another `GeometricMultigrid` or `CG`, and is assembled otherwise.
+
     Args:
         domain: The `DomainDefinition` used for the geometry
         A (optional): The matrix
@@ -132,7 +136,7 @@ class GeometricMultigrid(Preconditioner):
         assert cycle.lower() in self._available_cycles, f"Cycle ({cycle}) is not available. Options are {self._available_cycles}"
         self.cycle = cycle
         self.inner_level = None if inner_level is None else inner_level
-        self.smoother = DampedJacobi(w=0.5) if smoother is None else None
+        self.smoother = DampedJacobi(w=0.5) if smoother is None else smoother
         self.smooth_steps = smooth_steps
         self.R = None
         self.sub_domain = DomainDefinition(domain.nelx // 2, domain.nely // 2, domain.nelz // 2,
@@ -145,11 +149,26 @@ class GeometricMultigrid(Preconditioner):
             self.setup_interpolation(A)
         self.A = A
         self.smoother.update(A)
-        Ac = self.R.T @ A @ self.R
+        if hasattr(A, 'coarsen'):  # A matrix-free operator, which is coarsened element-by-element
+            ndof = A.shape[0] // self.domain.nnodes
+            Ac = A.coarsen(self.R, self.sub_domain.get_dofconnectivity(ndof), self._coarse_elements())
+            if not isinstance(self.inner_level, (GeometricMultigrid, CG)):
+                Ac = Ac.tocsc()  # Assemble the coarse level for a direct solver
+        else:
+            Ac = self.R.T @ A @ self.R
         if self.inner_level is None:
             self.inner_level = auto_determine_solver(Ac)
         self.inner_level.update(Ac)
 
+    def _coarse_elements(self):
+        """ The element of the coarse domain that contains each element of the fine domain """
+        eli, elj, elk = np.meshgrid(np.arange(self.domain.nelx), np.arange(self.domain.nely),
+                                    np.arange(max(self.domain.nelz, 1)), indexing='ij')
+        parent = np.empty(self.domain.nel, dtype=int)
+        parent[self.domain.get_elemnumber(eli, elj, elk).ravel()] = \
+            self.sub_domain.get_elemnumber(eli // 2, elj // 2, elk // 2).ravel()
+        return parent
+
     def setup_interpolation(self, A):
         assert A.shape[0] % self.domain.nnodes == 0
         ndof = int(A.shape[0] / self.domain.nnodes)  # Number of dofs per node
@@ -192,7 +211,7 @@ class GeometricMultigrid(Preconditioner):
         nfine = ndof * self.domain.nnodes
         ncoarse = ndof * self.sub_domain.nnodes
         self.R = sps.coo_matrix((vals, (rows, cols)), shape=(nfine, ncoarse))
-        self.R = type(A)(self.R)  # Convert to correct matrix type
+        self.R = type(A)(self.R) if sps.issparse(A) else self.R.tocsr()  # Convert to correct matrix type
 
     def solve(self, rhs, x0=None, trans='N'):
         if trans == 'N':
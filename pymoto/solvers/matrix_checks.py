@@ -1,5 +1,6 @@
 import numpy as np
 import scipy.sparse as sps
+from ..common.matrixfree import MatrixFreeOperator
 try:
     import cvxopt
     _has_cvxopt = True
@@ -12,6 +13,11 @@ def is_cvxopt_spmatrix(A):
     return isinstance(A, cvxopt.spmatrix) if _has_cvxopt else False
 
 
+def is_matrix_free(A):
+    """ Checks if the argument is a matrix-free operator """
+    return isinstance(A, MatrixFreeOperator)
+
+
 def matrix_is_complex(A):
     """ Checks if the matrix is complex """
     if is_cvxopt_spmatrix(A):
@@ -29,6 +35,9 @@ def matrix_is_diagonal(A):
             return np.allclose((A - sps.spdiags(A.diagonal(), 0, *A.shape)).data, 0.0)
     elif is_cvxopt_spmatrix(A):
         return max(abs(A.I - A.J)) == 0
+    elif is_matrix_free(A):
+        offdiag = A.element_matrix * (1 - np.eye(A.element_matrix.shape[-1]))
+        return np.allclose(offdiag, 0.0) and (A.constant is None or matrix_is_diagonal(A.constant))
     else:
         return np.allclose(A, np.diag(np.diag(A)))
 
@@ -39,6 +48,9 @@ def matrix_is_symmetric(A):
         return np.allclose((A-A.T).data, 0)
     elif is_cvxopt_spmatrix(A):
         return np.isclose(max(abs(A-A.T)), 0.0)
+    elif is_matrix_free(A):
+        return np.allclose(A.element_matrix, np.swapaxes(A.element_matrix, -1, -2)) and \
+            (A.constant is None or matrix_is_symmetric(A.constant))
     else:
         return np.allclose(A, A.T)
 
@@ -50,6 +62,10 @@ def matrix_is_hermitian(A):
             return np.allclose((A-A.T.conj()).data, 0)
         elif is_cvxopt_spmatrix(A):
             return np.isclose(max(abs(A-A.ctrans())), 0.0)
+        elif is_matrix_free(A):
+            return np.isrealobj(A.scaling) and \
+                np.allclose(A.element_matrix, np.swapaxes(A.element_matrix, -1, -2).conj()) and \
+                (A.constant is None or matrix_is_hermitian(A.constant))
         else:
             return np.allclose(A, A.T.conj())
     else:
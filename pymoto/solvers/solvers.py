@@ -1,6 +1,7 @@
 import warnings
 import numpy as np
 from .matrix_checks import matrix_is_hermitian, matrix_is_symmetric, matrix_is_complex
+from ..common.profiling import traced
 
 
 class LinearSolver:
@@ -16,6 +17,14 @@ class LinearSolver:
     defined = True
     _err_msg = ""
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Record the calls to update() and solve() of each solver in the active Tracer
+        for name in ['update', 'solve']:
+            fn = cls.__dict__.get(name)
+            if fn is not None and not getattr(fn, '__traced__', False):
+                setattr(cls, name, traced('solver')(fn))
+
     def __init__(self, A=None):
         if A is not None:
             self.update(A)
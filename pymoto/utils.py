@@ -20,18 +20,59 @@ def _parse_to_list(*args: Any):
         return [var_in]
 
 
-def _concatenate_to_array(var_list: list):
-    values = np.array([])
+def _nbytes(val: Any):
+    """ Estimates the memory (in bytes) used by the data of a value (arrays, sparse matrices, dyads, or lists) """
+    if val is None:
+        return 0
+    if isinstance(val, np.ndarray) and val.dtype != object:
+        return val.nbytes
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return sum(_nbytes(v) for v in val)
+    if hasattr(val, 'data') and hasattr(val, 'indices'):  # Compressed sparse matrix
+        return sum(_nbytes(getattr(val, a, None)) for a in ['data', 'indices', 'indptr'])
+    if hasattr(val, 'u') and hasattr(val, 'v'):  # DyadCarrier
+        return _nbytes(val.u) + _nbytes(val.v)
+    if hasattr(val, 'nbytes'):
+        return val.nbytes
+    return 0
+
+
+def _array_layout(var_list: list):
+    """ The cumulative sizes and the (at least double precision) data type of the concatenated values """
+    if any(v is None for v in var_list):
+        raise ValueError("Trying to add None to the array")
     cumulative_inds = np.zeros(len(var_list)+1, dtype=int)
+    cumulative_inds[1:] = np.cumsum([np.size(v) for v in var_list])
+    dtype = np.result_type(np.float64, *[np.asarray(v).dtype for v in var_list])
+    return cumulative_inds, dtype
+
 
+def _concatenate_to_array(var_list: list, out: np.ndarray = None):
+    cumulative_inds, dtype = _array_layout(var_list)
+    values = np.empty(cumulative_inds[-1], dtype=dtype) if out is None else out
     for i, v in enumerate(var_list):
-        if v is None:
-            raise ValueError("Trying to add None to the array")
+        values[cumulative_inds[i]:cumulative_inds[i+1]] = np.ravel(v)
+    return values, cumulative_inds
 
-        values = np.append(values, v)
-        cumulative_inds[i+1] = len(values)
 
-    return values, cumulative_inds
+def _contiguous_view(var_list: list):
+    """ A flat view of the concatenated arrays if they are consecutive views into one contiguous array, otherwise None
+
+    A single array is not returned as a view of itself, such that the result does not alias an independent array.
+    """
+    if len(var_list) < 2 or not all(isinstance(v, np.ndarray) and v.base is not None for v in var_list):
+        return None
+    base = var_list[0] if var_list[0].base is None else var_list[0].base
+    if not isinstance(base, np.ndarray) or not base.flags.c_contiguous:
+        return None
+    start = end = var_list[0].__array_interface__['data'][0]
+    for v in var_list:
+        if (v if v.base is None else v.base) is not base or v.dtype != base.dtype or not v.flags.c_contiguous or \
+                v.__array_interface__['data'][0] != end:
+            return None
+        end += v.nbytes
+    i0 = (start - base.__array_interface__['data'][0]) // base.itemsize
+    return base.reshape(-1)[i0:i0 + (end - start) // base.itemsize]
 
 
 def _split_from_array(values: np.ndarray, cumulative_inds: np.ndarray):
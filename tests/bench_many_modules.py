@@ -33,6 +33,24 @@ class TestComplex(unittest.TestCase):
         elapsed = time.perf_counter() - start
         print(f"Sensitivity -- Elapsed time: {elapsed:0.4f} seconds")
 
+        # Repeated evaluation, with and without execution plan
+        n_it = 20
+        for compiled in [False, True]:
+            if compiled:
+                fn.compile()
+            start = time.perf_counter()
+            for _ in range(n_it):
+                fn.response()
+            t_resp = (time.perf_counter() - start) / (n_it * N)
+            start = time.perf_counter()
+            for _ in range(n_it):
+                fn.reset()
+                s.sensitivity = 1.0
+                fn.sensitivity()
+            t_sens = (time.perf_counter() - start) / (n_it * N)
+            print(f"Compiled = {compiled} -- Per module: response {t_resp*1e6:0.2f} us, "
+                  f"reset + sensitivity {t_sens*1e6:0.2f} us")
+
 
 if __name__ == "__main__":
     unittest.main()
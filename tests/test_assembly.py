@@ -1,7 +1,9 @@
+import itertools
 import unittest
 import numpy as np
 import pymoto as pym
 import numpy.testing as npt
+import scipy.sparse as sps
 
 
 class TestAssembleStiffness(unittest.TestCase):
@@ -19,6 +21,113 @@ class TestAssembleStiffness(unittest.TestCase):
 
         npt.assert_allclose(A.toarray(), elmat)
 
+    def test_sparsity_pattern(self):
+        """ Check the assembly with precomputed sparsity pattern against the construction from (row, col) entries """
+        np.random.seed(0)
+        domain = pym.DomainDefinition(3, 2)
+        n = 2 * domain.nnodes
+        const = np.zeros((n, n))
+        const[[0, 4, 7], [0, 9, 7]] = [1.0, 2.0, 3.0]
+        bcs = [np.array([0, 1, 5]), np.array([4, n - 2, n - 1])]  # The latter gives empty positions at the end
+        for matrix_type, bc in itertools.product([sps.csc_matrix, sps.csr_matrix], bcs):
+            for add_constant in [None, sps.csc_matrix(const)]:
+                for chunk_size in [pym.AssembleGeneral.chunk_size, 40]:  # Multiple chunks of elements and entries
+                    s_x = pym.Signal('x', state=np.random.rand(domain.nel))
+                    m = pym.AssembleStiffness(s_x, domain=domain, bc=bc, matrix_type=matrix_type,
+                                              add_constant=add_constant)
+                    m.chunk_size = chunk_size
+                    m._sparsity_pattern()
+                    m.response()
+                    A = m.sig_out[0].state
+                    self.assertIsInstance(A, matrix_type)
+
+                    # Reference constructed from the (row, col) entries
+                    m_ref = pym.AssembleStiffness(s_x, domain=domain, bc=bc, matrix_type=sps.coo_matrix,
+                                                  add_constant=add_constant)
+                    A_ref = m_ref.response().sig_out[0].state.toarray()
+                    npt.assert_allclose(A.toarray(), A_ref)
+
+                    # Tangent and batch use the same pattern
+                    dx = np.random.rand(domain.nel)
+                    npt.assert_allclose(m._tangent(dx).toarray(), (m._response(s_x.state + dx) - A).toarray(),
+                                        atol=1e-12)
+                    A_batch = m._response(np.stack([s_x.state, dx]))
+                    npt.assert_allclose(A_batch[0].toarray(), A_ref)
+
+    def test_assembly_in_place(self):
+        domain = pym.DomainDefinition(3, 2)
+        s_x, s_K, s_u = pym.Signal('x', state=np.ones(domain.nel)), pym.Signal('K'), pym.Signal('u')
+        f = np.ones(2 * domain.nnodes)
+        bc = np.arange(2 * (domain.nely + 1))
+        netw = pym.Network(pym.AssembleStiffness(s_x, s_K, domain=domain, bc=bc),
+                           pym.LinSolve([s_K, pym.Signal('f', f)], s_u), reuse_outputs=True)
+        netw.response()
+        K0 = s_K.state
+        u0 = s_u.state.copy()
+        s_x.state = 2 * np.ones(domain.nel)
+        netw.response()
+        self.assertIs(s_K.state, K0)  # The data of the same matrix is overwritten
+        free = np.setdiff1d(np.arange(len(f)), bc)
+        npt.assert_allclose(s_u.state[free], u0[free] / 2)
+
+        # Changing the structure of a matrix in-place does not affect the next matrices
+        nnz = K0.nnz
+        K0.data[:] = 0
+        K0.eliminate_zeros()
+        s_x.state = 2 * np.ones(domain.nel)
+        netw.response()
+        self.assertIsNot(s_K.state, K0)
+        self.assertEqual(s_K.state.nnz, nnz)
+        npt.assert_allclose(s_u.state[free], u0[free] / 2)
+        K_tan = netw.mods[0]._tangent(np.ones(domain.nel))
+        K_tan.data[:] = 0
+        K_tan.eliminate_zeros()
+        self.assertEqual(netw.mods[0]._tangent(np.ones(domain.nel)).nnz, nnz)
+
+    def test_dense_sensitivity(self):
+        """ The sensitivity for a dense matrix equals the one of the same matrix as a dyad """
+        np.random.seed(0)
+        domain = pym.DomainDefinition(3, 2, 2)
+        bc = np.array([0, 1, 5])
+        n = 3 * domain.nnodes
+        u, v = np.random.rand(n), np.random.rand(n)
+        s_x = pym.Signal('x', state=np.random.rand(domain.nel))
+        m = pym.AssembleStiffness(s_x, domain=domain, bc=bc)
+        m.response()
+        dx_ref = m._sensitivity(pym.DyadCarrier(u, v))
+        for chunk_size in [pym.AssembleGeneral.chunk_size, 100]:  # One or multiple chunks of elements
+            m.chunk_size = chunk_size
+            npt.assert_allclose(m._sensitivity(np.outer(u, v)), dx_ref)
+
+    def test_matrix_free(self):
+        """ Compare the matrix-free operator with the assembled matrix """
+        np.random.seed(0)
+        domain = pym.DomainDefinition(3, 2)
+        n = 2 * domain.nnodes
+        bc = np.array([0, 1, 5])
+        const = sps.csc_matrix((np.array([1.0, 2.0]), (np.array([4, 9]), np.array([4, 9]))), shape=(n, n))
+        s_x = pym.Signal('x', state=np.random.rand(domain.nel))
+        A = pym.AssembleStiffness(s_x, domain=domain, bc=bc, add_constant=const).response().sig_out[0].state
+        m = pym.AssembleStiffness(s_x, domain=domain, bc=bc, add_constant=const, matrix_type=pym.MatrixFreeOperator)
+        op = m.response().sig_out[0].state
+        self.assertIsInstance(op, pym.MatrixFreeOperator)
+        self.assertEqual(op.shape, A.shape)
+
+        u = np.random.rand(n, 3)
+        npt.assert_allclose(op @ u, A @ u)
+        npt.assert_allclose(op @ u[:, 0], A @ u[:, 0])
+        npt.assert_allclose(op.T @ u, A.T @ u)
+        npt.assert_allclose(u.T @ op, u.T @ A)
+        npt.assert_allclose(op.diagonal(), A.diagonal())
+        npt.assert_allclose(op.toarray(), A.toarray())
+
+        # The tangent excludes the constant terms, and the sensitivity is contracted with the element matrix
+        dx = np.random.rand(domain.nel)
+        npt.assert_allclose(m._tangent(dx).toarray(), (m._response(s_x.state + dx).toarray() - A.toarray()),
+                            atol=1e-12)
+        dA = pym.DyadCarrier(u[:, 0], u[:, 1])
+        npt.assert_allclose(m._sensitivity(dA.copy()), pym.AssembleStiffness(s_x, domain=domain, bc=bc)._sensitivity(dA))
+
     def test_FEA_pure_tensile_2d_one_element(self):
         Lx, Ly, Lz = 0.1, 0.2, 0.3
         domain = pym.DomainDefinition(1, 1, unitx=Lx, unity=Ly, unitz=Lz)
@@ -1,3 +1,4 @@
+import sys
 import unittest
 import pymoto as pym
 import numpy as np
@@ -310,6 +311,57 @@ class TestSignalSlice(unittest.TestCase):
         assert np.allclose(sx.sensitivity[np.arange(9, 11)], 0)
         assert sx[11].sensitivity == 6.0
 
+    def test_inplace_sensitivity(self):
+        sx = pym.Signal('x', np.zeros(6))
+
+        # Basic slices give views, of which the sensitivities are added in-place
+        s_basic = sx[1:4]
+        self.assertTrue(np.shares_memory(s_basic.state, sx.state))
+        s_basic.add_sensitivity(np.array([1.0, 2.0, 3.0]))
+        sens = sx.sensitivity
+        s_basic.add_sensitivity(np.array([1.0, 1.0, 1.0]))
+        sx[5].add_sensitivity(4.0)
+        self.assertIs(sx.sensitivity, sens)
+        np.testing.assert_allclose(sx.sensitivity, [0.0, 2.0, 3.0, 4.0, 0.0, 4.0])
+
+        # Repeated indices are accumulated
+        sx[[0, 0, 4]].add_sensitivity(np.array([1.0, 2.0, 3.0]))
+        sx[np.array([False, False, False, False, True, False])].add_sensitivity(np.array([1.0]))
+        self.assertIs(sx.sensitivity, sens)
+        np.testing.assert_allclose(sx.sensitivity, [3.0, 2.0, 3.0, 4.0, 4.0, 4.0])
+
+
+class TestPackedSignals(unittest.TestCase):
+    def test_state_and_sensitivity(self):
+        sx = pym.Signal('x', np.array([[1.0, 2.0], [3.0, 4.0]]))
+        sy = pym.Signal('y', 5.0)
+        sz = pym.Signal('z', np.array([6.0, 7.0]))
+        packed = pym.PackedSignals([sx, sy, sz])
+        np.testing.assert_allclose(packed.state, np.arange(1.0, 8.0))
+
+        # The states are views of the packed vector, with their original shape
+        xnew = np.arange(11.0, 18.0)
+        packed.state = xnew
+        self.assertEqual(sx.state.shape, (2, 2))
+        self.assertTrue(np.shares_memory(sx.state, xnew))
+        self.assertEqual(sy.state, 15.0)
+        self.assertIs(packed.state, xnew)
+
+        # Replaced states are gathered again
+        sz.state = np.array([0.0, 1.0])
+        np.testing.assert_allclose(packed.state[-2:], [0.0, 1.0])
+
+        # Sensitivities are accumulated in the packed vector
+        out = np.ones(7)
+        packed.bind_sensitivity(out)
+        sx.add_sensitivity(np.array([[1.0, 2.0], [3.0, 4.0]]))
+        sy.add_sensitivity(5.0)
+        self.assertIs(packed.gather_sensitivity(), out)
+        np.testing.assert_allclose(out, [1.0, 2.0, 3.0, 4.0, 5.0, 0.0, 0.0])
+
+        sx.reset()
+        np.testing.assert_allclose(packed.gather_sensitivity(), [0.0, 0.0, 0.0, 0.0, 5.0, 0.0, 0.0])
+
 
 class TestModule(unittest.TestCase):
     def test_initialize1(self):
@@ -377,6 +429,24 @@ class TestModule(unittest.TestCase):
         # bl.sensitivity() # Warns about non-existent sensitivity function
         self.assertIsNone(a.sensitivity, msg="Default sensitivity behavior is None")
 
+    def test_create_cached(self):
+        a, b = pym.Signal('a', 1.0), pym.Signal('b')
+        self.assertIsInstance(pym.Module.create('mathgeneral', a, b, expression='a'), pym.MathGeneral)
+
+        # A subclass defined after the registry was used is found
+        class LateFooMod(pym.Module):
+            def _response(self, a_in):
+                return a_in * 3
+
+        self.assertIs(pym.Module.all_subclasses()['latefoomod'], LateFooMod)
+        self.assertIsInstance(pym.Module.create('LateFooMod', a, b), LateFooMod)
+
+        # And is removed from the registry once it is deleted
+        del LateFooMod
+        import gc
+        gc.collect()
+        self.assertNotIn('latefoomod', pym.Module.all_subclasses())
+
     def test_create_fail(self):
         self.assertRaises(ValueError, pym.Module.create, 'foomod1234', msg="Try to create a non-existing module")
 
@@ -511,6 +581,29 @@ class TestModule(unittest.TestCase):
         self.assertRaises(TypeError, m.response, msg="Number of out-signals should match number of returns in response")
         # m.response()
 
+    def test_error_location(self):
+        class TwoInputs(pym.Module):
+            def _response(self, a, b):
+                return a * b
+
+        sa, sb = pym.Signal('a', 2.5), pym.Signal('b')
+        line = sys._getframe().f_lineno + 2
+        with self.assertRaises(TypeError) as cm:
+            TwoInputs(sa, sb)  # Only one input
+        msg = str(cm.exception)
+        self.assertIn("Not enough arguments (1) for TwoInputs._response(a, b)", msg)
+        self.assertIn(f"Used in File \"{__file__}\", line {line}, in test_error_location", msg)
+
+        # Second construction uses cached signature information, but reports the same error
+        with self.assertRaises(TypeError) as cm:
+            TwoInputs(sa, sb)
+        self.assertIn("Not enough arguments (1) for TwoInputs._response(a, b)", str(cm.exception))
+
+        line = sys._getframe().f_lineno + 1
+        sc = pym.Signal('c')
+        self.assertIn(f"File \"{__file__}\", line {line}, in test_error_location", sc._err_str())
+        self.assertIn(f"line {line + 2}, in test_error_location", sc[0]._err_str())
+
     def test_sensitivity_and_reset_errors(self):
         class NoSensitivity(pym.Module):
             def _response(self, a, b):
@@ -654,6 +747,796 @@ class TestNetwork(unittest.TestCase):
         # pym.Network({'type': 'PrepErrorModule','sig_in': [], 'sig_out': []})
         self.assertRaises(RuntimeError, pym.Network, {'type': 'PrepErrorModule', 'sig_in': [], 'sig_out': []})
 
+    def test_append_signals(self):
+        x1, x2 = pym.Signal('x1', 2.0), pym.Signal('x2', 3.0)
+        y1, y2, z = pym.Signal('y1'), pym.Signal('y2'), pym.Signal('z')
+        netw = pym.Network()
+        m3 = pym.MathGeneral([y1, y2], z, expression="y1*y2")
+        netw.append(m3)
+        self.assertEqual(set(netw.sig_in), {y1, y2})
+        self.assertEqual(netw.sig_out, [z])
+
+        # Signals that were external inputs become internal
+        m1 = pym.MathGeneral(x1, y1, expression="x1*2.0")
+        m2 = pym.MathGeneral([x1, x2], y2, expression="x1 + x2")
+        self.assertIs(netw.append(m1, m2), y2)
+        self.assertEqual(netw.sig_in, [x1, x2])
+        self.assertEqual(netw.sig_out, [z, y1, y2])
+        self.assertIs(netw.producer(y1), m1)
+        self.assertIsNone(netw.producer(x1))
+        self.assertEqual(netw.consumers(x1), [m1, m2])
+
+        netw2 = pym.Network(m3, m1, m2)
+        self.assertEqual(set(netw2.sig_in), {x1, x2})
+        self.assertEqual(set(netw2.sig_out), {y1, y2, z})
+
+    def test_threaded_network(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        branches = []
+        for i in range(4):
+            y = pym.Signal(f'y{i}')
+            branches.append(pym.MathGeneral(x, y, expression=f"{i+1}*x^2"))
+        ys = [m.sig_out[0] for m in branches]
+        z = pym.Signal('z')
+        agg = pym.EinSum(ys, z, expression='i,i,i,i->')
+
+        netw_seq = pym.Network(*branches, agg)
+        netw_seq.response()
+        z_ref = z.state.copy()
+        z.sensitivity = 1.0
+        netw_seq.sensitivity()
+        dx_ref = x.sensitivity.copy()
+        netw_seq.reset()
+
+        netw = pym.Network(*branches, agg, n_threads=4)
+        netw.response()
+        self.assertEqual(z.state, z_ref)
+        z.sensitivity = 1.0
+        netw.sensitivity()
+        np.testing.assert_allclose(x.sensitivity, dx_ref)
+        netw.reset()
+        self.assertIsNone(x.sensitivity)
+        self.assertTrue(all(y.sensitivity is None for y in ys))
+
+    def test_threaded_network_concurrency(self):
+        import threading
+        barrier = threading.Barrier(2, timeout=10)
+
+        class WaitModule(pym.Module):
+            def _response(self, x):
+                barrier.wait()  # Blocks until both branches are running
+                return 2*x
+
+            def _sensitivity(self, dy):
+                barrier.wait()
+                return 2*dy
+
+        x1, x2, y1, y2 = pym.Signal('x1', 1.0), pym.Signal('x2', 2.0), pym.Signal('y1'), pym.Signal('y2')
+        netw = pym.Network(WaitModule(x1, y1), WaitModule(x2, y2), n_threads=2)
+        netw.response()
+        self.assertEqual(y1.state, 2.0)
+        self.assertEqual(y2.state, 4.0)
+        y1.sensitivity, y2.sensitivity = 1.0, 1.0
+        netw.sensitivity()
+        self.assertEqual(x1.sensitivity, 2.0)
+        self.assertEqual(x2.sensitivity, 2.0)
+
+    def test_threaded_network_error(self):
+        class ErrorModule(pym.Module):
+            def _response(self, x):
+                raise RuntimeError("Response error")
+
+        x = pym.Signal('x', 2.0)
+        y1, y2 = pym.Signal('y1'), pym.Signal('y2')
+        netw = pym.Network(pym.MathGeneral(x, y1, expression="2*x"), ErrorModule(x, y2), n_threads=2)
+        self.assertRaises(RuntimeError, netw.response)
+        self.assertEqual(netw.copy().n_threads, 2)
+
+    def test_threaded_network_close(self):
+        x, y1, y2 = pym.Signal('x', 2.0), pym.Signal('y1'), pym.Signal('y2')
+        with pym.Network(pym.MathGeneral(x, y1, expression="2*x"), pym.MathGeneral(x, y2, expression="3*x"),
+                         n_threads=2) as netw:
+            netw.response()
+            pool = netw._thread_pool()
+            self.assertEqual(y2.state, 6.0)
+        self.assertIsNone(netw._executor)
+        self.assertRaises(RuntimeError, pool.submit, print)  # The pool has been shut down
+
+        # The pool is started again when needed
+        netw.response()
+        self.assertIsNotNone(netw._executor)
+        netw.close()
+
+    def test_sensitivity_multi(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        s = pym.Signal('s', 2.0)
+        y, z1, z2 = pym.Signal('y'), pym.Signal('z1'), pym.Signal('z2')
+        netw = pym.Network(pym.MathGeneral([x, s], y, expression="s*x^2"),
+                           pym.EinSum([y[0:2], x[1:3]], z1, expression="i,i->"),
+                           pym.MathGeneral([y[2], s], z2, expression="inp0*s"))
+        netw.response()
+
+        ref = []
+        for z in [z1, z2]:
+            z.sensitivity = 1.0
+            netw.sensitivity()
+            ref.append((x.sensitivity.copy(), s.sensitivity))
+            netw.reset()
+
+        z1.sensitivity_multi = np.array([1.0, 0.0])
+        z2.sensitivity_multi = np.array([0.0, 1.0])
+        netw.sensitivity_multi()
+        for i in range(2):
+            np.testing.assert_allclose(x.sensitivity_multi[i], ref[i][0])
+            np.testing.assert_allclose(s.sensitivity_multi[i], ref[i][1])
+        netw.reset()
+        self.assertIsNone(x.sensitivity_multi)
+
+    def test_tangent(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        s = pym.Signal('s', 2.0)
+        y, z1, z2 = pym.Signal('y'), pym.Signal('z1'), pym.Signal('z2')
+        netw = pym.Network(pym.MathGeneral([x, s], y, expression="s*x^2"),
+                           pym.EinSum([y[0:2], x[1:3]], z1, expression="i,i->"),
+                           pym.MathGeneral([y[2], s], z2, expression="inp0*s"))
+        netw.response()
+
+        # Directional derivatives equal the projection of the gradients
+        dx = np.array([0.3, -1.2, 0.7])
+        x.tangent = dx
+        netw.tangent()
+        for z in [z1, z2]:
+            z.sensitivity = 1.0
+            netw.sensitivity()
+            self.assertAlmostEqual(z.tangent, np.dot(x.sensitivity, dx))
+            netw.reset()
+
+        # Only perturb the scalar input
+        x.tangent = None
+        s.tangent = 1.0
+        netw.tangent()
+        self.assertAlmostEqual(z1.tangent, 1*2 + 4*3)
+        self.assertAlmostEqual(z2.tangent, 9*2 + 18)
+
+    def test_tangent_fem(self):
+        N = 4
+        dom = pym.DomainDefinition(N, N)
+        sx = pym.Signal('x', np.linspace(0.2, 1.0, dom.nel))
+        bc = np.concatenate((dom.get_nodenumber(0, np.arange(0, N + 1)) * 2,
+                             dom.get_nodenumber(0, np.arange(0, N + 1)) * 2 + 1))
+        f = np.zeros(dom.nnodes * 2)
+        f[dom.get_nodenumber(N, N) * 2 + 1] = 1.0
+        sf = pym.Signal('f', f)
+
+        mods = [pym.DensityFilter(sx, pym.Signal('xf'), domain=dom, radius=1.5),
+                pym.FilterConv(sx, pym.Signal('xc'), domain=dom, radius=1.5)]
+        mods.append(pym.MathGeneral([mods[0].sig_out[0], mods[1].sig_out[0]], pym.Signal('xs'),
+                                    expression="1e-3 + inp0^3*inp1"))
+        mods.append(pym.AssembleStiffness(mods[-1].sig_out[0], pym.Signal('K'), dom, bc=bc))
+        mods.append(pym.LinSolve([mods[-1].sig_out[0], sf], pym.Signal('u')))
+        mods.append(pym.EinSum([mods[-1].sig_out[0], sf], pym.Signal('c'), expression='i,i->'))
+        mods.append(pym.PNorm(mods[2].sig_out[0], pym.Signal('xmax'), p=4))
+        mods.append(pym.Scaling(mods[-1].sig_out[0], pym.Signal('g'), scaling=10.0, maxval=0.5))
+        mods.append(pym.ConcatSignal([mods[5].sig_out[0], mods[-1].sig_out[0]], pym.Signal('resp')))
+        sresp = mods[-1].sig_out[0]
+
+        dx = np.cos(np.arange(dom.nel))
+        for recompute in [None, 'auto']:
+            with self.subTest(recompute=recompute):
+                netw = pym.Network(*mods, recompute=recompute)
+                netw.response()
+                sx.tangent = dx
+                netw.tangent()
+                dresp = sresp.tangent.copy()
+
+                for i in range(2):
+                    netw.reset()
+                    sresp.sensitivity = np.eye(2)[i]
+                    netw.sensitivity()
+                    self.assertAlmostEqual(dresp[i], np.dot(sx.sensitivity, dx))
+                netw.reset()
+
+    def test_hessian_vector_product(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        s = pym.Signal('s', 2.0)
+        y, z = pym.Signal('y'), pym.Signal('z')
+        netw = pym.Network(pym.MathGeneral([x, s], y, expression="s*x^2"),
+                           pym.EinSum([y, x], z, expression="i,i->"))  # z = s*sum(x^3)
+        netw.response()
+
+        vx, vs = np.array([0.3, -1.2, 0.7]), 0.5
+        hx, hs = pym.hessian_vector_product(netw, [x, s], z, [vx, vs])
+        xs, ss = x.state, s.state
+        np.testing.assert_allclose(hx, 6*ss*xs*vx + 3*xs**2*vs)
+        self.assertAlmostEqual(hs, np.dot(3*xs**2, vx))
+        np.testing.assert_allclose(x.sensitivity, 3*ss*xs**2)
+        self.assertTrue(all(sig.tangent is None for sig in [x, s, y, z]))
+
+    def test_hessian_vector_product_fem(self):
+        N = 4
+        dom = pym.DomainDefinition(N, N)
+        sx = pym.Signal('x', np.linspace(0.2, 1.0, dom.nel))
+        bc = np.concatenate((dom.get_nodenumber(0, np.arange(0, N + 1)) * 2,
+                             dom.get_nodenumber(0, np.arange(0, N + 1)) * 2 + 1))
+        f = np.zeros(dom.nnodes * 2)
+        f[dom.get_nodenumber(N, N) * 2 + 1] = 1.0
+        sf = pym.Signal('f', f)
+
+        netw = pym.Network()
+        sxf = netw.append(pym.DensityFilter(sx, pym.Signal('xf'), domain=dom, radius=1.5))
+        sxs = netw.append(pym.MathGeneral(sxf, pym.Signal('xs'), expression="1e-3 + xf^3"))
+        sK = netw.append(pym.AssembleStiffness(sxs, pym.Signal('K'), dom, bc=bc))
+        su = netw.append(pym.LinSolve([sK, sf], pym.Signal('u')))
+        sc = netw.append(pym.EinSum([su, sf], pym.Signal('c'), expression='i,i->'))
+
+        def gradient(x):
+            sx.state = x
+            netw.response()
+            netw.reset()
+            sc.sensitivity = 1.0
+            netw.sensitivity()
+            return sx.sensitivity.copy()
+
+        x0 = sx.state.copy()
+        v = np.cos(np.arange(dom.nel))
+        g0 = gradient(x0)
+        hv = pym.hessian_vector_product(netw, sx, sc, v)[0]
+        np.testing.assert_allclose(sx.sensitivity, g0)
+
+        # Central difference of the gradient
+        h = 1e-5
+        hv_fd = (gradient(x0 + h*v) - gradient(x0 - h*v)) / (2*h)
+        np.testing.assert_allclose(hv, hv_fd, rtol=1e-5, atol=1e-8*np.max(np.abs(hv)))
+
+    def test_fuse(self):
+        x = pym.Signal('x', np.linspace(0.1, 0.9, 20))
+        beta = pym.Signal('b', 4.0)
+        xp, xs, xv, v, g = pym.Signal('xp'), pym.Signal('xs'), pym.Signal('xv'), pym.Signal('v'), pym.Signal('g')
+        mods = [pym.MathGeneral([x, beta], xp, expression="(tanh(b/2) + tanh(b*(x - 0.5)))/(2*tanh(b/2))"),
+                pym.MathGeneral(xp, xs, expression="1e-3 + (1 - 1e-3)*xp^3"),
+                pym.MathGeneral([xp, x], xv, expression="xp*x"),
+                pym.EinSum(xv, v, expression="i->"),
+                pym.Scaling(v, g, maxval=5.0, scaling=10.0)]
+
+        def evaluate(netw):
+            netw.response()
+            netw.reset()
+            xs.sensitivity = np.ones_like(xs.state)
+            g.sensitivity = 1.0
+            netw.sensitivity()
+            return xs.state.copy(), g.state, x.sensitivity.copy(), beta.sensitivity
+
+        netw = pym.Network(*mods)
+        evaluate(netw)
+
+        # Signal xp is used by two modules, thus it cannot be fused
+        self.assertEqual(netw.fuse(), 0)
+
+        # Without the second user of xp, the chain is fused into one module
+        netw = pym.Network(*mods[:2], pym.EinSum(xs, v, expression="i->"), mods[-1])
+        ref = evaluate(netw)
+        self.assertEqual(netw.fuse(keep=v), 1)
+        self.assertEqual(len(netw), 3)
+        self.assertEqual(netw.producer(xs).sig_in, [x, beta])
+        self.assertIsNone(netw.producer(xp))
+        self.assertEqual(netw.sig_in, [x, beta])
+        res = evaluate(netw)
+        np.testing.assert_allclose(res[0], ref[0])
+        self.assertAlmostEqual(res[1], ref[1])
+        np.testing.assert_allclose(res[2], ref[2])
+        self.assertAlmostEqual(res[3], ref[3])
+
+        # Scaling is fused as well
+        netw = pym.Network(pym.MathGeneral(v, xp, expression="v^2"), pym.Scaling(xp, xs, maxval=5.0, scaling=3.0))
+        v.state = 2.0
+        netw.response()
+        self.assertEqual(netw.fuse(), 1)
+        netw.response()
+        self.assertAlmostEqual(xs.state, 3.0*(4.0/5.0 - 1))
+
+        # Modules which are not listed in the order of evaluation
+        y1, y2, y3 = pym.Signal('y1'), pym.Signal('y2'), pym.Signal('y3')
+        m1 = pym.MathGeneral(x, y1, expression="2*inp0")
+        m2 = pym.MathGeneral(y1, y2, expression="inp0 + 1")
+        m3 = pym.MathGeneral(y2, y3, expression="inp0^2")
+        m4 = pym.EinSum(y3, v, expression="i->")
+        netw = pym.Network(m3, m4, m1, m2)
+        self.assertEqual(netw.fuse(), 2)
+        self.assertEqual(len(netw), 2)
+        self.assertIs(netw.mods[1], m4)
+        fused = netw.producer(y3)
+        self.assertEqual(fused.sig_in, [x])
+        fused.response()
+        np.testing.assert_allclose(y3.state, (2*x.state + 1)**2)
+
+    def test_output_cone(self):
+        class CountModule(pym.Module):
+            def _prepare(self):
+                self.n_resp, self.n_sens = 0, 0
+
+            def _response(self, *args):
+                self.n_resp += 1
+                if len(self.sig_out) > 0:
+                    return 2*sum(args)
+
+            def _sensitivity(self, *args):
+                self.n_sens += 1
+                return [2*args[0] for _ in self.sig_in]
+
+        x1, x2 = pym.Signal('x1', 1.0), pym.Signal('x2', 2.0)
+        y1, y2, z1, z2 = pym.Signal('y1'), pym.Signal('y2'), pym.Signal('z1'), pym.Signal('z2')
+        m1 = CountModule(x1, y1)
+        m2 = CountModule(x2, y2)
+        m3 = CountModule([y1, y2], z1)
+        m4 = CountModule(y2, z2)
+        m_plot = CountModule(z2, [])  # Module without outputs, e.g. plotting
+        netw = pym.Network(m1, m2, m3, m4, m_plot)
+
+        self.assertEqual(netw.unused_modules(z1), [m4, m_plot])
+        self.assertEqual(netw.unused_modules([z1, z2]), [m_plot])
+        self.assertEqual(netw.subnetwork(inputs=x1, outputs=z1).mods, [m1, m3])
+        self.assertEqual(netw.subnetwork(inputs=x2).mods, [m2, m3, m4, m_plot])
+
+        netw.response(outputs=z1)
+        self.assertEqual([m.n_resp for m in netw], [1, 1, 1, 0, 0])
+        self.assertEqual(z1.state, 12.0)
+        netw.response()
+        self.assertEqual([m.n_resp for m in netw], [2, 2, 2, 1, 1])
+
+        z1.sensitivity = 1.0
+        netw.sensitivity(seeds=z1, wrt=x1)
+        self.assertEqual([m.n_sens for m in netw], [1, 0, 1, 0, 0])
+        self.assertEqual(x1.sensitivity, 4.0)
+        self.assertIsNone(x2.sensitivity)
+        netw.reset()
+
+        z1.sensitivity = 1.0
+        netw.sensitivity(seeds=z1)
+        self.assertEqual([m.n_sens for m in netw], [2, 1, 2, 0, 0])
+        self.assertEqual(x2.sensitivity, 4.0)
+
+    def test_compiled_network(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        s = pym.Signal('s', 2.0)
+        y, z1, z2 = pym.Signal('y'), pym.Signal('z1'), pym.Signal('z2')
+        netw = pym.Network(pym.MathGeneral([x, s], y, expression="s*x^2"),
+                           pym.Network(pym.EinSum([y[0:2], x[1:3]], z1, expression="i,i->")))
+        netw.response()
+        z1.sensitivity = 1.0
+        netw.sensitivity()
+        ref = (z1.state, x.sensitivity.copy(), s.sensitivity)
+        netw.reset()
+
+        self.assertIs(netw.compile(), netw)
+        self.assertTrue(netw.mods[1].compiled)
+        netw.response()
+        z1.sensitivity = 1.0
+        netw.sensitivity()
+        self.assertEqual(z1.state, ref[0])
+        np.testing.assert_allclose(x.sensitivity, ref[1])
+        self.assertEqual(s.sensitivity, ref[2])
+        netw.reset()
+
+        # The plan is updated when appending modules
+        netw.append(pym.MathGeneral([y[2], s], z2, expression="inp0*s"))
+        netw.response()
+        self.assertEqual(z2.state, 36.0)
+
+        # Errors are reported for the failing module
+        netw.append(pym.EinSum([x, z2], pym.Signal('z3'), expression="i,j->ij"))
+        with self.assertRaises(ValueError) as cm:
+            netw.response()
+        self.assertIn("Above error was raised when calling response()", str(cm.exception))
+        self.assertIn("Module 'EinSum'( Inputs: x, z2 ) --> Outputs: z3", str(cm.exception))
+
+    def test_compiled_network_direct(self):
+        class ResetModule(pym.Module):
+            n_reset = 0
+
+            def _response(self, x):
+                return 2*x
+
+            def _sensitivity(self, dy):
+                return 2*dy
+
+            def _reset(self):
+                self.n_reset += 1
+
+        # Modules with a single input and output signal, of which the scalar sensitivities are accumulated
+        a, b, c, d = pym.Signal('a', 1.5), pym.Signal('b'), pym.Signal('c'), pym.Signal('d')
+        m1, m3 = ResetModule(a, b), ResetModule(a, d)
+        netw = pym.Network(m1, pym.MathGeneral(b, c, expression="b^2"), m3).compile()
+        for _ in range(2):
+            netw.response()
+            self.assertEqual((b.state, c.state, d.state), (3.0, 9.0, 3.0))
+            c.sensitivity, d.sensitivity = 1.0, 1.0
+            netw.sensitivity()
+            self.assertEqual(a.sensitivity, 14.0)
+            netw.reset()
+            self.assertTrue(all(sig.sensitivity is None for sig in [a, b, c, d]))
+
+        # Only the modules with an internal state are reset, each once per reset
+        self.assertEqual((m1.n_reset, m3.n_reset), (2, 2))
+
+        # Identical scalars do not count as a change
+        version = b.version
+        netw.response()
+        self.assertEqual(b.version, version)
+
+    def test_reset_recycle_buffers(self):
+        class CountSignal(pym.Signal):
+            n_reset = 0
+
+            def reset(self, *args, **kwargs):
+                self.n_reset += 1
+                return super().reset(*args, **kwargs)
+
+        x = CountSignal('x', np.array([1.0, 2.0, 3.0]))
+        y, z = CountSignal('y'), CountSignal('z')
+        netw = pym.Network(pym.MathGeneral(x, y, expression="x^2"),
+                           pym.MathGeneral([x[1:3], y[1:3]], z, expression="inp0*inp1"),
+                           recycle_buffers=True)
+        netw.response()
+        z.sensitivity = np.ones(2)
+        netw.sensitivity()
+        sens = x.sensitivity
+        np.testing.assert_allclose(sens, [0.0, 2*2**2 + 2**2, 2*3**2 + 3**2])
+
+        # Each signal is reset once, and the buffer of the sensitivity is re-used
+        netw.reset()
+        self.assertEqual((x.n_reset, y.n_reset, z.n_reset), (1, 1, 1))
+        self.assertIsNone(x.sensitivity)
+        z.sensitivity = 2*np.ones(2)
+        netw.sensitivity()
+        self.assertIs(x.sensitivity, sens)
+        np.testing.assert_allclose(x.sensitivity, [0.0, 24.0, 54.0])
+
+    def test_reset_slice(self):
+        """ Only the part of a signal which is used in the network is reset """
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]), sensitivity=np.ones(3))
+        y = pym.Signal('y')
+        netw = pym.Network(pym.MathGeneral(x[0:2], y, expression="inp0^2"), recycle_buffers=True)
+        netw.response()
+        netw.reset()
+        np.testing.assert_allclose(x.sensitivity, [0.0, 0.0, 1.0])
+
+    def test_reuse_outputs(self):
+        x = pym.Signal('x', np.array([1.0, 2.0, 3.0]))
+        y, z, c = pym.Signal('y'), pym.Signal('z'), pym.Signal('c')
+        netw = pym.Network(pym.EinSum([x, x], y, expression="i,i->i"),
+                           pym.ConcatSignal([y, x], z),
+                           pym.EinSum([z, z], c, expression="i,j->ij"),
+                           reuse_outputs=True)
+        netw.response()
+        y0, z0, c0 = y.state, z.state, c.state
+
+        # The intermediate signals are overwritten in-place, the outputs of the network are not
+        x.state = np.array([2.0, 3.0, 4.0])
+        netw.response()
+        self.assertIs(y.state, y0)
+        self.assertIs(z.state, z0)
+        self.assertIsNot(c.state, c0)
+        np.testing.assert_allclose(z.state, [4.0, 9.0, 16.0, 2.0, 3.0, 4.0])
+        np.testing.assert_allclose(c.state, np.outer(z.state, z.state))
+
+        # An array which is set externally is never overwritten
+        ext = np.array([1.0, 1.0, 1.0])
+        y.state = ext
+        netw.response()
+        self.assertIsNot(y.state, ext)
+        np.testing.assert_allclose(ext, 1.0)
+
+        # Turning the option off restores the default behavior
+        netw.reuse_outputs = False
+        netw.response()
+        self.assertIsNot(z.state, z0)
+
+        # A module which is shared with another network does not keep the setting
+        netw.reuse_outputs = True
+        netw.response()
+        z1 = z.state
+        pym.Network(netw.mods[1]).response()
+        self.assertIsNot(z.state, z1)
+
+    def test_async_network(self):
+        import asyncio
+        import threading
+        import time
+
+        class Slow(pym.Module):
+            def _prepare(self, delay=0.0):
+                self.delay, self.started = delay, threading.Event()
+
+            def _response(self, x):
+                self.started.set()
+                time.sleep(self.delay)
+                return 2*x
+
+            def _sensitivity(self, dy):
+                return 2*dy
+
+        def build(delay=0.0):
+            x = pym.Signal('x', 1.0)
+            ys = [pym.Signal(f'y{i}') for i in range(3)]
+            z = pym.Signal('z')
+            mods = [Slow(x, ys[0], delay=delay), Slow(x, ys[1], delay=delay), Slow(ys[0], ys[2], delay=delay),
+                    pym.MathGeneral([ys[1], ys[2]], z, expression="inp0*inp1")]
+            return pym.Network(*mods, n_threads=2), x, z
+
+        async def evaluate(netw, z):
+            await netw.response_async()
+            z.sensitivity = 1.0
+            await netw.sensitivity_async()
+
+        # Multiple networks are evaluated concurrently in the same event loop
+        (n1, x1, z1), (n2, x2, z2) = build(), build()
+        x2.state = 2.0
+
+        async def main():
+            await asyncio.gather(evaluate(n1, z1), evaluate(n2, z2))
+        asyncio.run(main())
+        self.assertEqual(z1.state, 8.0)
+        self.assertEqual(z2.state, 32.0)
+        self.assertEqual(x1.sensitivity, 16.0)
+        self.assertEqual(x2.sensitivity, 32.0)
+
+        # Cancelling does not start further modules, but waits for the running ones
+        netw, x, z = build(delay=0.2)
+
+        async def cancel():
+            task = asyncio.ensure_future(netw.response_async())
+            await asyncio.get_running_loop().run_in_executor(None, netw.mods[0].started.wait)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(cancel())
+        self.assertEqual(netw.mods[0].sig_out[0].state, 2.0)  # Finished
+        self.assertFalse(netw.mods[2].started.is_set())
+        self.assertIsNone(z.state)
+
+        # An in-place change of an input is detected in incremental mode
+        x = pym.Signal('x', np.array([1.0, 2.0]))
+        y = pym.Signal('y')
+        netw = pym.Network(Slow(x, y), incremental=True)
+        asyncio.run(netw.response_async())
+        np.testing.assert_allclose(y.state, [2.0, 4.0])
+        x.state[:] = 5.0
+        asyncio.run(netw.response_async())
+        np.testing.assert_allclose(y.state, [10.0, 10.0])
+        x.state[:] = 7.0
+        asyncio.run(netw.response_async())
+        np.testing.assert_allclose(y.state, [14.0, 14.0])
+
+    def test_precision(self):
+        domain = pym.DomainDefinition(8, 6)
+        bc = domain.get_nodenumber(0, np.arange(domain.nely + 1))
+        f = np.zeros(domain.nnodes)
+        f[domain.get_nodenumber(domain.nelx, domain.nely // 2)] = 1.0
+
+        def build(precision):
+            x = pym.Signal('x', np.random.rand(domain.nel))
+            xf, xs, K, u, c = pym.Signal('xf'), pym.Signal('xs'), pym.Signal('K'), pym.Signal('u'), pym.Signal('c')
+            netw = pym.Network(pym.FilterConv(x, xf, domain=domain, radius=1.5),
+                               pym.MathGeneral(xf, xs, expression="1e-3 + inp0^3"),
+                               pym.AssemblePoisson(xs, K, domain=domain, bc=bc),
+                               pym.LinSolve([K, pym.Signal('f', f)], u),
+                               pym.EinSum([u, u], c, expression="i,i->"),
+                               precision=precision)
+            return netw, x, [xf, xs, K, u, c]
+
+        np.random.seed(0)
+        netw64, x64, sigs64 = build(None)
+        np.random.seed(0)
+        netw32, x32, sigs32 = build(np.float32)
+        netw64.response()
+        netw32.response()
+
+        # The design field and matrix are single precision, the solve is done in double precision
+        self.assertEqual(sigs32[0].state.dtype, np.float32)
+        self.assertEqual(sigs32[1].state.dtype, np.float32)
+        self.assertEqual(sigs32[2].state.dtype, np.float32)
+        self.assertEqual(sigs32[3].state.dtype, np.float64)
+        self.assertEqual(netw32.mods[0]._typed(netw32.mods[0].weights, np.float32).dtype, np.float32)
+        np.testing.assert_allclose(sigs32[4].state, sigs64[4].state, rtol=1e-5)
+
+        sigs64[4].sensitivity = 1.0
+        sigs32[4].sensitivity = 1.0
+        netw64.sensitivity()
+        netw32.sensitivity()
+        np.testing.assert_allclose(x32.sensitivity, x64.sensitivity, rtol=1e-4, atol=1e-6*np.max(abs(x64.sensitivity)))
+
+        def tfn(x0, dx, df_an, df_fd):
+            np.testing.assert_allclose(df_an, df_fd, rtol=1e-2, atol=1e-3*np.max(abs(x64.sensitivity)))
+        pym.finite_difference(netw32, x32, sigs32[4], dx=1e-3, test_fn=tfn, verbose=False)
+
+        # The modules before the checked part are evaluated with the same precision
+        pym.finite_difference(netw32, sigs32[1], sigs32[4], dx=1e-3, test_fn=lambda *args: None, verbose=False)
+        self.assertEqual(sigs32[0].state.dtype, np.float32)
+
+        # A module which is shared with another network does not keep the precision
+        pym.Network(netw32.mods[0]).response()
+        self.assertEqual(sigs32[0].state.dtype, np.float64)
+
+        # Without policy the original precision is restored
+        netw32.precision = None
+        netw32.response()
+        self.assertEqual(sigs32[0].state.dtype, np.float64)
+        self.assertEqual(sigs32[2].state.dtype, np.float64)
+
+    def test_batched_network(self):
+        domain = pym.DomainDefinition(6, 5)
+        bc = domain.get_nodenumber(0, np.arange(domain.nely + 1))
+        f = np.zeros(domain.nnodes)
+        f[domain.get_nodenumber(domain.nelx, domain.nely // 2)] = 1.0
+
+        def build(x0, f0):
+            x, f = pym.Signal('x', x0), pym.Signal('f', f0)
+            xf, xs, K, u, c = pym.Signal('xf'), pym.Signal('xs'), pym.Signal('K'), pym.Signal('u'), pym.Signal('c')
+            netw = pym.Network(pym.FilterConv(x, xf, domain=domain, radius=1.5),
+                               pym.MathGeneral(xf, xs, expression="1e-3 + inp0^3"),
+                               pym.AssemblePoisson(xs, K, domain=domain, bc=bc),
+                               pym.LinSolve([K, f], u),
+                               pym.EinSum([u, u], c, expression="i,i->"))
+            return netw, x, f, c
+
+        np.random.seed(0)
+        X = np.random.rand(4, domain.nel)
+        for F in [f, np.outer(1.0 + np.arange(len(X)), f)]:  # Shared and batched right-hand-side
+            netw, x, sf, c = build(X, F)
+            netw.response()
+            self.assertEqual(netw.mods[2].sig_out[0].state.shape, (len(X), ))
+            c.sensitivity = np.arange(1.0, len(X) + 1)
+            netw.sensitivity()
+            self.assertEqual(x.sensitivity.shape, X.shape)
+            self.assertEqual(sf.sensitivity.shape, F.shape)
+
+            # Equal to evaluating each design separately
+            df = 0
+            for i in range(len(X)):
+                n1, x1, f1, c1 = build(X[i], F[i] if F.ndim > 1 else F)
+                n1.response()
+                c1.sensitivity = c.sensitivity[i]
+                n1.sensitivity()
+                np.testing.assert_allclose(c.state[i], c1.state)
+                np.testing.assert_allclose(x.sensitivity[i], x1.sensitivity)
+                if F.ndim > 1:
+                    np.testing.assert_allclose(sf.sensitivity[i], f1.sensitivity)
+                else:
+                    df = df + f1.sensitivity
+            if F.ndim == 1:
+                np.testing.assert_allclose(sf.sensitivity, df)
+
+    def test_checkpointed_network(self):
+        x = pym.Signal('x', np.linspace(0.1, 1.0, 100))
+        y1, y2, y3, z = pym.Signal('y1'), pym.Signal('y2'), pym.Signal('y3'), pym.Signal('z')
+        mods = [pym.MathGeneral(x, y1, expression="sin(x)"),
+                pym.MathGeneral(y1, y2, expression="y1^2 + 1"),
+                pym.MathGeneral([y2, x], y3, expression="y2*x"),
+                pym.EinSum(y3, z, expression="i->")]
+
+        ref = pym.Network(*mods)
+        ref.response()
+        z_ref = z.state
+        z.sensitivity = 1.0
+        ref.sensitivity()
+        dx_ref = x.sensitivity.copy()
+        ref.reset()
+
+        for recompute, n_discard in [('auto', 3), (mods[:2], 2)]:
+            with self.subTest(recompute=recompute if isinstance(recompute, str) else 'list'):
+                netw = pym.Network(*mods, recompute=recompute)
+                netw.response()
+                self.assertEqual(z.state, z_ref)
+                self.assertEqual(netw.checkpoint_stats['n_discarded'], n_discard)
+                self.assertEqual(netw.checkpoint_stats['discarded_bytes'], n_discard*x.state.nbytes)
+                self.assertIsNone(y1.state)
+                self.assertIsNone(y2.state)
+
+                z.sensitivity = 1.0
+                netw.sensitivity()
+                np.testing.assert_allclose(x.sensitivity, dx_ref)
+                self.assertIsNone(y1.state)
+                self.assertGreaterEqual(netw.checkpoint_stats['n_recomputed'], n_discard)
+                netw.reset()
+
+        # Only discard until the budget is met
+        netw = pym.Network(*mods, recompute='auto', memory_budget=2*x.state.nbytes)
+        netw.response()
+        self.assertEqual(netw.checkpoint_stats['n_discarded'], 1)
+
+    def test_incremental_network(self):
+        class CountModule(pym.Module):
+            def _prepare(self, factor):
+                self.factor = factor
+                self.n_resp, self.n_sens = 0, 0
+
+            def _response(self, x):
+                self.n_resp += 1
+                return self.factor*x
+
+            def _sensitivity(self, dy):
+                self.n_sens += 1
+                return self.factor*dy
+
+        x1 = pym.Signal('x1', np.array([1.0, 2.0]))
+        x2 = pym.Signal('x2', 3.0)
+        y1, y2, z = pym.Signal('y1'), pym.Signal('y2'), pym.Signal('z')
+        m1 = CountModule(x1, y1, factor=2.0)
+        m2 = CountModule(x2, y2, factor=3.0)
+        m3 = pym.MathGeneral([y1, y2], z, expression="y1*y2")
+        netw = pym.Network(m1, m2, m3, incremental=True)
+
+        netw.response()
+        np.testing.assert_allclose(z.state, [18.0, 36.0])
+        self.assertEqual((m1.n_resp, m2.n_resp), (1, 1))
+
+        # Nothing changed
+        netw.response()
+        self.assertEqual((m1.n_resp, m2.n_resp), (1, 1))
+
+        # Setting an identical scalar does not trigger a re-evaluation
+        x2.state = 3.0
+        netw.response()
+        self.assertEqual((m1.n_resp, m2.n_resp), (1, 1))
+
+        # Only the changed branch is evaluated
+        x1.state = np.array([2.0, 2.0])
+        netw.response()
+        np.testing.assert_allclose(z.state, [36.0, 36.0])
+        self.assertEqual((m1.n_resp, m2.n_resp), (2, 1))
+
+        z.sensitivity = np.array([1.0, 1.0])
+        netw.sensitivity()
+        np.testing.assert_allclose(x1.sensitivity, [18.0, 18.0])
+        self.assertEqual(x2.sensitivity, 24.0)
+        self.assertEqual((m1.n_sens, m2.n_sens), (1, 1))
+        netw.reset()
+
+        # Re-use of the sensitivities
+        z.sensitivity = np.array([1.0, 1.0])
+        netw.sensitivity()
+        np.testing.assert_allclose(x1.sensitivity, [18.0, 18.0])
+        self.assertEqual(x2.sensitivity, 24.0)
+        self.assertEqual((m1.n_sens, m2.n_sens), (1, 1))
+        netw.reset()
+
+        # Changed output sensitivity
+        z.sensitivity = np.array([1.0, 0.0])
+        netw.sensitivity()
+        np.testing.assert_allclose(x1.sensitivity, [18.0, 0.0])
+        self.assertEqual(x2.sensitivity, 12.0)
+        self.assertEqual((m1.n_sens, m2.n_sens), (2, 2))
+        netw.reset()
+
+        # An in-place change of an input is detected
+        x1.state[:] = 1.0
+        netw.response()
+        np.testing.assert_allclose(z.state, [18.0, 18.0])
+        self.assertEqual((m1.n_resp, m2.n_resp), (3, 1))
+
+    def test_incremental_nested_network(self):
+        # A nested network adds to the sensitivity of y without a traceable contribution
+        x = pym.Signal('x', np.array([1.0, 2.0]))
+        y, z1, z2 = pym.Signal('y'), pym.Signal('z1'), pym.Signal('z2')
+        m_a = pym.MathGeneral(x, y, expression="inp0^2")
+        nested = pym.Network(pym.MathGeneral(y, z1, expression="3*inp0"), incremental=True)
+        m_b = pym.MathGeneral(y, z2, expression="5*inp0")
+        netw = pym.Network(m_a, nested, m_b, incremental=True)
+        netw.response()
+
+        z1.sensitivity = np.array([1.0, 1.0])
+        z2.sensitivity = np.array([1.0, 1.0])
+        netw.sensitivity()
+        np.testing.assert_allclose(x.sensitivity, [16.0, 32.0])
+        netw.reset()
+
+        # Only the seed of the nested network changes
+        z1.sensitivity = np.array([2.0, 2.0])
+        z2.sensitivity = np.array([1.0, 1.0])
+        netw.sensitivity()
+        np.testing.assert_allclose(x.sensitivity, [22.0, 44.0])
+        netw.reset()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -136,6 +136,23 @@ class TestConvolutionFilter(unittest.TestCase):
 
         pym.finite_difference(m, test_fn=fd_testfn)
 
+    def test_batch(self):
+        np.random.seed(0)
+        domain = pym.DomainDefinition(10, 12)
+        x = np.random.rand(3, domain.nel)
+        sx = pym.Signal('x', state=x)
+        for m in [pym.FilterConv(sx, domain=domain, radius=2.5, xmin_bc=0.0),
+                  pym.DensityFilter(sx, domain=domain, radius=2.5)]:
+            m.response()
+            y = m.sig_out[0].state.copy()
+            self.assertEqual(y.shape, x.shape)
+            for i in range(len(x)):
+                sx.state = x[i]
+                m.response()
+                npt.assert_allclose(y[i], m.sig_out[0].state)
+            sx.state = x
+            pym.finite_difference(m, test_fn=fd_testfn)
+
     def test_3D_dot(self):
         np.random.seed(0)
         domain = pym.DomainDefinition(10, 11, 12)
@@ -92,6 +92,33 @@ class TestLinSolveModuleSparse(unittest.TestCase):
         def tfn(x0, dx, df_an, df_fd): self.assertTrue(np.allclose(df_an, df_fd, rtol=2e-3, atol=1e-5))
         pym.finite_difference(fn, [sx, sf], su, test_fn=tfn, dx=1e-5, tol=1e-4, verbose=False)
 
+    def test_symmetric_real_compliance3d_matrix_free(self):
+        """ Test the matrix-free operator, solved with CG, against the sparse matrix (compliance in 3D) """
+        N = 4  # Number of elements
+        dom = pym.DomainDefinition(N, N, N)
+        np.random.seed(0)
+        sx = pym.Signal('x', np.random.rand(dom.nel) + 0.1)
+        jfix, kfix = np.meshgrid(np.arange(0, N+1), np.arange(0, N+1), indexing='ij')
+        fixed_nodes = dom.get_nodenumber(0, jfix, kfix).flatten()
+        bc = np.concatenate((fixed_nodes*3, fixed_nodes*3+1, fixed_nodes*3+2))
+        iforce = dom.get_nodenumber(N, np.arange(0, N+1), np.arange(0, N+1))*3 + 1
+        sf = pym.Signal('f', np.zeros(dom.nnodes*3))
+        sf.state[iforce] = 1.0
+
+        fn = pym.Network()
+        sK = fn.append(pym.AssembleStiffness(sx, pym.Signal('K'), dom, bc=bc, matrix_type=pym.MatrixFreeOperator))
+        solver = pym.solvers.CG(preconditioner=pym.solvers.GeometricMultigrid(dom), tol=1e-12)
+        su = fn.append(pym.LinSolve([sK, sf], pym.Signal('u'), solver=solver))
+        sc = fn.append(pym.EinSum([su, sf], pym.Signal('c'), expression='i,i->'))
+        fn.response()
+        self.assertIsInstance(sK.state, pym.MatrixFreeOperator)
+
+        K = pym.AssembleStiffness(sx, domain=dom, bc=bc).response().sig_out[0].state
+        npt.assert_allclose(K @ su.state, sf.state, atol=1e-10)  # Check residual with the sparse matrix
+
+        def tfn(x0, dx, df_an, df_fd): npt.assert_allclose(df_an, df_fd, rtol=1e-4, atol=1e-5)
+        pym.finite_difference(fn, sx, sc, test_fn=tfn, dx=1e-6, tol=1e-4, verbose=False)
+
     def test_symmetric_complex_dyncompliance2d(self):
         """ Test symmetric complex sparse matrix (dynamic compliance in 2D)"""
         N = 5  # Number of elements
@@ -123,6 +150,50 @@ class TestLinSolveModuleSparse(unittest.TestCase):
         pym.finite_difference(fn, [sx, sf, sOmega], su, test_fn=tfn, dx=1e-7, tol=1e-4, verbose=False)
 
 
+class TestLinSolveMultiSeed(unittest.TestCase):
+    def test_multi_seed_compliance2d(self):
+        """ Gradients of multiple responses in one backward sweep, compared to one sweep per response """
+        N = 8
+        dom = pym.DomainDefinition(N, N)
+        np.random.seed(0)
+        sx = pym.Signal('x', 0.1 + 0.9*np.random.rand(dom.nel))
+        fixed_nodes = dom.get_nodenumber(0, np.arange(0, N + 1))
+        bc = np.concatenate((fixed_nodes * 2, fixed_nodes * 2 + 1))
+        f = np.zeros((dom.nnodes * 2, 2))
+        f[dom.get_nodenumber(N, np.arange(0, N + 1)) * 2, 0] = 1.0
+        f[dom.get_nodenumber(N, np.arange(0, N + 1)) * 2 + 1, 1] = 1.0
+
+        for k, (fi, expr) in {'single': (f[:, 0], 'i,i->'), 'multiple': (f, 'ij,ij->')}.items():
+            with self.subTest(f"RHS-{k}"):
+                sf = pym.Signal('f', fi)
+                fn = pym.Network()
+                sK = fn.append(pym.AssembleStiffness(sx, pym.Signal('K'), dom, bc=bc))
+                su = fn.append(pym.LinSolve([sK, sf], pym.Signal('u')))
+                sc = fn.append(pym.EinSum([su, sf], pym.Signal('c'), expression=expr))
+                su2 = fn.append(pym.EinSum([su, su], pym.Signal('u2'), expression=expr))
+                sv = fn.append(pym.EinSum(sx, pym.Signal('v'), expression='i->'))
+                responses = [sc, su2, sv]
+                fn.response()
+
+                dx_ref = []
+                for r in responses:
+                    r.sensitivity = 1.0
+                    fn.sensitivity()
+                    dx_ref.append(sx.sensitivity.copy())
+                    fn.reset()
+
+                for i, r in enumerate(responses):
+                    seeds = np.zeros(len(responses))
+                    seeds[i] = 1.0
+                    r.sensitivity_multi = seeds
+                fn.sensitivity_multi()
+                self.assertEqual(sx.sensitivity_multi.shape, (len(responses), dom.nel))
+                for i in range(len(responses)):
+                    npt.assert_allclose(sx.sensitivity_multi[i], dx_ref[i], rtol=1e-8, atol=1e-12)
+                fn.reset()
+                self.assertIsNone(sx.sensitivity_multi)
+
+
 class TestAssemblyAddValues(unittest.TestCase):
     def test_finite_difference(self):
         np.random.seed(0)
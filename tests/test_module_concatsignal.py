@@ -38,6 +38,35 @@ class TestConcat(unittest.TestCase):
         self.assertEqual(s5.sensitivity.shape, ())
         self.assertEqual(type(s5.sensitivity), np.ndarray)
 
+    def test_concatsignal_packed(self):
+        s1, s2 = pym.Signal('sig1', np.array([1.0, 2.0])), pym.Signal('sig2', np.array([[3.0], [4.0]]))
+        packed = pym.PackedSignals([s1, s2])
+
+        s = pym.Signal('out')
+        m = pym.ConcatSignal([s1, s2], s)
+        m.response()
+        self.assertTrue(np.shares_memory(s.state, packed.state))
+        np.testing.assert_allclose(s.state, [1.0, 2.0, 3.0, 4.0])
+
+        # Reversed order cannot be a view
+        m = pym.ConcatSignal([s2, s1], s)
+        m.response()
+        self.assertFalse(np.shares_memory(s.state, packed.state))
+        np.testing.assert_allclose(s.state, [3.0, 4.0, 1.0, 2.0])
+
+        # A single input is copied, not aliased
+        x = pym.Signal('x', np.array([1.0, 2.0]))
+        m = pym.ConcatSignal([x], s)
+        m.response()
+        self.assertFalse(np.shares_memory(s.state, x.state))
+        s.state[0] = 5.0
+        np.testing.assert_allclose(x.state, [1.0, 2.0])
+
+        # Neither is a single variable of a packed vector
+        m = pym.ConcatSignal([s1], s)
+        m.response()
+        self.assertFalse(np.shares_memory(s.state, packed.state))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -162,6 +162,48 @@ class TestEinSum(unittest.TestCase):
             self.assertTrue(np.allclose(out_chk, s_out.state))
             pym.finite_difference(blk, test_fn=self.assert_fd)
 
+    def test_batch(self):
+        n, n_batch = 4, 3
+        a = np.random.rand(n_batch, n)
+        b = np.random.rand(n)
+
+        s_a, s_b, s_out = pym.Signal("a", a), pym.Signal("b", b), pym.Signal("a.b")
+        blk = pym.EinSum([s_a, s_b], s_out, expression="i,i->")
+        blk.response()
+        self.assertTrue(np.allclose(a.dot(b), s_out.state))
+        pym.finite_difference(blk, test_fn=lambda x0, dx, dg_an, dg_fd: np.testing.assert_allclose(dg_an, dg_fd, rtol=1e-5))
+
+        # Sum of each vector in the batch
+        s_sum = pym.Signal("sum(a)")
+        blk = pym.EinSum(s_a, s_sum, expression="i->")
+        blk.response()
+        self.assertTrue(np.allclose(a.sum(axis=1), s_sum.state))
+        s_sum.sensitivity = np.arange(n_batch, dtype=float)
+        blk.sensitivity()
+        self.assertTrue(np.allclose(s_a.sensitivity, np.arange(n_batch)[:, None] * np.ones(n)))
+
+        # Without batch, the original expression is used
+        s_a.state = a[0]
+        blk.response()
+        self.assertTrue(np.allclose(a[0].sum(), s_sum.state))
+
+    def test_sensitivity_multi(self):
+        """ Stacked seeds give the same sensitivities as separate seeds """
+        n, n_seeds = 4, 3
+        b = np.random.rand(n)
+        for expression in ["i,i->", "i,i->i", "ij,j->j", "ij,j->i"]:
+            shapes = [(n, n) if ind == 'ij' else (n, ) for ind in expression.split('->')[0].split(',')]
+            s_in = [pym.Signal("a", np.random.rand(*shapes[0])), pym.Signal("b", b)]
+            s_out = pym.Signal("out")
+            blk = pym.EinSum(s_in, s_out, expression=expression)
+            blk.response()
+            seeds = np.random.rand(n_seeds, *np.shape(s_out.state))
+            ref = [blk._sensitivity(seed) for seed in seeds]
+            for i, da in enumerate(blk._sensitivity_multi(seeds)):
+                self.assertEqual(da.shape, (n_seeds, ) + s_in[i].state.shape)
+                for k in range(n_seeds):
+                    np.testing.assert_allclose(da[k], ref[k][i])
+
 
 if __name__ == '__main__':
     unittest.main()
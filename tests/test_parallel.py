@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+import pymoto as pym
+
+
+def build_branches(sx, n_branches=2):
+    """ Independent branches with a large (shared-memory) and a small (pickled) output each """
+    branches, outputs = [], []
+    for i in range(n_branches):
+        sy, sz = pym.Signal(f'y{i}'), pym.Signal(f'z{i}')
+        branches.append([pym.MathGeneral(sx, sy, expression=f"sin(inp0)*{i + 1}"),
+                         pym.EinSum([sy, sy], sz, expression="i,i->")])
+        outputs.append((sy, sz))
+    return branches, outputs
+
+
+class TestParallelNetwork(unittest.TestCase):
+    def test_response_and_sensitivity(self):
+        x0 = np.linspace(0.0, 1.0, 10000)  # Large enough to be exchanged via shared memory
+        sx = pym.Signal('x', x0.copy())
+        branches, outputs = build_branches(sx)
+        par = pym.ParallelNetwork(*branches, outputs=[s for o in outputs for s in o], shm_threshold=1024)
+        try:
+            self.assertEqual(par.sig_in, [sx])
+            self.assertEqual(len(par.sig_out), 4)
+
+            stot = pym.Signal('total')
+            netw = pym.Network(par, pym.MathGeneral([outputs[0][1], outputs[1][1]], stot, expression="inp0 + inp1"))
+            for it in range(3):  # Repeated iterations re-use the shared memory and the worker data
+                sx.state = x0 + 0.1*it
+                netw.reset()
+                netw.response()
+                np.testing.assert_allclose(outputs[1][0].state, 2*np.sin(sx.state))
+                self.assertAlmostEqual(stot.state, 5*np.sum(np.sin(sx.state)**2))
+
+                stot.sensitivity = 1.0
+                netw.sensitivity()
+                np.testing.assert_allclose(sx.sensitivity, 10*np.sin(sx.state)*np.cos(sx.state))
+        finally:
+            par.close()
+
+    def test_worker_error(self):
+        sx = pym.Signal('x', np.array([1.0, 2.0]))
+        sy = pym.Signal('y')
+        par = pym.ParallelNetwork([pym.EinSum(sx, sy, expression="i,i->")])
+        try:
+            with self.assertRaises(ValueError) as cm:
+                par.response()
+            self.assertIn("worker process of branch 0", str(cm.exception))
+        finally:
+            par.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
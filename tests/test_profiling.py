@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+import pymoto as pym
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.x = pym.Signal('x', np.linspace(0.0, 1.0, 1000))
+        self.y, self.z, self.c = pym.Signal('y'), pym.Signal('z'), pym.Signal('c')
+        self.m1 = pym.MathGeneral(self.x, self.y, expression="x^2")
+        self.inner = pym.Network(pym.MathGeneral(self.y, self.z, expression="2*y"),
+                                 pym.EinSum(self.z, self.c, expression="i->"))
+        self.netw = pym.Network(self.m1, self.inner)
+
+    def run_iterations(self, n):
+        for i in range(n):
+            self.netw.response()
+            self.c.sensitivity = 1.0
+            self.netw.sensitivity()
+            self.netw.reset()
+
+    def test_statistics(self):
+        profiler = self.netw.enable_profiling()
+        self.run_iterations(3)
+
+        rep = profiler.report()
+        self.assertEqual([r['name'] for r in rep], ['0:MathGeneral', '1:Network'])
+        self.assertEqual([c['name'] for c in rep[1]['children']], ['0:MathGeneral', '1:EinSum'])
+        for phase in ['response', 'sensitivity', 'reset']:
+            st = rep[0]['phases'][phase]
+            self.assertEqual(st['count'], 3)
+            self.assertLessEqual(st['min'], st['max'])
+            self.assertLessEqual(st['max'], st['total'])
+
+        # Nested network includes the time of its children
+        rows = profiler.records()
+        paths = [r['path'] for r in rows]
+        self.assertIn('1:Network/1:EinSum', paths)
+        inner_resp = next(r for r in rows if r['path'] == '1:Network' and r['phase'] == 'response')
+        child_resp = [r['total'] for r in rows if r['path'].startswith('1:Network/') and r['phase'] == 'response']
+        self.assertAlmostEqual(inner_resp['self_time'], inner_resp['total'] - sum(child_resp))
+        self.assertGreaterEqual(inner_resp['total'], sum(child_resp))
+
+        # No more statistics after disabling
+        self.assertIs(self.netw.disable_profiling(), profiler)
+        self.assertIsNone(self.inner.profiler)
+        self.run_iterations(1)
+        self.assertEqual(profiler.report()[0]['phases']['response']['count'], 3)
+
+    def test_memory(self):
+        profiler = self.netw.enable_profiling(memory=True)
+        self.run_iterations(1)
+        self.netw.disable_profiling()
+        st = profiler.report()[0]['phases']['response']
+        self.assertGreaterEqual(st['peak_bytes'], self.x.state.nbytes)
+        profiler.print_report()
+
+
+class TestTracer(unittest.TestCase):
+    def test_trace_export(self):
+        N = 6
+        dom = pym.DomainDefinition(N, N)
+        sx = pym.Signal('x', np.ones(dom.nel))
+        fixed_nodes = dom.get_nodenumber(0, np.arange(0, N + 1))
+        bc = np.concatenate((fixed_nodes * 2, fixed_nodes * 2 + 1))
+        f = np.zeros(dom.nnodes * 2)
+        f[dom.get_nodenumber(N, N) * 2 + 1] = 1.0
+        sf = pym.Signal('f', f)
+
+        fn = pym.Network(n_threads=2)
+        sK = fn.append(pym.AssembleStiffness(sx, pym.Signal('K'), dom, bc=bc))
+        su = fn.append(pym.LinSolve([sK, sf], pym.Signal('u')))
+        sc = fn.append(pym.EinSum([su, sf], pym.Signal('c'), expression='i,i->'))
+        sv = fn.append(pym.EinSum(sx, pym.Signal('v'), expression='i->'))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, 'trace.json')
+            with pym.Tracer(filename) as tracer:
+                self.assertIs(pym.Tracer.active, tracer)
+                fn.response()
+                sc.sensitivity = 1.0
+                sv.sensitivity = 1.0
+                fn.sensitivity()
+            self.assertIsNone(pym.Tracer.active)
+            fn.reset()
+
+            with open(filename) as fp:
+                trace = json.load(fp)
+
+        spans = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+        names = set(e['name'] for e in spans)
+        for name in ['AssembleStiffness.response', 'LinSolve.sensitivity', 'EinSum.response', 'Network.response',
+                     'LDAWrapper.solve', 'LDAWrapper.update']:
+            self.assertIn(name, names)
+        lin = next(e for e in spans if e['name'] == 'LinSolve.response')
+        self.assertEqual(lin['args']['inputs'], ['K', 'f'])
+        self.assertEqual(lin['args']['outputs'], ['u'])
+        self.assertTrue(all(e['dur'] >= 0 for e in spans))
+        self.assertTrue(any(e['ph'] == 'M' and e['name'] == 'thread_name' for e in trace['traceEvents']))
+
+        # Asynchronous evaluations are traced as well
+        with pym.Tracer() as tracer:
+            asyncio.run(fn.response_async())
+            sc.sensitivity = 1.0
+            asyncio.run(fn.sensitivity_async())
+        fn.reset()
+        names = set(e['name'] for e in tracer.events if e['ph'] == 'X')
+        for name in ['Network.response_async', 'Network.sensitivity_async', 'LinSolve.response', 'EinSum.sensitivity']:
+            self.assertIn(name, names)
+
+        # Nothing is recorded afterwards
+        n_events = len(tracer.events)
+        fn.response()
+        self.assertEqual(len(tracer.events), n_events)
+
+
+if __name__ == '__main__':
+    unittest.main()
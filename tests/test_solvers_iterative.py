@@ -94,3 +94,26 @@ class TestMultigrid(unittest.TestCase):
         uc = np.ones(int(domain.nelx / 2 + 1) * int(domain.nely / 2 + 1) * int(domain.nelz / 2 + 1) * 3)
         uf = mg1.R @ uc
         npt.assert_allclose(uf, 1.0)
+
+    def test_matrix_free(self):
+        """ The coarse levels of a matrix-free operator equal the Galerkin projection of the sparse matrix """
+        domain = pym.DomainDefinition(8, 4, 4)
+        bc_nodes = domain.nodes[0, :, :].flatten()
+        bc = np.concatenate([bc_nodes * 3, bc_nodes * 3 + 1, bc_nodes * 3 + 2])
+        np.random.seed(0)
+        sx = pym.Signal('x', np.random.rand(domain.nel) + 0.1)
+        K = pym.AssembleStiffness(sx, domain=domain, bc=bc).response().sig_out[0].state
+        op = pym.AssembleStiffness(sx, domain=domain, bc=bc, matrix_type=pym.MatrixFreeOperator).response().sig_out[0].state
+
+        mg2 = pym.solvers.GeometricMultigrid(pym.DomainDefinition(4, 2, 2, unitx=2.0, unity=2.0, unitz=2.0))
+        mg1 = pym.solvers.GeometricMultigrid(domain, inner_level=mg2)
+        mg1.update(op)
+        self.assertIsInstance(mg2.A, pym.MatrixFreeOperator)  # The intermediate level stays matrix-free
+        Kc = mg1.R.T @ K @ mg1.R
+        npt.assert_allclose(mg2.A.toarray(), Kc.toarray(), atol=1e-12)
+        npt.assert_allclose(mg2.A.diagonal(), Kc.diagonal(), atol=1e-12)
+
+        # Solve with multigrid-preconditioned CG
+        f = np.random.rand(K.shape[0])
+        cg = pym.solvers.CG(op, preconditioner=mg1, tol=1e-10)
+        npt.assert_allclose(K @ cg.solve(f), f, atol=1e-8)